@@ -30,6 +30,7 @@ systems, with a focus on ease of use and flexibility.
 import pulsar
 from .stages import get_logs
 from .stages import send_messages
+from .stages import consume_messages
 from .__version__ import (
     __title__,
     __description__,
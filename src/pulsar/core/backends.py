@@ -0,0 +1,106 @@
+# pulsar/core/backends.py
+from concurrent.futures import Future
+from typing import Any, Callable, Optional, Protocol, runtime_checkable
+
+from pulsar.core.broker import LoopbackBroker
+from pulsar.core.dependencies import Producer
+from pulsar.core.inflight import SendCallback
+from pulsar.core.producer_group import ProducerGroup
+
+# What a backend may support beyond plain sends
+CAPABILITIES = ("batch", "async", "acks", "partitions")
+
+_PROTOCOL_METHODS = ("connect", "disconnect", "close", "send_message", "send_async",
+                     "flush", "capabilities", "is_available")
+
+# Methods a backend needs for each capability it declares
+_CAPABILITY_METHODS = {"batch": "send_batch", "async": "send_async"}
+
+
+@runtime_checkable
+class ProducerBackend(Protocol):
+    """Interface SendMessagesStage drives its "producer" dependency through"""
+
+    def connect(self) -> None: ...
+
+    def disconnect(self) -> None: ...
+
+    def close(self) -> None: ...
+
+    def send_message(self, msg: Any) -> None: ...
+
+    def send_async(self, msg: Any, callback: Optional[SendCallback] = None) -> Future: ...
+
+    def flush(self, timeout: Optional[float] = None) -> bool: ...
+
+    def capabilities(self) -> frozenset[str]: ...
+
+    def is_available(self) -> bool: ...
+
+
+# Creates a backend from its config
+BackendFactory = Callable[[dict[str, Any]], ProducerBackend]
+
+_backends: dict[str, BackendFactory] = {}
+
+
+def register_backend(name: str, factory: Optional[BackendFactory] = None) -> Any:
+    """
+    Register a producer backend under a name
+    Usable directly or as a decorator:
+
+      >>> @register_backend("kafka")
+      ... def kafka_producer(config): return KafkaProducer(config)
+
+    :name: Name the backend is created by
+    :factory: Callable creating the backend from a config dict
+    :return: The factory, so the decorated function stays usable
+    """
+    if factory is None:
+        return lambda decorated: register_backend(name, decorated)
+    _backends[name] = factory
+    return factory
+
+
+def unregister_backend(name: str) -> None:
+    _backends.pop(name, None)
+
+
+def backend_names() -> list[str]:
+    """Names of the registered backends, in registration order"""
+    return list(_backends)
+
+
+def create_backend(name: str, config: Optional[dict[str, Any]] = None) -> ProducerBackend:
+    """
+    Create a registered backend
+    :raises ValueError: If no backend is registered under the name
+    """
+    if name not in _backends:
+        raise ValueError(f"Unknown producer backend: {name}, registered: {backend_names()}")
+    return _backends[name](dict(config or {}))
+
+
+def check_conformance(producer: Any) -> list[str]:
+    """
+    Check a producer against the ProducerBackend protocol
+    :return: One line per problem, empty when the producer conforms
+    """
+    problems = [f"missing {name}()" for name in _PROTOCOL_METHODS if not callable(getattr(producer, name, None))]
+    if callable(getattr(producer, "capabilities", None)):
+        declared = producer.capabilities()
+        problems += [f"unknown capability {c!r}" for c in sorted(declared) if c not in CAPABILITIES]
+        problems += [
+            f"declares {capability!r} without {method}()"
+            for capability, method in _CAPABILITY_METHODS.items()
+            if capability in declared and not callable(getattr(producer, method, None))
+        ]
+    return problems
+
+
+register_backend("print", lambda config: Producer(config))
+register_backend("loopback", lambda config: Producer({"broker": LoopbackBroker(), **config}))
+register_backend("group", lambda config: ProducerGroup.for_topics(
+    config.pop("topics", {"pulsar": 4}),
+    lambda topic, index: Producer({**config, "topic": topic}),
+))
@@ -0,0 +1,151 @@
+# pulsar/core/batching.py
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from pulsar.core.histogram import LatencyHistogram
+
+DEFAULT_BATCH_SIZE = 100
+
+FLUSH_REASONS = ("size", "bytes", "linger", "flush")
+
+
+def message_size(message: Any) -> int:
+    """Size in bytes of a str, bytes or buffer message, 0 for anything else"""
+    if isinstance(message, memoryview):
+        return message.nbytes
+    return len(message) if isinstance(message, (str, bytes, bytearray)) else 0
+
+
+class MessageBatcher:
+    """
+    Accumulates messages and hands them to a batch send as one operation
+    A batch is flushed as soon as it holds max_messages messages or
+    max_bytes bytes, or once its oldest message has waited linger seconds.
+    Batches are sent in order, while holding the batcher's lock, so add()
+    blocks while a batch it filled is being sent.
+    """
+
+    def __init__(self,
+                 send_batch: Callable[[list[Any]], Any],
+                 max_messages: int = DEFAULT_BATCH_SIZE,
+                 max_bytes: Optional[int] = None,
+                 linger: float = 0.005,
+                 on_flush: Optional[Callable[[int, int, float, str], None]] = None,
+                 clock: Callable[[], float] = time.perf_counter):
+        """
+        :send_batch: Callable sending a list of messages, e.g. producer.send_batch
+        :max_messages: Messages per batch
+        :max_bytes: Bytes per batch, None leaves batch bytes unbounded
+        :linger: Seconds a message may wait for its batch to fill, 0 only
+                 flushes full batches and on flush()
+        :on_flush: Called after every batch with its size, its bytes, the
+                   seconds the send took and the reason it was flushed
+        :clock: Clock used for linger and flush timings, in seconds
+        """
+        if max_messages < 1:
+            raise ValueError("max_messages must be at least 1")
+        self.send_batch = send_batch
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self.linger = linger
+        self.on_flush = on_flush
+        self.clock = clock
+
+        self.batches = 0
+        self.messages = 0
+        self.reasons = dict.fromkeys(FLUSH_REASONS, 0)
+        self.sizes = LatencyHistogram(significant_figures=2)
+        self.latency = LatencyHistogram()
+        self.error: Optional[Exception] = None
+
+        self._batch: list[Any] = []
+        self._bytes = 0
+        self._opened = 0.0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._thread = None
+        if linger > 0:
+            self._thread = threading.Thread(target=self._linger, name="pulsar-batcher", daemon=True)
+            self._thread.start()
+
+    def _raise_error(self) -> None:
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def _send(self, reason: str) -> None:
+        """Send the pending batch; the lock must be held"""
+        batch, nbytes = self._batch, self._bytes
+        self._batch, self._bytes = [], 0
+        start = self.clock()
+        self.send_batch(batch)
+        elapsed = self.clock() - start
+
+        self.batches += 1
+        self.messages += len(batch)
+        self.reasons[reason] += 1
+        self.sizes.record(len(batch))
+        self.latency.record(elapsed * 1e6)
+        if self.on_flush:
+            self.on_flush(len(batch), nbytes, elapsed, reason)
+
+    def add(self, message: Any) -> None:
+        """Add a message, sending the batch if it is full"""
+        with self._lock:
+            self._raise_error()
+            if not self._batch:
+                self._opened = self.clock()
+                self._wakeup.notify()
+            self._batch.append(message)
+            self._bytes += message_size(message)
+            if len(self._batch) >= self.max_messages:
+                self._send("size")
+            elif self.max_bytes is not None and self._bytes >= self.max_bytes:
+                self._send("bytes")
+
+    def _linger(self) -> None:
+        with self._lock:
+            while not self._closed:
+                if not self._batch:
+                    self._wakeup.wait()
+                    continue
+                remaining = self._opened + self.linger - self.clock()
+                if remaining > 0:
+                    self._wakeup.wait(remaining)
+                    continue
+                try:
+                    self._send("linger")
+                except Exception as e:
+                    # Surfaced to the sending thread on its next add() or flush()
+                    self.error = e
+
+    def flush(self) -> None:
+        """Send the pending messages, if any"""
+        with self._lock:
+            self._raise_error()
+            if self._batch:
+                self._send("flush")
+
+    def close(self) -> None:
+        """Send the pending messages and stop the linger thread"""
+        try:
+            self.flush()
+        finally:
+            with self._lock:
+                self._closed = True
+                self._wakeup.notify()
+            if self._thread is not None:
+                self._thread.join()
+
+    def summary(self) -> dict[str, Any]:
+        """Batch counts, flush reasons, and the batch size and send latency (ms) distributions"""
+        return {
+            "batches": self.batches,
+            "messages": self.messages,
+            "mean_batch_size": self.messages / self.batches if self.batches else 0.0,
+            "flush_reasons": dict(self.reasons),
+            "batch_size": self.sizes.summary(),
+            "batch_latency_ms": self.latency.summary(scale=1000.0),
+        }
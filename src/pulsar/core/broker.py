@@ -0,0 +1,428 @@
+# pulsar/core/broker.py
+import random
+import socket
+import socketserver
+import struct
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Optional, Union
+
+from pulsar.core.exceptions import PulsarBrokerError, PulsarBrokerQueueFullError
+from pulsar.core.pacing import TokenBucket, wait_until
+
+SERVICE_TIME_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+
+QUEUE_POLICIES = ("reject", "block")
+
+# Wire protocol: a request is an op, the topic length and the body length,
+# followed by the topic and the body; a response is a status and the body length
+_REQUEST = struct.Struct("<BHI")
+_RESPONSE = struct.Struct("<BI")
+_LENGTH = struct.Struct("<I")
+_OFFSET = struct.Struct("<Q")
+_CONSUME = struct.Struct("<Id")
+
+_PRODUCE, _PRODUCE_BATCH, _CONSUME_OP, _ACK, _ACK_CUMULATIVE, _DEPTH = 1, 2, 3, 4, 5, 6
+_OK, _QUEUE_FULL, _ERROR = 0, 1, 2
+
+
+class ServiceTime:
+    """Distribution of the time the broker takes to serve a request"""
+
+    def __init__(self,
+                 distribution: str = "fixed",
+                 mean_ms: float = 0.0,
+                 spread: float = 0.5,
+                 seed: Optional[int] = None):
+        """
+        :distribution: One of SERVICE_TIME_DISTRIBUTIONS
+        :mean_ms: Mean service time in milliseconds (median for "lognormal")
+        :spread: Half-width relative to the mean for "uniform", sigma of the log for "lognormal"
+        :seed: Seed of the sampler, for reproducible runs
+        """
+        if distribution not in SERVICE_TIME_DISTRIBUTIONS:
+            raise ValueError(f"Unknown service time distribution {distribution!r}, "
+                             f"expected one of {SERVICE_TIME_DISTRIBUTIONS}")
+        self.distribution = distribution
+        self.mean = mean_ms / 1000
+        self.spread = spread
+        self._random = random.Random(seed)
+
+    def sample(self) -> float:
+        """Draw a service time, in seconds"""
+        if not self.mean:
+            return 0.0
+        if self.distribution == "fixed":
+            return self.mean
+        if self.distribution == "uniform":
+            return self._random.uniform(self.mean * (1 - self.spread), self.mean * (1 + self.spread))
+        if self.distribution == "exponential":
+            return self._random.expovariate(1 / self.mean)
+        return self._random.lognormvariate(0.0, self.spread) * self.mean
+
+
+class LoopbackBroker:
+    """
+    In-process broker stand-in accepting produce and consume traffic
+    Every produce request waits for the throttle, then holds one of the
+    broker's workers for a sampled service time before its messages are
+    appended to the topic and acknowledged with their offset. Topics are
+    bounded FIFO queues; a full queue rejects the request or blocks it until
+    consumers make room. serve() exposes the broker on a loopback TCP socket.
+    """
+
+    def __init__(self,
+                 service_time: Optional[ServiceTime] = None,
+                 workers: int = 1,
+                 max_queue: Optional[int] = None,
+                 queue_policy: str = "reject",
+                 block_timeout: float = 5.0,
+                 throttle_rate: Optional[float] = None,
+                 throttle_burst: int = 1,
+                 clock: Callable[[], float] = time.perf_counter):
+        """
+        :service_time: Time taken to serve each produce request, none by default
+        :workers: Produce requests served at the same time
+        :max_queue: Messages a topic holds before producing to it fails or blocks
+        :queue_policy: "reject" fails produce requests to a full topic, "block" waits for room
+        :block_timeout: Seconds a blocked produce request waits before it fails
+        :throttle_rate: Messages per second accepted, like a broker quota; None does not throttle
+        :throttle_burst: Messages accepted back to back under the throttle
+        :clock: Clock the throttle and service times run on, in seconds
+        """
+        if queue_policy not in QUEUE_POLICIES:
+            raise ValueError(f"Unknown queue policy {queue_policy!r}, expected one of {QUEUE_POLICIES}")
+        self.service_time = service_time or ServiceTime()
+        self.max_queue = max_queue
+        self.queue_policy = queue_policy
+        self.block_timeout = block_timeout
+        self.clock = clock
+        self._throttle = TokenBucket(throttle_rate, throttle_burst, clock=clock) if throttle_rate else None
+        self._throttle_lock = threading.Lock()
+        self._workers = threading.BoundedSemaphore(workers)
+        self._topics: dict[str, deque] = {}
+        self._offsets: dict[str, int] = {}
+        # Per topic, the offset every message below is acknowledged, and the acked offsets above it
+        self._acked_upto: dict[str, int] = {}
+        self._acked_above: dict[str, set[int]] = {}
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+
+        self.produced = 0
+        self.consumed = 0
+        self.acked = 0
+        self.rejected = 0
+        self.throttled = 0.0
+
+    def _wait_throttle(self, count: int) -> None:
+        if self._throttle is None:
+            return
+        with self._throttle_lock:
+            start = self.clock()
+            for _ in range(count):
+                self._throttle.next()
+            self.throttled += self.clock() - start
+
+    def _serve(self) -> None:
+        service = self.service_time.sample()
+        if service:
+            with self._workers:
+                wait_until(self.clock() + service, self.clock)
+
+    def _append(self, topic: str, messages: list[Any]) -> int:
+        """Append messages to a topic once it has room; the lock must be held"""
+        queue = self._topics.setdefault(topic, deque())
+        if self.max_queue is not None:
+            if len(messages) > self.max_queue:
+                self.rejected += len(messages)
+                raise PulsarBrokerQueueFullError(topic, self.max_queue)
+            has_room = lambda: len(queue) + len(messages) <= self.max_queue
+            if not has_room():
+                if self.queue_policy == "reject" or not self._changed.wait_for(has_room, self.block_timeout):
+                    self.rejected += len(messages)
+                    raise PulsarBrokerQueueFullError(topic, self.max_queue)
+        # Buffers may be reused by the producer once acknowledged, so keep a copy
+        queue.extend(bytes(m) if isinstance(m, (memoryview, bytearray)) else m for m in messages)
+        offset = self._offsets.get(topic, 0) + len(messages)
+        self._offsets[topic] = offset
+        self.produced += len(messages)
+        self._changed.notify_all()
+        return offset - 1
+
+    def produce(self, topic: str, message: Any) -> int:
+        """
+        Produce a message and wait for its acknowledgement
+        :return: Offset of the message in its topic
+        """
+        return self.produce_batch(topic, [message])
+
+    def produce_batch(self, topic: str, messages: list[Any]) -> int:
+        """
+        Produce messages as one request, served in one service time
+        :return: Offset of the last message in its topic
+        """
+        self._wait_throttle(len(messages))
+        self._serve()
+        with self._lock:
+            return self._append(topic, messages)
+
+    def consume(self, topic: str, max_messages: int = 100, timeout: float = 0.0) -> list[Any]:
+        """
+        Take the oldest messages of a topic
+        :max_messages: Most messages returned
+        :timeout: Seconds to wait for a message when the topic is empty
+        :return: Messages in produce order, empty if none arrived in time
+        """
+        return self.consume_batch(topic, max_messages, timeout)[1]
+
+    def consume_batch(self, topic: str, max_messages: int = 100, timeout: float = 0.0) -> tuple[int, list[Any]]:
+        """
+        Take the oldest messages of a topic, with the offset of the first one
+        Offsets of a batch are consecutive, so they identify its messages in acks.
+        :return: Offset of the first message and the messages, empty if none arrived in time
+        """
+        with self._lock:
+            queue = self._topics.setdefault(topic, deque())
+            if not queue and timeout > 0:
+                self._changed.wait_for(lambda: queue, timeout)
+            first = self._offsets.get(topic, 0) - len(queue)
+            messages = [queue.popleft() for _ in range(min(max_messages, len(queue)))]
+            self.consumed += len(messages)
+            if messages:
+                self._changed.notify_all()
+            return first, messages
+
+    def ack(self, topic: str, offsets: list[int]) -> None:
+        """Acknowledge consumed messages individually, by offset"""
+        with self._lock:
+            upto = self._acked_upto.get(topic, 0)
+            above = self._acked_above.setdefault(topic, set())
+            for offset in offsets:
+                if offset >= upto and offset not in above:
+                    above.add(offset)
+                    self.acked += 1
+            self._collapse(topic, upto, above)
+
+    def ack_cumulative(self, topic: str, offset: int) -> None:
+        """Acknowledge every consumed message of a topic up to an offset, included"""
+        with self._lock:
+            upto = self._acked_upto.get(topic, 0)
+            if offset + 1 > upto:
+                above = self._acked_above.setdefault(topic, set())
+                covered = {acked for acked in above if acked <= offset}
+                self.acked += offset + 1 - upto - len(covered)
+                above -= covered
+                self._collapse(topic, offset + 1, above)
+
+    def _collapse(self, topic: str, upto: int, above: set[int]) -> None:
+        """Fold acked offsets contiguous with the low-water mark into it, so only the gaps are kept"""
+        while upto in above:
+            above.remove(upto)
+            upto += 1
+        self._acked_upto[topic] = upto
+
+    def depth(self, topic: str) -> int:
+        """Messages waiting in a topic"""
+        with self._lock:
+            return len(self._topics.get(topic, ()))
+
+    def stats(self) -> dict[str, Any]:
+        """Messages produced, consumed, acknowledged and rejected, seconds spent throttled and topic depths"""
+        with self._lock:
+            return {
+                "produced": self.produced,
+                "consumed": self.consumed,
+                "acked": self.acked,
+                "rejected": self.rejected,
+                "throttled_s": self.throttled,
+                "depths": {topic: len(queue) for topic, queue in self._topics.items()},
+            }
+
+    def serve(self, host: str = "127.0.0.1", port: int = 0) -> "BrokerServer":
+        """
+        Expose the broker on a TCP socket, served from background threads
+        :port: Port to listen on, 0 picks a free one
+        :return: The running server; its address is what BrokerClient connects to
+        """
+        server = BrokerServer(self, (host, port))
+        server.start()
+        return server
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise ConnectionError("Broker connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def _encode(message: Any) -> Any:
+    return message.encode() if isinstance(message, str) else message
+
+
+def _pack_messages(messages: list[Any]) -> bytes:
+    parts = []
+    for message in messages:
+        data = _encode(message)
+        parts.append(_LENGTH.pack(len(memoryview(data).cast("B"))))
+        parts.append(data)
+    return b"".join(parts)
+
+
+def _unpack_messages(body: bytes) -> list[bytes]:
+    messages = []
+    position = 0
+    while position < len(body):
+        (size,) = _LENGTH.unpack_from(body, position)
+        position += _LENGTH.size
+        messages.append(body[position:position + size])
+        position += size
+    return messages
+
+
+class _BrokerHandler(socketserver.BaseRequestHandler):
+    """Serves the requests of one client connection until it closes"""
+
+    def setup(self) -> None:
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def handle(self) -> None:
+        broker = self.server.broker
+        while True:
+            try:
+                op, topic_size, body_size = _REQUEST.unpack(_recv_exact(self.request, _REQUEST.size))
+                topic = _recv_exact(self.request, topic_size).decode()
+                body = _recv_exact(self.request, body_size)
+            except ConnectionError:
+                return
+            try:
+                if op == _PRODUCE:
+                    status, reply = _OK, _OFFSET.pack(broker.produce(topic, body))
+                elif op == _PRODUCE_BATCH:
+                    status, reply = _OK, _OFFSET.pack(broker.produce_batch(topic, _unpack_messages(body)))
+                elif op == _CONSUME_OP:
+                    max_messages, timeout = _CONSUME.unpack(body)
+                    first, messages = broker.consume_batch(topic, max_messages, timeout)
+                    status, reply = _OK, _OFFSET.pack(first) + _pack_messages(messages)
+                elif op == _ACK:
+                    broker.ack(topic, [offset for (offset,) in _OFFSET.iter_unpack(body)])
+                    status, reply = _OK, b""
+                elif op == _ACK_CUMULATIVE:
+                    broker.ack_cumulative(topic, _OFFSET.unpack(body)[0])
+                    status, reply = _OK, b""
+                elif op == _DEPTH:
+                    status, reply = _OK, _OFFSET.pack(broker.depth(topic))
+                else:
+                    status, reply = _ERROR, f"Unknown op {op}".encode()
+            except PulsarBrokerQueueFullError as e:
+                status, reply = _QUEUE_FULL, _LENGTH.pack(e.limit)
+            except Exception as e:
+                status, reply = _ERROR, str(e).encode()
+            self.request.sendall(_RESPONSE.pack(status, len(reply)) + reply)
+
+
+class BrokerServer(socketserver.ThreadingTCPServer):
+    """Loopback TCP front end of a LoopbackBroker, one thread per client connection"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, broker: LoopbackBroker, address: tuple[str, int]):
+        super().__init__(address, _BrokerHandler)
+        self.broker = broker
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self.serve_forever, name="pulsar-broker", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        """Stop serving and close the listening socket"""
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+
+class BrokerClient:
+    """
+    Client of a BrokerServer
+    Each thread gets its own connection, so requests from several sender
+    threads are in flight at the same time. Consumed messages arrive as bytes.
+    """
+
+    def __init__(self, address: Union[str, tuple[str, int]]):
+        """
+        :address: (host, port) or "host:port" of the server
+        """
+        if isinstance(address, str):
+            host, port = address.rsplit(":", 1)
+            address = (host, int(port))
+        self.address = tuple(address)
+        self._local = threading.local()
+        self._sockets: list[socket.socket] = []
+        self._lock = threading.Lock()
+
+    def _socket(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = self._local.sock = socket.create_connection(self.address)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            with self._lock:
+                self._sockets.append(sock)
+        return sock
+
+    def _request(self, op: int, topic: str, body: Any) -> bytes:
+        sock = self._socket()
+        topic_bytes = topic.encode()
+        size = len(memoryview(body).cast("B"))
+        sock.sendall(b"".join([_REQUEST.pack(op, len(topic_bytes), size), topic_bytes, body]))
+        status, reply_size = _RESPONSE.unpack(_recv_exact(sock, _RESPONSE.size))
+        reply = _recv_exact(sock, reply_size)
+        if status == _QUEUE_FULL:
+            raise PulsarBrokerQueueFullError(topic, _LENGTH.unpack(reply)[0])
+        if status != _OK:
+            raise PulsarBrokerError(reply.decode())
+        return reply
+
+    def produce(self, topic: str, message: Any) -> int:
+        """Produce a message and wait for its acknowledgement, returning its offset"""
+        return _OFFSET.unpack(self._request(_PRODUCE, topic, _encode(message)))[0]
+
+    def produce_batch(self, topic: str, messages: list[Any]) -> int:
+        """Produce messages as one request, returning the offset of the last one"""
+        return _OFFSET.unpack(self._request(_PRODUCE_BATCH, topic, _pack_messages(messages)))[0]
+
+    def consume(self, topic: str, max_messages: int = 100, timeout: float = 0.0) -> list[bytes]:
+        """Take the oldest messages of a topic, waiting up to timeout seconds for one"""
+        return self.consume_batch(topic, max_messages, timeout)[1]
+
+    def consume_batch(self, topic: str, max_messages: int = 100, timeout: float = 0.0) -> tuple[int, list[bytes]]:
+        """Take the oldest messages of a topic, with the offset of the first one"""
+        reply = self._request(_CONSUME_OP, topic, _CONSUME.pack(max_messages, timeout))
+        return _OFFSET.unpack_from(reply)[0], _unpack_messages(reply[_OFFSET.size:])
+
+    def ack(self, topic: str, offsets: list[int]) -> None:
+        """Acknowledge consumed messages individually, by offset"""
+        self._request(_ACK, topic, b"".join(_OFFSET.pack(offset) for offset in offsets))
+
+    def ack_cumulative(self, topic: str, offset: int) -> None:
+        """Acknowledge every consumed message of a topic up to an offset, included"""
+        self._request(_ACK_CUMULATIVE, topic, _OFFSET.pack(offset))
+
+    def depth(self, topic: str) -> int:
+        """Messages waiting in a topic"""
+        return _OFFSET.unpack(self._request(_DEPTH, topic, b""))[0]
+
+    def close(self) -> None:
+        """Close the connections of every thread"""
+        with self._lock:
+            sockets, self._sockets = self._sockets, []
+        for sock in sockets:
+            sock.close()
+        self._local = threading.local()
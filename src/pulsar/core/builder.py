@@ -2,15 +2,23 @@
 
 from typing import Optional, Type
 
+from pulsar.core.cache import StageResultCache
+from pulsar.core.checkpoint import CheckpointStore
 from pulsar.core.command import StageCommand
 from pulsar.core.composite import CompositeStage
+from pulsar.core.observer import ObserverBus
 
 class WorkflowBuilder:
     """Builder pattern for creating workflow DAGs"""
 
-    def __init__(self, name: str = "main_workflow"):
-        self.workflow = CompositeStage(name)
+    def __init__(self, name: str = "main_workflow", max_workers: Optional[int] = None):
+        """
+        :name: Name of the workflow
+        :max_workers: Number of stages allowed to run at the same time
+        """
+        self.workflow = CompositeStage(name, max_workers=max_workers)
         self._stages: dict[str, StageCommand] = {}
+        self._bus: Optional[ObserverBus] = None
 
     def _find_stage(self, name: str) -> Optional[StageCommand]:
         """Find a stage by name"""
@@ -43,10 +51,47 @@ class WorkflowBuilder:
         self.workflow.add_substage(stage)
         return self
     
+    def with_cache(self, cache: StageResultCache) -> 'WorkflowBuilder':
+        """
+        Serve stages that declare metadata["cacheable"] from a result cache
+        :cache: The cache to use
+        :return: self for method chaining
+        """
+        self.workflow.cache = cache
+        return self
+
+    def with_checkpoints(self, checkpoints: CheckpointStore) -> 'WorkflowBuilder':
+        """
+        Persist every finished stage so failed runs can be resumed
+        :checkpoints: The checkpoint store to use
+        :return: self for method chaining
+        """
+        self.workflow.checkpoints = checkpoints
+        return self
+
+    def with_observer_bus(self, bus: ObserverBus) -> 'WorkflowBuilder':
+        """
+        Report status changes of the workflow and of every stage through an observer bus
+        The bus is attached when the workflow is built and flushed on teardown.
+        :bus: The bus to attach
+        :return: self for method chaining
+        """
+        self._bus = bus
+        return self
+
     def get_stage(self, name: str) -> Optional[StageCommand]:
         """Get a stage by name"""
         return self._stages.get(name)
     
     def build(self) -> CompositeStage:
-        """Build and return the workflow"""
+        """
+        Build and return the workflow
+        :return: The workflow with its execution plan compiled
+        :raises PulsarStageError: If the stage graph is not a valid DAG
+        """
+        self.workflow.compile()
+        if self._bus is not None:
+            for stage in [self.workflow, *self._stages.values()]:
+                if self._bus not in stage.observers:
+                    stage.add_observer(self._bus)
         return self.workflow
\ No newline at end of file
@@ -0,0 +1,238 @@
+# pulsar/core/cache.py
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+# Context entries the workflow adds at run time; they are not stage parameters
+RUNTIME_CONTEXT_KEYS = ("env", "result", "stage_results", "run_id")
+
+
+def cache_params(context: dict[str, Any]) -> dict[str, Any]:
+    """
+    Get the parameters a stage invocation is keyed on
+    :context: Context passed to the stage
+    :return: Its testcase_params, or the context itself as stages fall back to,
+             limited to JSON-serializable entries that are not run-time state
+    """
+    params = context.get("testcase_params", context)
+    keyed = {}
+    for name, value in params.items():
+        if params is context and name in RUNTIME_CONTEXT_KEYS:
+            continue
+        try:
+            json.dumps(value)
+        except (TypeError, ValueError):
+            continue
+        keyed[name] = value
+    return keyed
+
+
+def cache_key(stage_name: str, version: Optional[str], params: dict[str, Any]) -> str:
+    """
+    Build a stable cache key for a stage invocation
+    :stage_name: Name of the stage
+    :version: Stage version from its metadata
+    :params: Testcase parameters; key order does not affect the key
+    :return: Hex digest identifying the invocation
+    """
+    payload = json.dumps(
+        {"stage": stage_name, "version": version, "params": params},
+        sort_keys=True,
+        default=repr
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoryCache:
+    """Thread-safe in-memory LRU tier"""
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def lookup(self, key: str) -> tuple[bool, Any]:
+        """Return (hit, value), marking the entry as most recently used"""
+        with self._lock:
+            if key not in self._entries:
+                return False, None
+            self._entries.move_to_end(key)
+            return True, self._entries[key]
+
+    def store(self, key: str, value: Any) -> None:
+        """Store a value, evicting the least recently used entries when full"""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class DiskCache:
+    """On-disk tier storing one pickle per key, with TTL and size-based eviction"""
+
+    suffix = ".pkl"
+
+    def __init__(self, directory: str, ttl: Optional[float] = None, max_bytes: Optional[int] = None):
+        """
+        :directory: Directory holding the cache files, created if missing
+        :ttl: Seconds an entry stays valid, None keeps entries until evicted
+        :max_bytes: Total size the directory may grow to before the oldest entries are evicted
+        """
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.suffix)
+
+    def lookup(self, key: str) -> tuple[bool, Any]:
+        """Return (hit, value), dropping the entry if it has expired or is unreadable"""
+        path = self._path(key)
+        try:
+            if self.ttl is not None and time.time() - os.path.getmtime(path) > self.ttl:
+                os.remove(path)
+                return False, None
+            with open(path, "rb") as f:
+                return True, pickle.load(f)
+        except FileNotFoundError:
+            return False, None
+        except Exception:
+            self._discard(path)
+            return False, None
+
+    def store(self, key: str, value: Any) -> bool:
+        """
+        Persist a value atomically
+        :return: False if the value could not be pickled
+        """
+        try:
+            data = pickle.dumps(value)
+        except Exception:
+            return False
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self._path(key))
+
+        if self.max_bytes is not None:
+            self._evict()
+        return True
+
+    def _evict(self) -> None:
+        """Remove expired entries, then the oldest ones until under max_bytes"""
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.directory):
+                if not name.endswith(self.suffix):
+                    continue
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+            now = time.time()
+            total = 0
+            for mtime, size, path in sorted(entries, reverse=True):
+                expired = self.ttl is not None and now - mtime > self.ttl
+                if expired or total + size > self.max_bytes:
+                    self._discard(path)
+                else:
+                    total += size
+
+    @staticmethod
+    def _discard(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def clear(self) -> None:
+        for name in os.listdir(self.directory):
+            if name.endswith(self.suffix):
+                self._discard(os.path.join(self.directory, name))
+
+
+class StageResultCache:
+    """Two-tier cache for the results of stages that opt in with metadata["cacheable"]"""
+
+    def __init__(self,
+                 max_entries: int = 128,
+                 directory: Optional[str] = None,
+                 ttl: Optional[float] = None,
+                 max_bytes: Optional[int] = None):
+        """
+        :max_entries: Capacity of the in-memory LRU tier
+        :directory: Directory for the on-disk tier, None keeps the cache in memory only
+        :ttl: Seconds an on-disk entry stays valid
+        :max_bytes: Size limit of the on-disk tier
+        """
+        self.memory = MemoryCache(max_entries)
+        self.disk = DiskCache(directory, ttl=ttl, max_bytes=max_bytes) if directory else None
+
+    @staticmethod
+    def key_for(stage: Any, context: dict[str, Any]) -> Optional[str]:
+        """
+        Get the cache key of a stage invocation
+        :return: The key, or None if the stage has not opted in to caching
+        """
+        metadata = getattr(stage, "metadata", None) or {}
+        if not metadata.get("cacheable"):
+            return None
+        return cache_key(stage.name, metadata.get("version"), cache_params(context))
+
+    def lookup(self, key: str) -> tuple[bool, Any]:
+        """Return (hit, value), promoting on-disk hits to the memory tier"""
+        hit, value = self.memory.lookup(key)
+        if hit or self.disk is None:
+            return hit, value
+
+        hit, value = self.disk.lookup(key)
+        if hit:
+            self.memory.store(key, value)
+        return hit, value
+
+    def store(self, key: str, value: Any) -> None:
+        """Store a value in both tiers"""
+        self.memory.store(key, value)
+        if self.disk is not None:
+            self.disk.store(key, value)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
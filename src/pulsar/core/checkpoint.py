@@ -0,0 +1,104 @@
+# pulsar/core/checkpoint.py
+import os
+import pickle
+import tempfile
+import uuid
+from typing import Any
+
+from pulsar.core.models import StageResult, StageStatus
+
+
+class CheckpointStore:
+    """Persists finished stage results under a run ID so a workflow can be resumed"""
+
+    suffix = ".ckpt"
+
+    def __init__(self, directory: str):
+        """
+        :directory: Directory holding one sub-directory of checkpoints per run
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def new_run_id() -> str:
+        """Generate an ID for a new run"""
+        return uuid.uuid4().hex
+
+    def _run_dir(self, run_id: str) -> str:
+        return os.path.join(self.directory, run_id)
+
+    def save(self, run_id: str, result: StageResult) -> bool:
+        """
+        Persist a stage result atomically
+        :run_id: Run the result belongs to
+        :result: Result to persist; errors are stored as their string form
+        :return: False if the result could not be pickled or written, in which case the stage re-runs on resume
+        """
+        record: dict[str, Any] = {
+            "stage_name": result.stage_name,
+            "status": result.status.value,
+            "result": result.result,
+            "error": str(result.error) if result.error else None,
+            "metadata": result.metadata,
+        }
+        try:
+            data = pickle.dumps(record)
+        except Exception:
+            return False
+
+        run_dir = self._run_dir(run_id)
+        tmp_path = None
+        try:
+            os.makedirs(run_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=run_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, os.path.join(run_dir, result.stage_name + self.suffix))
+        except OSError:
+            # A full or read-only disk must not fail a stage that succeeded
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+        return True
+
+    def load(self, run_id: str) -> dict[str, StageResult]:
+        """
+        Load every result persisted for a run
+        :run_id: Run to load
+        :return: Results keyed by stage name, empty if the run is unknown
+        """
+        run_dir = self._run_dir(run_id)
+        if not os.path.isdir(run_dir):
+            return {}
+
+        results = {}
+        for name in os.listdir(run_dir):
+            if not name.endswith(self.suffix):
+                continue
+            with open(os.path.join(run_dir, name), "rb") as f:
+                record = pickle.load(f)
+            results[record["stage_name"]] = StageResult(
+                record["stage_name"],
+                StageStatus(record["status"]),
+                result=record["result"],
+                error=RuntimeError(record["error"]) if record["error"] else None,
+                metadata=record["metadata"],
+            )
+        return results
+
+    def completed(self, run_id: str) -> dict[str, StageResult]:
+        """Load only the results of stages that completed successfully"""
+        return {
+            name: result for name, result in self.load(run_id).items()
+            if result.status == StageStatus.COMPLETED
+        }
+
+    def clear(self, run_id: str) -> None:
+        """Remove every checkpoint of a run"""
+        run_dir = self._run_dir(run_id)
+        if not os.path.isdir(run_dir):
+            return
+        for name in os.listdir(run_dir):
+            os.remove(os.path.join(run_dir, name))
+        os.rmdir(run_dir)
@@ -1,5 +1,6 @@
 # pulsar/core/command.py
 
+import asyncio
 from abc import ABC, abstractmethod
 from typing import Optional, Any
 
@@ -51,3 +52,16 @@ class StageCommand(ABC):
     def status(self, value: StageStatus) -> None:
         self._status = value
         self.notify_observers(StageResult(self.name, value))
+
+
+class AsyncStageCommand(StageCommand):
+    """Command pattern base class for stages that run on an asyncio event loop"""
+
+    @abstractmethod
+    async def execute_async(self, context: dict[str, Any]) -> StageResult:
+        """Execute the stage command on the running event loop"""
+        pass
+
+    def execute(self, context: dict[str, Any]) -> StageResult:
+        """Execute the stage command on a new event loop in the calling thread"""
+        return asyncio.run(self.execute_async(context))
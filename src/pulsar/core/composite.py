@@ -1,62 +1,124 @@
 # pulsar/core/composite.py
-from typing import Optional, Any
+import time
+from typing import Optional, Any, Callable
 
-from pulsar.core.models import StageResult, StageStatus
+from pulsar.core.models import StageResult, StageStatus, StageTimings
+from pulsar.core.cache import StageResultCache
+from pulsar.core.checkpoint import CheckpointStore
 from pulsar.core.command import StageCommand
+from pulsar.core.executors import shutdown_process_pool
+from pulsar.core.plan import ExecutionPlan
+from pulsar.core.scheduler import DagScheduler
+from pulsar.core.stream import StageStream
+from pulsar.core.sweep import Grid, SweepRun
+from pulsar.core.timing import TimingReport
 
 
 class CompositeStage(StageCommand):
     """Composite pattern for managing stage dependencies"""
     
-    def __init__(self, name: str):
+    def __init__(self,
+                 name: str,
+                 max_workers: Optional[int] = None,
+                 cache: Optional[StageResultCache] = None,
+                 checkpoints: Optional[CheckpointStore] = None):
         super().__init__(name)
         self.substages: list[StageCommand] = []
+        self.scheduler = DagScheduler(max_workers=max_workers)
+        self.cache = cache
+        self.checkpoints = checkpoints
+        self._plan: Optional[ExecutionPlan] = None
+        self._compiled_graph: tuple[tuple[int, ...], ...] = ()
     
+    def __getstate__(self) -> dict[str, Any]:
+        # The compiled plan holds read-only mappings; it is recompiled on first use
+        state = self.__dict__.copy()
+        state["_plan"] = None
+        return state
+
     def add_substage(self, stage: StageCommand) -> None:
         """Add a substage to this composite"""
         self.substages.append(stage)
+        self._plan = None
+
+    def add_dependency(self, dependency: StageCommand) -> None:
+        """Add a dependency that must complete before any substage runs"""
+        super().add_dependency(dependency)
+        self._plan = None
+
+    def compile(self) -> ExecutionPlan:
+        """
+        Validate the stage graph and cache its execution plan
+        :return: The compiled plan, reused by every execute() call
+        :raises PulsarStageError: If the graph has a cycle, a missing edge or a name clash
+        """
+        self._plan = ExecutionPlan.compile(self.substages, prerequisites=self.dependencies)
+        self._compiled_graph = self._graph()
+        return self._plan
+
+    def _graph(self) -> tuple[tuple[int, ...], ...]:
+        """Identity of every stage and dependency edge, to tell when the graph changed under the plan"""
+        return tuple(
+            (id(stage), *map(id, stage.dependencies)) for stage in (*self.dependencies, *self.substages)
+        )
+
+    @property
+    def plan(self) -> ExecutionPlan:
+        """The compiled execution plan, recompiled on first use and whenever the stage graph changed"""
+        if self._plan is None or self._graph() != self._compiled_graph:
+            self.compile()
+        return self._plan
     
     def setup(self, env: Optional[dict[str, Any]] = None, result: Optional[Any] = None) -> None:
         """Set up all substages"""
         for stage in self.substages:
             stage.setup(env=env, result=result)
 
-    def execute(self, context: dict[str, Any]) -> StageResult:
-        """Execute all substages in dependency order"""
+    def execute(self, context: dict[str, Any], resume: Optional[str] = None) -> StageResult:
+        """
+        Execute all substages in dependency order
+        :context: Context passed to every stage
+        :resume: ID of an earlier checkpointed run; its completed stages are
+                 skipped and their stored outputs fed to downstream stages
+        """
+        timings = StageTimings(start=time.monotonic_ns())
         self.status = StageStatus.RUNNING
         
         try:
-            # Execute dependencies first
-            for dep in self.dependencies:
-                result = dep.execute(context)
-                if result.status == StageStatus.FAILED:
-                    self.status = StageStatus.FAILED
-                    return StageResult(
-                        self.name,
-                        StageStatus.FAILED,
-                        error=result.error
-                    )
-            
-            # Execute substages
-            results = []
-            for stage in self.substages:
-                result = stage.execute(context)
-                results.append(result)
-                if result.status == StageStatus.FAILED:
-                    self.status = StageStatus.FAILED
-                    return StageResult(
-                        self.name,
-                        StageStatus.FAILED,
-                        error=result.error
-                    )
+            context, completed = self._prepare_run(context, resume)
+            # Dependencies and substages run once each, independent ones concurrently
+            executed = self.scheduler.run(
+                self.plan,
+                context,
+                execute=self._execute_stage,
+                completed=completed
+            )
+            return self._complete(executed, context.get("run_id"), timings)
             
-            self.status = StageStatus.COMPLETED
+        except Exception as e:
+            self.status = StageStatus.FAILED
             return StageResult(
                 self.name,
-                StageStatus.COMPLETED,
-                result=results
+                StageStatus.FAILED,
+                error=e
             )
-            
+
+    async def execute_async(self, context: dict[str, Any], resume: Optional[str] = None) -> StageResult:
+        """Execute all substages on the running event loop, awaiting independent ones concurrently"""
+        timings = StageTimings(start=time.monotonic_ns())
+        self.status = StageStatus.RUNNING
+
+        try:
+            context, completed = self._prepare_run(context, resume)
+            executed = await self.scheduler.run_async(
+                self.plan,
+                context,
+                execute=self._execute_stage,
+                execute_async=self._execute_stage_async,
+                completed=completed
+            )
+            return self._complete(executed, context.get("run_id"), timings)
+
         except Exception as e:
             self.status = StageStatus.FAILED
             return StageResult(
@@ -65,6 +127,168 @@ class CompositeStage(StageCommand):
                 error=e
             )
 
+    def sweep(self,
+              grid: Grid,
+              workers: Optional[int] = None,
+              mode: str = "thread",
+              context: Optional[dict[str, Any]] = None,
+              initializer: Optional[Callable[[], None]] = None) -> SweepRun:
+        """
+        Run the workflow once per combination of a parameter grid, in parallel
+        :grid: Dict of parameter lists (expanded to their cartesian product) or a list of parameter dicts
+        :workers: Number of combinations running at the same time
+        :mode: "thread" or "process"; either way every worker has its own
+               copy of the workflow and of the stage dependencies
+        :context: Base context shared by every combination
+        :initializer: Process mode only, callable run once in each worker
+        :return: Iterable yielding a SweepPoint per combination as it finishes,
+                 with aggregated metrics in its summary
+        """
+        return SweepRun(self, grid, workers=workers, mode=mode, context=context, initializer=initializer)
+
+    def _prepare_run(self,
+                     context: dict[str, Any],
+                     resume: Optional[str]) -> tuple[dict[str, Any], dict[str, StageResult]]:
+        """
+        Assign a run ID and load the checkpoints of a resumed run
+        :return: The context extended with "run_id" and the restored stage results
+        """
+        if self.checkpoints is None:
+            if resume is not None:
+                raise ValueError(f"Cannot resume run {resume}: workflow {self.name} has no checkpoint store")
+            return context, {}
+
+        run_id = resume or self.checkpoints.new_run_id()
+        completed = self.checkpoints.completed(run_id) if resume else {}
+        plan = self.plan
+        # A streamed stage's records are not stored, so it re-runs unless every consumer is skipped too;
+        # walking dependents first lets a re-run propagate up a chain of streams
+        for name in reversed(plan.order):
+            result = completed.get(name)
+            if result is not None and "streamed" in (result.metadata or {}) and not all(
+                dependent in completed for dependent in plan.dependents[name]
+            ):
+                del completed[name]
+        for name, result in completed.items():
+            if name in plan.stages:
+                plan.stages[name].notify_observers(StageResult(
+                    name,
+                    StageStatus.COMPLETED,
+                    result=result.result,
+                    metadata={"checkpoint": run_id}
+                ))
+        return {**context, "run_id": run_id}, completed
+
+    def _cached(self, stage: StageCommand, context: dict[str, Any]) -> tuple[Optional[str], Optional[StageResult]]:
+        """
+        Look a stage up in the result cache, reporting the hit or miss to its observers
+        :return: The cache key (None if the stage is not cached) and the cached result on a hit
+        """
+        if self.cache is None:
+            return None, None
+        key = self.cache.key_for(stage, context)
+        if key is None:
+            return None, None
+
+        hit, value = self.cache.lookup(key)
+        if hit:
+            result = StageResult(stage.name, StageStatus.COMPLETED, result=value, metadata={"cache": "hit"})
+            stage.notify_observers(result)
+            return key, result
+
+        stage.notify_observers(StageResult(stage.name, stage.status, metadata={"cache": "miss"}))
+        return key, None
+
+    def _store(self, key: Optional[str], result: StageResult) -> StageResult:
+        """Cache the output of a completed stage"""
+        if key is not None and result.status == StageStatus.COMPLETED and not isinstance(result.result, StageStream):
+            self.cache.store(key, result.result)
+        return result
+
+    def _checkpoint(self, result: StageResult, context: dict[str, Any]) -> StageResult:
+        """Persist a finished stage result under the current run ID; streams are persisted by _complete once joined"""
+        if self.checkpoints is not None and "run_id" in context and not isinstance(result.result, StageStream):
+            self.checkpoints.save(context["run_id"], result)
+        return result
+
+    def _execute_stage(self, stage: StageCommand, context: dict[str, Any]) -> StageResult:
+        """Execute a single stage, serving opted-in stages from the result cache"""
+        key, cached = self._cached(stage, context)
+        if cached is None:
+            cached = self._store(key, stage.execute(context))
+        return self._checkpoint(cached, context)
+
+    async def _execute_stage_async(self, stage: StageCommand, context: dict[str, Any]) -> StageResult:
+        """Asynchronous counterpart of _execute_stage"""
+        key, cached = self._cached(stage, context)
+        if cached is None:
+            cached = self._store(key, await stage.execute_async(context))
+        return self._checkpoint(cached, context)
+
+    def _complete(self,
+                  executed: dict[str, StageResult],
+                  run_id: Optional[str] = None,
+                  timings: Optional[StageTimings] = None) -> StageResult:
+        """
+        Fold the scheduler's per-stage results into the workflow result
+        Its metadata holds a TimingReport under "timing" and the run ID, if any.
+        """
+        # Wait for streaming stages whose records may still be in flight
+        for name, result in executed.items():
+            if isinstance(result.result, StageStream):
+                error = result.result.join()
+                executed[name] = StageResult(
+                    name,
+                    StageStatus.FAILED if error else StageStatus.COMPLETED,
+                    result=result.result,
+                    error=error,
+                    timings=result.timings
+                )
+                # The records went to the consuming stages; only the outcome is kept
+                self._checkpoint(
+                    StageResult(name, executed[name].status, error=error, metadata={"streamed": result.result.count}),
+                    {"run_id": run_id} if run_id else {}
+                )
+
+        metadata: dict[str, Any] = {"timing": TimingReport(self.plan, executed)}
+        if run_id:
+            metadata["run_id"] = run_id
+        if timings is not None:
+            timings.end = time.monotonic_ns()
+
+        for result in executed.values():
+            if result.status == StageStatus.FAILED:
+                self.status = StageStatus.FAILED
+                return StageResult(
+                    self.name,
+                    StageStatus.FAILED,
+                    error=result.error,
+                    metadata=metadata,
+                    timings=timings
+                )
+
+        substage_names = {stage.name for stage in self.substages}
+        results = [result for name, result in executed.items() if name in substage_names]
+
+        self.status = StageStatus.COMPLETED
+        return StageResult(
+            self.name,
+            StageStatus.COMPLETED,
+            result=results,
+            metadata=metadata,
+            timings=timings
+        )
+
+    def flush_observers(self, timeout: Optional[float] = None) -> None:
+        """Wait for the observers of the workflow and its stages that buffer events, such as ObserverBus"""
+        observers = {}
+        for stage in [self, *self.dependencies, *self.substages]:
+            for observer in stage.observers:
+                observers[id(observer)] = observer
+        for observer in observers.values():
+            if hasattr(observer, "flush"):
+                observer.flush(timeout)
+
     def teardown(self, env: Optional[dict[str, Any]] = None, result: Optional[Any] = None) -> None:
         """Tear down all substages in reverse order"""
         try:
@@ -90,8 +314,14 @@ class CompositeStage(StageCommand):
                         result.log(f"Error tearing down dependency {dep.name}: {str(e)}")
                     raise
 
+            # Release worker processes used by process-policy stages
+            shutdown_process_pool()
+
             # Call parent teardown -- why?
             super().teardown(env=env, result=result)
+
+            # Deliver the events still buffered by asynchronous observers
+            self.flush_observers()
             
             if result:
                 result.log(f"Workflow {self.name} torn down successfully")
@@ -1,7 +1,15 @@
 # pulsar/core/dependencies.py
 from abc import ABC, abstractmethod
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 import logging
+import threading
+from concurrent.futures import Future
+
+from pulsar.core.broker import BrokerClient
+from pulsar.core.histogram import LatencyHistogram
+from pulsar.core.inflight import AsyncSender, DEFAULT_MAX_PENDING, SendCallback
+from pulsar.core.metrics import MetricRegistry, Counter, Gauge
+from pulsar.core.timeseries import TimeSeriesStore
 
 
 class BaseDependency(ABC):
@@ -52,24 +60,106 @@ class Producer(BaseDependency):
     """Message producer dependency"""
     
     def __init__(self, config: Dict[str, Any] = None):
+        """
+        :config: Producer settings; "max_pending" bounds the messages send_async()
+                 keeps in flight, "send_workers" sets the threads sending them,
+                 DEFAULT_SEND_WORKERS by default.
+                 "broker" (a LoopbackBroker) or "broker_address" ("host:port" of a
+                 BrokerServer) sends to a broker, on "topic"; without either,
+                 messages are printed.
+        """
         self.config = config or {}
+        self.topic = self.config.get("topic", "pulsar")
         self._connected = False
+        self._broker: Optional[Any] = None
+        self._sender: Optional[AsyncSender] = None
+        self._sender_lock = threading.Lock()
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_sender"] = None
+        # Connections are per process; connect() reopens them
+        state["_broker"] = None
+        state["_connected"] = False
+        del state["_sender_lock"]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._sender_lock = threading.Lock()
 
     def connect(self) -> None:
         """Connect to the message broker"""
-        # Add your connection logic here
+        if "broker_address" in self.config:
+            self._broker = BrokerClient(self.config["broker_address"])
+        else:
+            self._broker = self.config.get("broker")
         self._connected = True
 
     def disconnect(self) -> None:
         """Disconnect from the message broker"""
-        # Add your disconnection logic here
+        if self._sender is not None:
+            self._sender.close()
+            self._sender = None
+        if isinstance(self._broker, BrokerClient):
+            self._broker.close()
+        self._broker = None
         self._connected = False
 
+    def close(self) -> None:
+        """Wait for messages in flight and release the producer's connections"""
+        self.disconnect()
+
+    def capabilities(self) -> frozenset[str]:
+        """What this producer supports beyond plain sends, see pulsar.core.backends.CAPABILITIES"""
+        if "broker" in self.config or "broker_address" in self.config:
+            return frozenset({"batch", "async", "acks"})
+        return frozenset({"batch", "async"})
+
     def send_message(self, msg: str) -> None:
-        """Send a message"""
+        """Send a message, waiting for the broker's acknowledgement"""
         if not self._connected:
             raise RuntimeError("Producer not connected")
-        print(f"Sending: {msg}")
+        if self._broker is None:
+            print(f"Sending: {msg}")
+            return
+        self._broker.produce(self.topic, msg)
+
+    def send_batch(self, msgs: list[str]) -> None:
+        """Send several messages as one operation"""
+        if not self._connected:
+            raise RuntimeError("Producer not connected")
+        if self._broker is None:
+            print(f"Sending batch of {len(msgs)} messages")
+            return
+        self._broker.produce_batch(self.topic, msgs)
+
+    def send_async(self, msg: str, callback: Optional[SendCallback] = None) -> Future:
+        """
+        Send a message without waiting for the broker
+        Blocks only while max_pending messages are already in flight.
+        :msg: Message to send
+        :callback: Called with the future once the send completed or failed
+        :return: Future resolving once the message was sent
+        """
+        if self._sender is None:
+            with self._sender_lock:
+                if self._sender is None:
+                    self._sender = AsyncSender(
+                        self.send_message,
+                        max_pending=self.config.get("max_pending", DEFAULT_MAX_PENDING),
+                        workers=self.config.get("send_workers")
+                    )
+        return self._sender.submit(msg, callback)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for every message sent with send_async() to complete
+        :return: False if the timeout expired first
+        """
+        if self._sender is None:
+            return True
+        return self._sender.drain(timeout)
 
     def is_available(self) -> bool:
         """Check if producer is available"""
@@ -77,28 +167,282 @@ class Producer(BaseDependency):
         # Simulate availability for testing purposes
         return True
 
+class Consumer(BaseDependency):
+    """Message consumer dependency"""
+
+    def __init__(self, config: Dict[str, Any] = None):
+        """
+        :config: Consumer settings; "broker" (a LoopbackBroker) or "broker_address"
+                 ("host:port" of a BrokerServer) to receive from, on "topic".
+                 Without either, nothing is ever received.
+        """
+        self.config = config or {}
+        self.topic = self.config.get("topic", "pulsar")
+        self._connected = False
+        self._broker: Optional[Any] = None
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_broker"] = None
+        state["_connected"] = False
+        return state
+
+    def connect(self) -> None:
+        """Connect to the message broker"""
+        if "broker_address" in self.config:
+            self._broker = BrokerClient(self.config["broker_address"])
+        else:
+            self._broker = self.config.get("broker")
+        self._connected = True
+
+    def disconnect(self) -> None:
+        """Disconnect from the message broker"""
+        if isinstance(self._broker, BrokerClient):
+            self._broker.close()
+        self._broker = None
+        self._connected = False
+
+    def close(self) -> None:
+        self.disconnect()
+
+    def receive(self, max_messages: int = 100, timeout: float = 0.0) -> list[Any]:
+        """
+        Receive the next messages of the topic
+        :max_messages: Most messages returned
+        :timeout: Seconds to wait for a message when none is waiting
+        :return: Messages in publish order, empty if none arrived in time
+        """
+        if not self._connected:
+            raise RuntimeError("Consumer not connected")
+        if self._broker is None:
+            return []
+        return self._broker.consume(self.topic, max_messages, timeout)
+
+    def receive_batch(self, max_messages: int = 100, timeout: float = 0.0) -> tuple[int, list[Any]]:
+        """
+        Receive the next messages of the topic, with their ids for acknowledging them
+        :return: Id of the first message, the others following consecutively, and the messages
+        """
+        if not self._connected:
+            raise RuntimeError("Consumer not connected")
+        if self._broker is None:
+            return 0, []
+        return self._broker.consume_batch(self.topic, max_messages, timeout)
+
+    def acknowledge(self, message_ids: list[int]) -> None:
+        """Acknowledge received messages individually"""
+        if self._broker is not None and message_ids:
+            self._broker.ack(self.topic, message_ids)
+
+    def acknowledge_cumulative(self, message_id: int) -> None:
+        """Acknowledge every received message up to an id, included"""
+        if self._broker is not None:
+            self._broker.ack_cumulative(self.topic, message_id)
+
+    def backlog(self) -> int:
+        """Messages waiting to be received"""
+        if self._broker is None:
+            return 0
+        return self._broker.depth(self.topic)
+
+    def is_available(self) -> bool:
+        """Check if consumer is available"""
+        return True
+
 class Metrics(BaseDependency):
     """Metrics collection dependency"""
     
-    def __init__(self, namespace: str = "pulsar"):
+    def __init__(self,
+                 namespace: str = "pulsar",
+                 latency_significant_figures: int = 3,
+                 series_interval: float = 0.1):
+        """
+        :namespace: Prefix of every metric name
+        :latency_significant_figures: Precision kept by the latency histograms
+        :series_interval: Width in seconds of the time-series intervals
+        """
         self.namespace = namespace
+        self.latency_significant_figures = latency_significant_figures
+        self.series_interval = series_interval
         self._metrics = {}
+        self.registry = MetricRegistry()
+        self._sent = self.counter("messages.sent")
+        # Latency histograms per operation: the samples merged in and those of finished threads...
+        self._histograms: dict[str, LatencyHistogram] = {}
+        # ...and one histogram per thread still recording
+        self._thread_histograms: dict[str, list[tuple[threading.Thread, LatencyHistogram]]] = {}
+        # Sends and latencies over time, merged in the same way
+        self._merged_series = TimeSeriesStore(interval=series_interval)
+        self._series: list[tuple[threading.Thread, TimeSeriesStore]] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Ship each operation's merged histogram; threads of the new process record into their own
+        state = self.__dict__.copy()
+        state["_histograms"] = {operation: self.latency_histogram(operation) for operation in list(self._histograms)}
+        state["_thread_histograms"] = {}
+        state["_merged_series"] = self.time_series()
+        state["_series"] = []
+        del state["_local"]
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _thread_histogram(self, operation: str) -> LatencyHistogram:
+        """Get the calling thread's histogram for an operation, registering it on first use"""
+        histograms = getattr(self._local, "histograms", None)
+        if histograms is None:
+            histograms = self._local.histograms = {}
+        histogram = histograms.get(operation)
+        if histogram is None:
+            histogram = histograms[operation] = LatencyHistogram(
+                significant_figures=self.latency_significant_figures
+            )
+            with self._lock:
+                self._fold_finished()
+                self._histogram(operation)
+                self._thread_histograms.setdefault(operation, []).append((threading.current_thread(), histogram))
+        return histogram
+
+    def _histogram(self, operation: str) -> LatencyHistogram:
+        """Get the histogram accumulating an operation's merged samples; the lock must be held"""
+        histogram = self._histograms.get(operation)
+        if histogram is None:
+            histogram = self._histograms[operation] = LatencyHistogram(
+                significant_figures=self.latency_significant_figures
+            )
+        return histogram
+
+    def _fold_finished(self) -> None:
+        """Merge the histograms and stores of threads that ended into the accumulated ones; the lock must be held"""
+        for operation, recording in self._thread_histograms.items():
+            if any(not thread.is_alive() for thread, _ in recording):
+                for thread, histogram in recording:
+                    if not thread.is_alive():
+                        self._histogram(operation).merge(histogram)
+                recording[:] = [(thread, histogram) for thread, histogram in recording if thread.is_alive()]
+        if any(not thread.is_alive() for thread, _ in self._series):
+            for thread, series in self._series:
+                if not thread.is_alive():
+                    self._merged_series.merge(series)
+            self._series[:] = [(thread, series) for thread, series in self._series if thread.is_alive()]
+
+    def series_recorder(self) -> TimeSeriesStore:
+        """
+        Get the calling thread's time-series store, registering it on first use
+        Resolve it once before a hot loop and record into it directly.
+        """
+        series = getattr(self._local, "series", None)
+        if series is None:
+            series = self._local.series = TimeSeriesStore(interval=self.series_interval)
+            with self._lock:
+                self._fold_finished()
+                self._series.append((threading.current_thread(), series))
+        return series
+
+    def time_series(self) -> TimeSeriesStore:
+        """
+        Get sends, bytes and latencies per interval
+        :return: A copy merging the stores of every thread that recorded
+        """
+        merged = TimeSeriesStore(interval=self.series_interval)
+        with self._lock:
+            self._fold_finished()
+            merged.merge(self._merged_series)
+            stores = [series for _, series in self._series]
+        for series in stores:
+            merged.merge(series)
+        return merged
+
+    def merge_series(self, series: TimeSeriesStore) -> None:
+        """Add a time series recorded elsewhere, e.g. in a worker process"""
+        with self._lock:
+            self._merged_series.merge(series)
+
+    def counter(self, name: str) -> Counter:
+        """
+        Get a counter handle, e.g. metrics.counter("messages.sent")
+        Resolve it once before a hot loop and call inc() on it directly.
+        :name: Metric name without the namespace
+        """
+        return self.registry.counter(f"{self.namespace}.{name}")
+
+    def gauge(self, name: str) -> Gauge:
+        """
+        Get a gauge handle
+        :name: Metric name without the namespace
+        """
+        return self.registry.gauge(f"{self.namespace}.{name}")
+
+    def record_send(self, value: float = 1.0, tags: Dict[str, str] = None, nbytes: int = 0) -> None:
+        """Record a send metric, and the messages and bytes sent in the current interval"""
+        self._sent.inc(value)
+        self.series_recorder().record_send(int(value), nbytes)
+
+    def record_latency(self, value: float, operation: str, expected_interval: Optional[float] = None) -> None:
+        """
+        Record a latency sample into the operation's histogram
+        :value: Latency in milliseconds, kept at microsecond resolution
+        :operation: Name of the operation, e.g. "send"
+        :expected_interval: Milliseconds between sends at the intended rate; when
+                            given, the sample is corrected for coordinated omission
+        """
+        if expected_interval:
+            self._thread_histogram(operation).record_corrected(value * 1000, expected_interval * 1000)
+        else:
+            self._thread_histogram(operation).record(value * 1000)
+        self.series_recorder().record_latency(value)
+
+    def latency_histogram(self, operation: str) -> LatencyHistogram:
+        """
+        Get the latency histogram of an operation, in microseconds
+        :return: A copy merging the samples of every thread that recorded the operation
+        """
+        merged = LatencyHistogram(significant_figures=self.latency_significant_figures)
+        with self._lock:
+            self._fold_finished()
+            if operation in self._histograms:
+                merged.merge(self._histograms[operation])
+            histograms = [histogram for _, histogram in self._thread_histograms.get(operation, [])]
+        for histogram in histograms:
+            merged.merge(histogram)
+        return merged
+
+    def merge_latency(self, operation: str, histogram: LatencyHistogram) -> None:
+        """Add latency samples recorded elsewhere, e.g. in a worker process, to an operation"""
+        with self._lock:
+            self._histogram(operation).merge(histogram)
+
+    def latency_summary(self) -> dict[str, dict[str, float]]:
+        """Percentile summary in milliseconds of every operation, keyed by metric name"""
+        with self._lock:
+            operations = list(self._histograms)
+        return {
+            f"{self.namespace}.latency.{operation}": self.latency_histogram(operation).summary(scale=1000.0)
+            for operation in operations
+        }
 
-    def record_send(self, value: float = 1.0, tags: Dict[str, str] = None) -> None:
-        """Record a send metric"""
-        metric_name = f"{self.namespace}.messages.sent"
-        self._metrics[metric_name] = self._metrics.get(metric_name, 0) + value
-        print(f"Recording metric: {metric_name} = {self._metrics[metric_name]}")
+    def shard(self) -> "Metrics":
+        """Get an empty Metrics configured like this one, for a worker process to record into"""
+        return Metrics(self.namespace, self.latency_significant_figures, self.series_interval)
 
-    def record_latency(self, value: float, operation: str) -> None:
-        """Record a latency metric"""
-        metric_name = f"{self.namespace}.latency.{operation}"
-        self._metrics[metric_name] = value
-        print(f"Recording latency: {metric_name} = {value}ms")
+    def merge(self, other: "Metrics") -> None:
+        """Add the counters, gauges, latencies and time series recorded by a shard"""
+        self.registry.merge(other.registry)
+        with other._lock:
+            operations = list(other._histograms)
+        for operation in operations:
+            self.merge_latency(operation, other.latency_histogram(operation))
+        self.merge_series(other.time_series())
 
     def get_metric(self, name: str) -> float:
         """Get a metric value"""
-        return self._metrics.get(name, 0.0)
+        return self.registry.get(name, self._metrics.get(name, 0.0))
 
     def is_available(self) -> bool:
         """Check if metrics collection is available"""
@@ -106,3 +106,20 @@ class PulsarStageExecutionNotStartedError(PulsarStageError):
     def __init__(self, stage_name):
         self.stage_name = stage_name
         super().__init__(f"Pulsar stage '{stage_name}' execution not started.")
+
+class PulsarStageCycleError(PulsarStageError):
+    """Exception raised when Pulsar stage dependencies form a cycle."""
+    def __init__(self, cycle):
+        self.cycle = cycle
+        super().__init__(f"Pulsar stages have a cyclic dependency: {' -> '.join(cycle)}.")
+
+class PulsarBrokerError(PulsarException):
+    """Exception raised when the broker fails to serve a request."""
+    pass
+
+class PulsarBrokerQueueFullError(PulsarBrokerError):
+    """Exception raised when a broker topic queue is full."""
+    def __init__(self, topic, limit):
+        self.topic = topic
+        self.limit = limit
+        super().__init__(f"Broker queue for topic '{topic}' is full ({limit} messages).")
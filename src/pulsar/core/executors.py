@@ -0,0 +1,103 @@
+# pulsar/core/executors.py
+import atexit
+import multiprocessing
+import pickle
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Optional, Type
+
+# Context entries that hold testplan runtime objects and never cross a process boundary
+LOCAL_CONTEXT_KEYS = ("env", "result")
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+
+def get_process_pool(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """
+    Get the shared process pool, creating it on first use
+    Workers are spawned rather than forked because the workflow scheduler is
+    multi-threaded, and forking a threaded process is unsafe.
+    :max_workers: Number of worker processes, None uses one per CPU. Only
+                  honoured when the pool is created.
+    :return: The shared process pool
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _process_pool
+
+
+def shutdown_process_pool() -> None:
+    """Shut down the shared process pool, it is recreated on next use"""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=True)
+            _process_pool = None
+
+
+atexit.register(shutdown_process_pool)
+
+
+def picklable_context(context: dict[str, Any]) -> dict[str, Any]:
+    """
+    Slice a stage context down to the entries that can be sent to another process
+    :context: Context passed to the stage
+    :return: Copy of the context without testplan runtime objects or values
+             that cannot be pickled
+    """
+    sliced = {key: value for key, value in context.items() if key not in LOCAL_CONTEXT_KEYS}
+    try:
+        pickle.dumps(sliced)
+        return sliced
+    except Exception:
+        pass
+
+    picklable = {}
+    for key, value in sliced.items():
+        try:
+            pickle.dumps(value)
+        except Exception:
+            continue
+        picklable[key] = value
+    return picklable
+
+
+def _run_stage(stage_class: Type[Any], dependencies: dict[str, Any], context: dict[str, Any]) -> Any:
+    """
+    Worker entry point: rebuild the stage and its dependencies, then run its logic
+    The worker's copy of the class starts without the parent's setup state, e.g.
+    connected producers, so setup and teardown run around run() here too.
+    """
+    stage_class.set_dependencies(**dependencies)
+    stage = stage_class()
+    stage.setup()
+    try:
+        return stage.run(context)
+    finally:
+        stage.teardown()
+
+
+def run_in_process(stage: Any, context: dict[str, Any]) -> Any:
+    """
+    Run a stage's run() logic on the shared process pool
+    The worker sets the stage up, runs it and tears it down; the caller's own
+    setup, teardown and status changes stay in the calling process so observers
+    are still notified there.
+    :stage: Stage instance to run, its class and dependencies must be importable
+            and picklable by the worker; run() must return a picklable value
+    :context: Context passed to the stage, sliced with picklable_context()
+    :return: The value returned by the stage's run()
+    """
+    future = get_process_pool().submit(
+        _run_stage,
+        type(stage),
+        stage.get_deps(),
+        picklable_context(context)
+    )
+    return future.result()
@@ -0,0 +1,106 @@
+# pulsar/core/harness.py
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from pulsar.core.backends import backend_names, check_conformance, create_backend
+from pulsar.core.dependencies import Logger, Metrics
+from pulsar.core.models import StageResult
+from pulsar.stages.send_messages import SendMessagesStage
+
+# Columns of the side-by-side report: (header, key of the row)
+_COLUMNS = (
+    ("backend", "backend"),
+    ("status", "status"),
+    ("messages", "messages_sent"),
+    ("msg/s", "achieved_rate"),
+    ("p50 ms", "p50"),
+    ("p99 ms", "p99"),
+    ("p99.9 ms", "p99.9"),
+    ("max ms", "max"),
+)
+
+
+def _cell(value: Any) -> str:
+    if value is None:
+        return "n/a"
+    return f"{value:.3f}" if isinstance(value, float) else str(value)
+
+
+@dataclass
+class BackendRun:
+    """Outcome of running the workload against one backend"""
+    backend: str
+    capabilities: frozenset[str]
+    problems: list[str]
+    result: StageResult
+    metrics: Metrics
+
+    def row(self) -> dict[str, Any]:
+        """Throughput and latency of the run, flattened for the report; None where the run measured nothing"""
+        summary = self.result.result if isinstance(self.result.result, dict) else {}
+        histogram = self.metrics.latency_histogram("send")
+        latency = histogram.summary(scale=1000.0) if histogram.total_count else {}
+        return {
+            "backend": self.backend,
+            "status": self.result.status.value,
+            "messages_sent": summary.get("messages_sent", 0),
+            "achieved_rate": summary.get("achieved_rate"),
+            **{key: latency.get(key) for key in ("p50", "p99", "p99.9", "max")},
+            "capabilities": sorted(self.capabilities),
+            "problems": self.problems,
+            "error": str(self.result.error) if self.result.error else None,
+        }
+
+
+@dataclass
+class BackendComparison:
+    """Runs of the same workload against several backends"""
+    params: dict[str, Any]
+    runs: list[BackendRun] = field(default_factory=list)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"params": self.params, "backends": [run.row() for run in self.runs]}
+
+    def to_text(self) -> str:
+        """Side-by-side table of throughput and latency per backend"""
+        rows = [run.row() for run in self.runs]
+        cells = [[header for header, _ in _COLUMNS]]
+        for row in rows:
+            cells.append([_cell(row[key]) for _, key in _COLUMNS])
+        widths = [max(len(line[i]) for line in cells) for i in range(len(_COLUMNS))]
+        lines = ["  ".join(cell.rjust(width) for cell, width in zip(line, widths)) for line in cells]
+        for row in rows:
+            for problem in row["problems"]:
+                lines.append(f"{row['backend']}: {problem}")
+        return "\n".join(lines)
+
+
+def compare_backends(params: dict[str, Any],
+                     backends: Optional[list[str]] = None,
+                     configs: Optional[dict[str, dict[str, Any]]] = None) -> BackendComparison:
+    """
+    Run the same SendMessagesStage workload against producer backends, one after the other
+    Every backend runs with fresh Metrics, so latencies are comparable; the
+    report shows n/a for what a run did not measure. A backend failing its run
+    or the conformance check is reported, not raised.
+    :params: Stage params of the workload, e.g. {"num_messages": 10000, "duration": 10, "rate": 5000}
+    :backends: Names of registered backends, defaults to all of them
+    :configs: Config of each backend, by name
+    :return: The runs, with a side-by-side report in to_text()
+    """
+    comparison = BackendComparison(dict(params))
+    configs = configs or {}
+    for name in backends or backend_names():
+        producer = create_backend(name, configs.get(name))
+        metrics = Metrics()
+        SendMessagesStage.set_dependencies(producer=producer, metrics=metrics, logger=Logger())
+        result = SendMessagesStage().execute({"testcase_params": dict(params)})
+        producer.close()
+        comparison.runs.append(BackendRun(
+            backend=name,
+            capabilities=producer.capabilities(),
+            problems=check_conformance(producer),
+            result=result,
+            metrics=metrics,
+        ))
+    return comparison
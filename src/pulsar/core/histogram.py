@@ -0,0 +1,213 @@
+# pulsar/core/histogram.py
+import math
+from array import array
+from typing import Any, Iterable, Iterator, Optional
+
+DEFAULT_PERCENTILES = (50.0, 90.0, 99.0, 99.9, 99.99)
+
+
+class LatencyHistogram:
+    """
+    Fixed-memory histogram of integer values with bounded relative error
+    Buckets follow the HDR histogram layout: every power-of-two range is split
+    into linear sub-buckets, enough to keep significant_figures decimal digits
+    of precision for any value between lowest and highest. Memory therefore
+    depends on the configured range and precision, never on the number of
+    values recorded. A histogram is meant to be written by one thread; record
+    on one histogram per thread or process and merge() them for reporting.
+    """
+
+    def __init__(self,
+                 lowest: int = 1,
+                 highest: int = 3_600_000_000,
+                 significant_figures: int = 3):
+        """
+        :lowest: Smallest value distinguishable from 0, at least 1
+        :highest: Largest trackable value; larger values are recorded as highest
+        :significant_figures: Decimal digits of precision kept, between 1 and 5
+        """
+        if lowest < 1:
+            raise ValueError("lowest must be at least 1")
+        if highest < 2 * lowest:
+            raise ValueError("highest must be at least twice lowest")
+        if not 1 <= significant_figures <= 5:
+            raise ValueError("significant_figures must be between 1 and 5")
+
+        self.lowest = lowest
+        self.highest = highest
+        self.significant_figures = significant_figures
+
+        largest_single_unit = 2 * 10 ** significant_figures
+        self._unit_magnitude = int(math.floor(math.log2(lowest)))
+        sub_bucket_count_magnitude = int(math.ceil(math.log2(largest_single_unit)))
+        self._sub_bucket_half_count_magnitude = max(sub_bucket_count_magnitude, 1) - 1
+        self._sub_bucket_count = 1 << (self._sub_bucket_half_count_magnitude + 1)
+        self._sub_bucket_half_count = self._sub_bucket_count // 2
+        self._sub_bucket_mask = (self._sub_bucket_count - 1) << self._unit_magnitude
+
+        smallest_untrackable = self._sub_bucket_count << self._unit_magnitude
+        bucket_count = 1
+        while smallest_untrackable <= highest:
+            smallest_untrackable <<= 1
+            bucket_count += 1
+        self._counts = array("q", bytes(8 * (bucket_count + 1) * self._sub_bucket_half_count))
+
+        self.total_count = 0
+        self.total = 0
+        self.min: Optional[int] = None
+        self.max: Optional[int] = None
+
+    def _index(self, value: int) -> int:
+        bucket = (value | self._sub_bucket_mask).bit_length() - self._unit_magnitude \
+            - (self._sub_bucket_half_count_magnitude + 1)
+        sub_bucket = value >> (bucket + self._unit_magnitude)
+        return ((bucket + 1) << self._sub_bucket_half_count_magnitude) + sub_bucket - self._sub_bucket_half_count
+
+    def _value_range(self, index: int) -> tuple[int, int]:
+        """Lowest value and size of the range of values counted at an index"""
+        bucket = (index >> self._sub_bucket_half_count_magnitude) - 1
+        sub_bucket = (index & (self._sub_bucket_half_count - 1)) + self._sub_bucket_half_count
+        if bucket < 0:
+            sub_bucket -= self._sub_bucket_half_count
+            bucket = 0
+        return sub_bucket << (bucket + self._unit_magnitude), 1 << (bucket + self._unit_magnitude)
+
+    def record(self, value: float, count: int = 1) -> None:
+        """
+        Record a value
+        :value: Value to record, rounded to an integer and clamped to [0, highest]
+        :count: Number of times the value occurred
+        """
+        value = min(max(int(round(value)), 0), self.highest)
+        self._counts[self._index(value)] += count
+        self.total_count += count
+        self.total += value * count
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def record_corrected(self, value: float, expected_interval: float, count: int = 1) -> None:
+        """
+        Record a value measured by a closed-loop client, correcting for coordinated omission
+        A sample larger than the interval the client meant to send at hid the
+        requests it would have sent meanwhile; those are backfilled with
+        linearly decreasing values, as HdrHistogram does.
+        :value: Value to record
+        :expected_interval: Interval between samples at the intended rate, in the same unit
+        :count: Number of times the value occurred
+        """
+        self.record(value, count)
+        if expected_interval <= 0:
+            return
+        missing = value - expected_interval
+        while missing >= expected_interval:
+            self.record(missing, count)
+            missing -= expected_interval
+
+    def _compatible(self, other: "LatencyHistogram") -> bool:
+        return (self.lowest, self.highest, self.significant_figures) == \
+            (other.lowest, other.highest, other.significant_figures)
+
+    def merge(self, other: "LatencyHistogram") -> "LatencyHistogram":
+        """
+        Add the values of another histogram to this one
+        Histograms with a different layout are merged value by value, at the
+        precision of the coarser of the two.
+        :return: self, to chain merges
+        """
+        if self._compatible(other):
+            for index, count in enumerate(other._counts):
+                if count:
+                    self._counts[index] += count
+            self.total_count += other.total_count
+            self.total += other.total
+            for value in (other.min, other.max):
+                if value is not None:
+                    self.min = value if self.min is None else min(self.min, value)
+                    self.max = value if self.max is None else max(self.max, value)
+        else:
+            for value, count in other.iter_values():
+                self.record(value, count)
+        return self
+
+    def iter_values(self) -> Iterator[tuple[int, int]]:
+        """Yield (representative value, count) for every non-empty bucket, in increasing order"""
+        for index, count in enumerate(self._counts):
+            if count:
+                low, size = self._value_range(index)
+                yield low + (size >> 1), count
+
+    def percentile(self, percentile: float) -> int:
+        """
+        Get the value at a percentile
+        :percentile: Percentile between 0 and 100
+        :return: Highest value equivalent to the one at the percentile, 0 if empty
+        """
+        if self.total_count == 0:
+            return 0
+        target = max(int(min(max(percentile, 0.0), 100.0) / 100.0 * self.total_count + 0.5), 1)
+        seen = 0
+        for index, count in enumerate(self._counts):
+            seen += count
+            if seen >= target:
+                low, size = self._value_range(index)
+                return min(max(low + size - 1, self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.total_count if self.total_count else 0.0
+
+    def summary(self, percentiles: Iterable[float] = DEFAULT_PERCENTILES, scale: float = 1.0) -> dict[str, float]:
+        """
+        Summarise the recorded values
+        :percentiles: Percentiles to report, as p50, p99.9, ...
+        :scale: Divisor applied to every reported value, e.g. 1000 to report microseconds as milliseconds
+        :return: count, min, mean, max and the requested percentiles
+        """
+        summary = {
+            "count": self.total_count,
+            "min": (self.min or 0) / scale,
+            "mean": self.mean / scale,
+            "max": (self.max or 0) / scale,
+        }
+        for percentile in percentiles:
+            summary[f"p{percentile:g}"] = self.percentile(percentile) / scale
+        return summary
+
+    def reset(self) -> None:
+        for index in range(len(self._counts)):
+            self._counts[index] = 0
+        self.total_count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def copy(self) -> "LatencyHistogram":
+        return LatencyHistogram(self.lowest, self.highest, self.significant_figures).merge(self)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Export the histogram as plain data, keeping only non-empty buckets"""
+        return {
+            "lowest": self.lowest,
+            "highest": self.highest,
+            "significant_figures": self.significant_figures,
+            "total_count": self.total_count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+            "counts": {index: count for index, count in enumerate(self._counts) if count},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "LatencyHistogram":
+        """Rebuild a histogram exported with to_dict(), e.g. in another process"""
+        histogram = cls(data["lowest"], data["highest"], data["significant_figures"])
+        for index, count in data["counts"].items():
+            histogram._counts[int(index)] = count
+        histogram.total_count = data["total_count"]
+        histogram.total = data["total"]
+        histogram.min = data["min"]
+        histogram.max = data["max"]
+        return histogram
@@ -0,0 +1,92 @@
+# pulsar/core/inflight.py
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+DEFAULT_MAX_PENDING = 1000
+# Sender threads by default; the in-flight window, not the thread count, bounds pipelining
+DEFAULT_SEND_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+
+SendCallback = Callable[[Future], None]
+
+
+class AsyncSender:
+    """
+    Turns a blocking send into a pipelined one with a bounded in-flight window
+    submit() returns as soon as the message is handed to a sender thread, so
+    the caller keeps producing while earlier sends are outstanding. Once
+    max_pending messages are in flight, submit() blocks until one completes.
+    """
+
+    def __init__(self,
+                 send: Callable[[Any], Any],
+                 max_pending: int = DEFAULT_MAX_PENDING,
+                 workers: Optional[int] = None,
+                 name: str = "pulsar-send"):
+        """
+        :send: Blocking callable sending one message
+        :max_pending: Messages allowed in flight before submit() blocks
+        :workers: Sender threads, DEFAULT_SEND_WORKERS by default and never more than
+                  max_pending; with more than one, messages may complete out of order
+        :name: Prefix of the sender threads' names
+        """
+        if max_pending < 1:
+            raise ValueError("max_pending must be at least 1")
+        self.send = send
+        self.max_pending = max_pending
+        self._window = threading.BoundedSemaphore(max_pending)
+        # Threads are started on demand, so an idle window costs nothing
+        self._executor = ThreadPoolExecutor(
+            max_workers=min(workers or DEFAULT_SEND_WORKERS, max_pending),
+            thread_name_prefix=name
+        )
+        self._pending = 0
+        self._idle = threading.Condition()
+
+    @property
+    def pending(self) -> int:
+        """Messages submitted but not completed yet"""
+        return self._pending
+
+    def submit(self, message: Any, callback: Optional[SendCallback] = None) -> Future:
+        """
+        Send a message without waiting for it
+        :message: Message to send
+        :callback: Called with the future from the sender thread once the send completed or failed
+        :return: Future resolving to the send's return value
+        """
+        self._window.acquire()
+        with self._idle:
+            self._pending += 1
+        try:
+            future = self._executor.submit(self.send, message)
+        except Exception:
+            self._complete(None)
+            raise
+        future.add_done_callback(lambda done: self._complete(done, callback))
+        return future
+
+    def _complete(self, future: Optional[Future], callback: Optional[SendCallback] = None) -> None:
+        try:
+            if callback is not None:
+                callback(future)
+        finally:
+            self._window.release()
+            with self._idle:
+                self._pending -= 1
+                if not self._pending:
+                    self._idle.notify_all()
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for every in-flight message to complete, callbacks included
+        :return: False if the timeout expired first
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: not self._pending, timeout)
+
+    def close(self) -> None:
+        """Wait for in-flight messages and stop the sender threads"""
+        self.drain()
+        self._executor.shutdown()
@@ -0,0 +1,166 @@
+# pulsar/core/latency.py
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Optional
+
+from pulsar.core.histogram import LatencyHistogram
+from pulsar.core.payload import HEADER
+
+# Which send stamp end-to-end latency is measured from
+E2E_CLOCKS = ("monotonic", "realtime")
+# Out-of-order sequences an end-to-end recorder tracks before giving up on the oldest gap
+DEFAULT_REORDER_WINDOW = 65_536
+
+
+@dataclass
+class ClockOffset:
+    """Offset of a remote clock from the local one, estimated from timestamp exchanges"""
+    offset_ns: int = 0
+    # Round trip of the exchange the offset was taken from; the offset is exact to within half of it
+    rtt_ns: int = 0
+    samples: int = 0
+
+    @classmethod
+    def from_exchanges(cls, exchanges: Iterable[tuple[int, int, int, int]]) -> "ClockOffset":
+        """
+        Estimate the offset as NTP does, from the exchange with the shortest round trip
+        :exchanges: (local send, remote receive, remote reply, local receive) timestamps in ns
+        :return: Remote minus local time
+        """
+        best = None
+        count = 0
+        for t0, t1, t2, t3 in exchanges:
+            count += 1
+            rtt = (t3 - t0) - (t2 - t1)
+            if best is None or rtt < best[1]:
+                best = (((t1 - t0) + (t2 - t3)) // 2, rtt)
+        if best is None:
+            return cls()
+        return cls(best[0], best[1], count)
+
+
+def measure_clock_offset(remote_clock: Callable[[], int],
+                         samples: int = 16,
+                         clock: Callable[[], int] = time.time_ns) -> ClockOffset:
+    """
+    Estimate the offset of a remote clock read through a round trip, e.g. a request to a peer process
+    :remote_clock: Returns the remote clock's time in ns
+    :samples: Exchanges to take; the one with the shortest round trip wins
+    :clock: Local clock in ns
+    """
+    exchanges = []
+    for _ in range(samples):
+        t0 = clock()
+        remote = remote_clock()
+        t3 = clock()
+        exchanges.append((t0, remote, remote, t3))
+    return ClockOffset.from_exchanges(exchanges)
+
+
+class EndToEndRecorder:
+    """
+    Records publish-to-receive latency from the header stamped on payloads
+    A receiver decodes each payload's send stamp and records the time since
+    into a histogram, in microseconds. With the monotonic stamp, producer and
+    consumer must run on the same host; across hosts, use the realtime stamp
+    and the offset of the producer's clock from the consumer's. Sequence
+    numbers are tracked to count reordered and duplicated deliveries, as a
+    low-water mark below which every sequence arrived plus the out-of-order
+    sequences above it, so memory is bounded by the reorder window rather
+    than by the number of messages.
+    """
+
+    def __init__(self,
+                 clock: str = "monotonic",
+                 offset: Optional[ClockOffset] = None,
+                 significant_figures: int = 3,
+                 reorder_window: int = DEFAULT_REORDER_WINDOW):
+        """
+        :clock: "monotonic" or "realtime", the send stamp latency is measured from
+        :offset: Offset of the producer's clock from the receiver's, for the realtime stamp
+        :significant_figures: Precision kept by the histogram
+        :reorder_window: Out-of-order sequences tracked above the low-water mark; past it, the oldest gap is given up as missing
+        """
+        if clock not in E2E_CLOCKS:
+            raise ValueError(f"Unknown clock {clock!r}, expected one of {E2E_CLOCKS}")
+        self.clock = clock
+        self.offset = offset or ClockOffset()
+        self.histogram = LatencyHistogram(significant_figures=significant_figures)
+        self._now = time.monotonic_ns if clock == "monotonic" else time.time_ns
+        self._field = 2 if clock == "monotonic" else 1
+        self.received = 0
+        # Stamps later than the receive time, a sign of clock skew; recorded as 0
+        self.negative = 0
+        self.reordered = 0
+        self.max_sequence = -1
+        self.reorder_window = reorder_window
+        # Every sequence below the low-water mark arrived, except the given-up ones
+        self._low_water = 0
+        self._given_up = 0
+        self._above: set[int] = set()
+        self.duplicates = 0
+
+    def record(self, payload: Any, received_ns: Optional[int] = None) -> float:
+        """
+        Record the latency of a received payload
+        :payload: bytes or buffer starting with a payload header
+        :received_ns: Receive time on the recorder's clock, defaults to now
+        :return: Latency in milliseconds
+        """
+        now = self._now() if received_ns is None else received_ns
+        header = HEADER.unpack_from(payload)
+        sequence, sent_ns = header[0], header[self._field]
+        # Remote stamps are moved onto the local clock: local = remote - offset
+        latency_ns = now - (sent_ns - self.offset.offset_ns)
+        if latency_ns < 0:
+            self.negative += 1
+            latency_ns = 0
+        self.histogram.record(latency_ns / 1000)
+        self.received += 1
+
+        if sequence < self._low_water or sequence in self._above:
+            # A late arrival of a given-up sequence is counted here too
+            self.duplicates += 1
+        else:
+            self._track(sequence)
+            if sequence < self.max_sequence:
+                self.reordered += 1
+            else:
+                self.max_sequence = sequence
+        return latency_ns / 1e6
+
+    def _track(self, sequence: int) -> None:
+        """Mark a sequence as seen, advancing the low-water mark over the contiguous run"""
+        above = self._above
+        above.add(sequence)
+        if len(above) > self.reorder_window:
+            lowest = min(above)
+            self._given_up += lowest - self._low_water
+            self._low_water = lowest
+        while self._low_water in above:
+            above.remove(self._low_water)
+            self._low_water += 1
+
+    def record_all(self, payloads: Iterable[Any]) -> None:
+        """Record a batch of payloads received together"""
+        now = self._now()
+        for payload in payloads:
+            self.record(payload, now)
+
+    def missing(self, expected: Optional[int] = None) -> int:
+        """Messages not received yet, out of expected or of every sequence number up to the highest seen"""
+        total = self.max_sequence + 1 if expected is None else expected
+        return total - (self._low_water - self._given_up + len(self._above))
+
+    def summary(self) -> dict[str, Any]:
+        """Latency percentiles in milliseconds and delivery counts"""
+        return {
+            "clock": self.clock,
+            "received": self.received,
+            "missing": self.missing(),
+            "reordered": self.reordered,
+            "duplicates": self.duplicates,
+            "negative": self.negative,
+            "offset_ms": self.offset.offset_ns / 1e6,
+            "latency_ms": self.histogram.summary(scale=1000.0),
+        }
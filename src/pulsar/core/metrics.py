@@ -0,0 +1,138 @@
+# pulsar/core/metrics.py
+import threading
+from typing import Any, Union
+
+Number = Union[int, float]
+
+
+class Counter:
+    """
+    Monotonic counter sharded per thread
+    Every thread adds to its own shard, so inc() takes no lock and threads never
+    contend on a shared value. Reading the value sums the shards.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._local = threading.local()
+        self._shards: list[list[Number]] = []
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Collapse the shards into one; the threads of the new process get their own
+        return {"name": self.name, "shards": [[self.value]]}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.name = state["name"]
+        self._local = threading.local()
+        self._shards = state["shards"]
+        self._lock = threading.Lock()
+
+    def _new_shard(self) -> list[Number]:
+        shard = self._local.shard = [0]
+        with self._lock:
+            self._shards.append(shard)
+        return shard
+
+    def inc(self, value: Number = 1) -> None:
+        """Add to the calling thread's shard"""
+        try:
+            self._local.shard[0] += value
+        except AttributeError:
+            self._new_shard()[0] += value
+
+    @property
+    def value(self) -> Number:
+        with self._lock:
+            shards = list(self._shards)
+        return sum(shard[0] for shard in shards)
+
+
+class Gauge:
+    """Value that is set rather than accumulated, e.g. messages in flight"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.value: Number = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {"name": self.name, "value": self.value}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def set(self, value: Number) -> None:
+        self.value = value
+
+    def inc(self, value: Number = 1) -> None:
+        with self._lock:
+            self.value += value
+
+    def dec(self, value: Number = 1) -> None:
+        with self._lock:
+            self.value -= value
+
+
+class MetricRegistry:
+    """
+    Registry handing out counter and gauge handles by name
+    Resolve a handle once, outside hot loops, and update it directly; the
+    registry is only consulted to create handles and to read them all.
+    """
+
+    def __init__(self):
+        self._counters: dict[str, Counter] = {}
+        self._gauges: dict[str, Gauge] = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def counter(self, name: str) -> Counter:
+        """Get the counter registered under a name, creating it on first use"""
+        counter = self._counters.get(name)
+        if counter is None:
+            with self._lock:
+                counter = self._counters.setdefault(name, Counter(name))
+        return counter
+
+    def gauge(self, name: str) -> Gauge:
+        """Get the gauge registered under a name, creating it on first use"""
+        gauge = self._gauges.get(name)
+        if gauge is None:
+            with self._lock:
+                gauge = self._gauges.setdefault(name, Gauge(name))
+        return gauge
+
+    def get(self, name: str, default: Number = 0.0) -> Number:
+        """Read a counter or gauge by name"""
+        metric = self._counters.get(name) or self._gauges.get(name)
+        return default if metric is None else metric.value
+
+    def merge(self, other: "MetricRegistry") -> "MetricRegistry":
+        """
+        Add the counters and gauges of another registry, e.g. one filled in a worker process
+        Gauges are summed, as for messages in flight across workers.
+        :return: self, to chain merges
+        """
+        with other._lock:
+            counters, gauges = list(other._counters.values()), list(other._gauges.values())
+        for counter in counters:
+            self.counter(counter.name).inc(counter.value)
+        for gauge in gauges:
+            self.gauge(gauge.name).inc(gauge.value)
+        return self
+
+    def snapshot(self) -> dict[str, Number]:
+        """Read every counter and gauge"""
+        with self._lock:
+            metrics = [*self._counters.values(), *self._gauges.values()]
+        return {metric.name: metric.value for metric in metrics}
@@ -79,6 +79,46 @@ class StageStatus(Enum):
     FAILED = "failed"
     SKIPPED = "skipped"
 
+@dataclass
+class StageTimings:
+    """
+    Monotonic timestamps (time.monotonic_ns) of one stage execution
+    Phases a stage does not report, e.g. setup for a plain StageCommand, stay None.
+    """
+    ready: Optional[int] = None
+    start: Optional[int] = None
+    setup_end: Optional[int] = None
+    run_end: Optional[int] = None
+    end: Optional[int] = None
+
+    @staticmethod
+    def _between(first: Optional[int], last: Optional[int]) -> Optional[int]:
+        if first is None or last is None:
+            return None
+        return last - first
+
+    @property
+    def queue_delay(self) -> Optional[int]:
+        """Nanoseconds between the dependencies finishing and the stage starting"""
+        return self._between(self.ready, self.start)
+
+    @property
+    def setup(self) -> Optional[int]:
+        return self._between(self.start, self.setup_end)
+
+    @property
+    def run(self) -> Optional[int]:
+        return self._between(self.setup_end, self.run_end)
+
+    @property
+    def teardown(self) -> Optional[int]:
+        return self._between(self.run_end, self.end)
+
+    @property
+    def span(self) -> Optional[int]:
+        """Nanoseconds from the stage starting to it finishing"""
+        return self._between(self.start, self.end)
+
 @dataclass
 class StageResult:
     stage_name: str
@@ -86,3 +126,4 @@ class StageResult:
     result: Any = None
     error: Optional[Exception] = None
     metadata: dict[str, Any] = None
+    timings: Optional[StageTimings] = None
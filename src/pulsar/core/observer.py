@@ -1,5 +1,9 @@
 # pulsar/core/observer.py
+import queue
+import threading
+import time
 from abc import ABC, abstractmethod
+from typing import Any, Optional
 
 from pulsar.core.models import StageResult
 
@@ -22,6 +26,10 @@ class LoggingObserver(StageObserver):
         self.logger.info(
             f"Stage {result.stage_name} status changed to {result.status}"
         )
+        if result.metadata and "cache" in result.metadata:
+            self.logger.info(
+                f"Stage {result.stage_name} result cache {result.metadata['cache']}"
+            )
         if result.error:
             self.logger.error(
                 f"Stage {result.stage_name} failed: {str(result.error)}"
@@ -36,3 +44,140 @@ class MetricsObserver(StageObserver):
             stage_name=result.stage_name,
             status=result.status.value
         )
+
+
+OBSERVER_BUS_POLICIES = ("block", "drop_newest", "drop_oldest")
+
+
+class ObserverBus(StageObserver):
+    """
+    Observer delivering stage results to other observers on a background thread
+    Attached to stages like any other observer; update() only enqueues the
+    result, so slow observers no longer add to stage latency. Results are
+    delivered in batches: observers providing update_batch(results) receive the
+    whole batch, the others receive one update() call per result.
+    """
+
+    _STOP = object()
+
+    def __init__(self,
+                 observers: Optional[list[StageObserver]] = None,
+                 maxsize: int = 10000,
+                 batch_size: int = 256,
+                 policy: str = "block",
+                 linger: float = 0.0):
+        """
+        :observers: Observers results are delivered to
+        :maxsize: Number of results buffered before the policy applies
+        :batch_size: Maximum number of results per delivery
+        :policy: What update() does when the buffer is full: "block" waits for
+                 room, "drop_newest" discards the new result, "drop_oldest"
+                 discards the oldest buffered one
+        :linger: Seconds the delivery thread waits for a batch to fill up
+        """
+        if policy not in OBSERVER_BUS_POLICIES:
+            raise ValueError(f"Unknown observer bus policy '{policy}', expected one of {OBSERVER_BUS_POLICIES}")
+        self.observers: list[StageObserver] = list(observers or [])
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.policy = policy
+        self.linger = linger
+        self._start()
+
+    def _start(self) -> None:
+        self.delivered = 0
+        self.dropped = 0
+        self.batches = 0
+        self.errors = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=self.maxsize)
+        self._thread = threading.Thread(target=self._deliver, name="pulsar-observer-bus", daemon=True)
+        self._thread.start()
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Each process gets its own buffer and delivery thread
+        state = self.__dict__.copy()
+        for name in ("_queue", "_thread", "delivered", "dropped", "batches", "errors"):
+            del state[name]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._start()
+
+    def subscribe(self, observer: StageObserver) -> None:
+        """Add an observer results are delivered to"""
+        self.observers.append(observer)
+
+    def update(self, result: StageResult) -> None:
+        """Enqueue a result for delivery"""
+        if self.policy == "block":
+            self._queue.put(result)
+            return
+
+        while True:
+            try:
+                self._queue.put_nowait(result)
+                return
+            except queue.Full:
+                if self.policy == "drop_newest":
+                    self.dropped += 1
+                    return
+            try:
+                self._queue.get_nowait()
+                self._queue.task_done()
+                self.dropped += 1
+            except queue.Empty:
+                pass
+
+    def _next_batch(self) -> list[Any]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.linger
+        while len(batch) < self.batch_size and batch[-1] is not self._STOP:
+            try:
+                timeout = deadline - time.monotonic()
+                if timeout > 0:
+                    batch.append(self._queue.get(timeout=timeout))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _deliver(self) -> None:
+        while True:
+            batch = self._next_batch()
+            stop = batch[-1] is self._STOP
+            results = batch[:-1] if stop else batch
+            if results:
+                for observer in self.observers:
+                    try:
+                        if hasattr(observer, "update_batch"):
+                            observer.update_batch(results)
+                        else:
+                            for result in results:
+                                observer.update(result)
+                    except Exception:
+                        self.errors += 1
+                self.delivered += len(results)
+                self.batches += 1
+            for _ in batch:
+                self._queue.task_done()
+            if stop:
+                return
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every enqueued result has been delivered
+        :timeout: Seconds to wait, None waits indefinitely
+        :return: False if the timeout expired first
+        """
+        condition = self._queue.all_tasks_done
+        with condition:
+            return condition.wait_for(lambda: not self._queue.unfinished_tasks, timeout)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Deliver the buffered results and stop the delivery thread"""
+        if not self._thread.is_alive():
+            return
+        self._queue.put(self._STOP)
+        self._thread.join(timeout)
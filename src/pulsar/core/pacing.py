@@ -0,0 +1,361 @@
+# pulsar/core/pacing.py
+import math
+import threading
+import time
+from typing import Any, Callable, Optional
+
+# Below this many seconds before a deadline, pacers spin instead of sleeping
+DEFAULT_SPIN = 0.0002
+
+LOAD_MODES = ("closed", "open")
+
+# What ends a send loop: a number of messages or a duration
+SEND_UNTIL = ("count", "duration")
+
+
+def wait_until(deadline: float, clock: Callable[[], float] = time.perf_counter, spin: float = DEFAULT_SPIN) -> None:
+    """
+    Block until the clock reaches a deadline
+    Sleeps for most of the wait, then spins for the last spin seconds, since
+    sleeps overshoot by tens of microseconds to milliseconds.
+    """
+    remaining = deadline - clock()
+    if remaining > spin:
+        time.sleep(remaining - spin)
+    while clock() < deadline:
+        pass
+
+
+class RateProfile:
+    """
+    Target rate over time: a linear ramp from 0 up to rate, then steady
+    count_at() and time_of() convert between elapsed time and the number of
+    messages due by then, so pacers stay exact however long they wait.
+    """
+
+    def __init__(self, rate: float, ramp_up: float = 0.0):
+        """
+        :rate: Steady rate in messages per second
+        :ramp_up: Seconds taken to ramp up to rate, 0 starts at full rate
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if ramp_up < 0:
+            raise ValueError("ramp_up must not be negative")
+        self.rate = rate
+        self.ramp_up = ramp_up
+
+    def rate_at(self, elapsed: float) -> float:
+        if elapsed < self.ramp_up:
+            return self.rate * elapsed / self.ramp_up
+        return self.rate
+
+    def count_at(self, elapsed: float) -> float:
+        """Messages due by an elapsed time"""
+        if elapsed <= 0:
+            return 0.0
+        if elapsed < self.ramp_up:
+            return self.rate * elapsed * elapsed / (2 * self.ramp_up)
+        return self.rate * (elapsed - self.ramp_up / 2)
+
+    def time_of(self, count: float) -> float:
+        """Elapsed time by which count messages are due"""
+        if count <= 0:
+            return 0.0
+        ramp_count = self.rate * self.ramp_up / 2
+        if count < ramp_count:
+            return math.sqrt(2 * self.ramp_up * count / self.rate)
+        return self.ramp_up + (count - ramp_count) / self.rate
+
+
+class IntendedSchedule:
+    """
+    Fixed timeline of intended send times derived from a target rate
+    Message i is due at start + i / rate whatever happened to the earlier
+    ones. When sends fall behind, the next ones are due immediately, so the
+    time a message waited for its turn shows up in the latency measured from
+    its intended start instead of being silently dropped (coordinated omission).
+    """
+
+    def __init__(self,
+                 rate: float,
+                 clock: Callable[[], float] = time.perf_counter,
+                 spin: float = DEFAULT_SPIN,
+                 ramp_up: float = 0.0):
+        """
+        :rate: Target rate in messages per second
+        :clock: Clock the schedule runs on, in seconds
+        :spin: Seconds before a deadline to switch from sleeping to spinning
+        :ramp_up: Seconds over which the rate ramps up linearly from 0
+        """
+        self.profile = RateProfile(rate, ramp_up)
+        self.rate = rate
+        self.interval = 1.0 / rate
+        self.clock = clock
+        self.spin = spin
+        self.start = None
+        self.sent = 0
+        self.max_lag = 0.0
+
+    def next(self) -> float:
+        """
+        Wait for the intended start of the next send
+        :return: The intended start, on the schedule's clock
+        """
+        if self.start is None:
+            self.start = self.clock()
+        intended = self.start + self.profile.time_of(self.sent)
+        self.sent += 1
+        lag = self.clock() - intended
+        if lag < 0:
+            wait_until(intended, self.clock, self.spin)
+        elif lag > self.max_lag:
+            self.max_lag = lag
+        return intended
+
+
+class TokenBucket:
+    """
+    Token bucket pacer for closed-loop sending
+    Tokens accrue at the target rate, following the ramp-up profile, up to
+    burst tokens; each send takes one. Unlike IntendedSchedule, a send that
+    falls behind does not build a backlog: at most burst messages go out
+    back to back before sends are paced again.
+    """
+
+    def __init__(self,
+                 rate: float,
+                 burst: int = 1,
+                 ramp_up: float = 0.0,
+                 clock: Callable[[], float] = time.perf_counter,
+                 spin: float = DEFAULT_SPIN):
+        """
+        :rate: Target rate in messages per second
+        :burst: Tokens the bucket holds, i.e. messages sent back to back after an idle period
+        :ramp_up: Seconds over which the rate ramps up linearly from 0
+        :clock: Clock the bucket runs on, in seconds
+        :spin: Seconds before a deadline to switch from sleeping to spinning
+        """
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+        self.profile = RateProfile(rate, ramp_up)
+        self.rate = rate
+        self.interval = 1.0 / rate
+        self.burst = burst
+        self.clock = clock
+        self.spin = spin
+        self.start = None
+        self.sent = 0
+        self.max_lag = 0.0
+        self._tokens = 0.0
+        self._elapsed = 0.0
+
+    def _refill(self, now: float, capacity: float) -> None:
+        elapsed = now - self.start
+        accrued = self.profile.count_at(elapsed) - self.profile.count_at(self._elapsed)
+        self._tokens = min(capacity, self._tokens + accrued)
+        self._elapsed = elapsed
+
+    def next(self) -> float:
+        """
+        Wait for a token
+        :return: Time the token became available, on the bucket's clock
+        """
+        now = self.clock()
+        if self.start is None:
+            # The first send goes out straight away
+            self.start = now
+            self._tokens = 1.0
+        self._refill(now, self.burst)
+
+        due = now
+        if self._tokens < 1:
+            due = self.start + self.profile.time_of(self.profile.count_at(self._elapsed) + 1 - self._tokens)
+            wait_until(due, self.clock, self.spin)
+            now = self.clock()
+            # Keep what accrued while overshooting the deadline, or the rate would drift low
+            self._refill(now, self.burst + 1)
+            self.max_lag = max(self.max_lag, now - due)
+
+        self._tokens = max(self._tokens - 1, 0.0)
+        self.sent += 1
+        return due
+
+
+# Share of an interval's sends an adaptive sender may fall short by before it counts as congestion
+BEHIND_TOLERANCE = 0.1
+
+
+class AimdRateController:
+    """
+    Closed-loop pacer adapting its rate to backpressure: additive increase, multiplicative decrease
+    Sends are paced one at a time at the current rate. Every adjust interval,
+    the outcomes observed since the last one are checked for congestion: p90
+    latency above target, an error rate above max_error_rate, max_pending or
+    more messages in flight, or sends falling behind the rate. A congested
+    interval multiplies the rate by backoff, a clean one adds step to it, so
+    the rate saws just under the highest rate the producer sustains.
+    """
+
+    def __init__(self,
+                 rate: float,
+                 min_rate: float = 1.0,
+                 max_rate: Optional[float] = None,
+                 step: Optional[float] = None,
+                 backoff: float = 0.5,
+                 adjust_interval: float = 0.1,
+                 latency_target_ms: Optional[float] = None,
+                 latency_factor: float = 3.0,
+                 max_error_rate: float = 0.01,
+                 max_pending: Optional[int] = None,
+                 pending: Optional[Callable[[], int]] = None,
+                 on_adjust: Optional[Callable[[float], None]] = None,
+                 clock: Callable[[], float] = time.perf_counter,
+                 spin: float = DEFAULT_SPIN):
+        """
+        :rate: Starting rate in messages per second
+        :min_rate: Lowest rate cuts go down to
+        :max_rate: Highest rate increases go up to, unbounded by default
+        :step: Messages per second added after a clean interval, a tenth of rate by default
+        :backoff: Factor the rate is multiplied by after a congested interval
+        :adjust_interval: Seconds of sends observed before each adjustment
+        :latency_target_ms: p90 latency above which an interval is congested; by default
+                            latency_factor times the lowest p90 of any interval so far
+        :max_error_rate: Share of failed sends above which an interval is congested
+        :max_pending: Messages in flight at which an interval is congested, needs pending
+        :pending: Returns the messages currently in flight
+        :on_adjust: Called with the new rate after every adjustment, e.g. a gauge's set
+        :clock: Clock the controller runs on, in seconds
+        :spin: Seconds before a deadline to switch from sleeping to spinning
+        """
+        if rate <= 0 or min_rate <= 0:
+            raise ValueError("rate and min_rate must be positive")
+        if not 0 < backoff < 1:
+            raise ValueError("backoff must be between 0 and 1")
+        if adjust_interval <= 0:
+            raise ValueError("adjust_interval must be positive")
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.step = step if step is not None else rate / 10
+        self.backoff = backoff
+        self.adjust_interval = adjust_interval
+        self.latency_target_ms = latency_target_ms
+        self.latency_factor = latency_factor
+        self.max_error_rate = max_error_rate
+        self.max_pending = max_pending
+        self.pending = pending
+        self.on_adjust = on_adjust
+        self.clock = clock
+        self.spin = spin
+        self.start = None
+        self.sent = 0
+        self.max_lag = 0.0
+        # Highest rate an interval went through without congestion
+        self.sustained_rate = 0.0
+        self.cuts = 0
+        # (elapsed seconds, rate set, what triggered it) per adjustment
+        self.trajectory: list[tuple[float, float, str]] = []
+        self._baseline_ms: Optional[float] = None
+        self._due = 0.0
+        self._lock = threading.Lock()
+        self._reset_window(0.0)
+
+    @property
+    def interval(self) -> float:
+        """Seconds between sends at the current rate"""
+        return 1.0 / self.rate
+
+    def _reset_window(self, now: float) -> None:
+        self._window_start = now
+        self._window_sent = 0
+        self._latencies: list[float] = []
+        self._outcomes = 0
+        self._errors = 0
+
+    def observe(self, latency_ms: Optional[float] = None, error: bool = False) -> None:
+        """
+        Report the outcome of a send; safe to call from completion callbacks on other threads
+        :latency_ms: Latency of a successful send
+        :error: The send failed
+        """
+        with self._lock:
+            self._outcomes += 1
+            if error:
+                self._errors += 1
+            elif latency_ms is not None:
+                self._latencies.append(latency_ms)
+
+    def congestion(self, now: float) -> list[str]:
+        """Signals of congestion in the current interval: "latency", "errors", "pending" and "behind" """
+        with self._lock:
+            latencies, outcomes, errors = self._latencies, self._outcomes, self._errors
+        signals = []
+        if latencies:
+            p90 = sorted(latencies)[int(0.9 * (len(latencies) - 1))]
+            self._baseline_ms = p90 if self._baseline_ms is None else min(self._baseline_ms, p90)
+            target = self.latency_target_ms or self._baseline_ms * self.latency_factor
+            if p90 > target:
+                signals.append("latency")
+        if outcomes and errors / outcomes > self.max_error_rate:
+            signals.append("errors")
+        if self.max_pending and self.pending is not None and self.pending() >= self.max_pending:
+            signals.append("pending")
+        if self._window_sent < (1 - BEHIND_TOLERANCE) * self.rate * (now - self._window_start):
+            signals.append("behind")
+        return signals
+
+    def adjust(self, now: float) -> float:
+        """
+        Raise or cut the rate from the interval ending now, then start the next one
+        :return: The new rate
+        """
+        signals = self.congestion(now)
+        if signals:
+            self.rate = max(self.min_rate, self.rate * self.backoff)
+            self.cuts += 1
+        else:
+            self.sustained_rate = max(self.sustained_rate, self.rate)
+            self.rate += self.step
+            if self.max_rate is not None:
+                self.rate = min(self.rate, self.max_rate)
+        self.trajectory.append((now - self.start, self.rate, ",".join(signals) or "increase"))
+        if self.on_adjust:
+            self.on_adjust(self.rate)
+        with self._lock:
+            self._reset_window(now)
+        return self.rate
+
+    def next(self) -> float:
+        """
+        Wait for the next send at the current rate, adjusting the rate once an interval is over
+        :return: Time the send is due, on the controller's clock
+        """
+        now = self.clock()
+        if self.start is None:
+            self.start = self._due = now
+            self._reset_window(now)
+        elif now - self._window_start >= self.adjust_interval:
+            self.adjust(now)
+
+        if now < self._due:
+            wait_until(self._due, self.clock, self.spin)
+            due = self._due
+        else:
+            # Behind the rate: send now rather than build a backlog, the next interval cuts the rate
+            self.max_lag = max(self.max_lag, now - self._due)
+            due = now
+        self._due = due + self.interval
+        self.sent += 1
+        self._window_sent += 1
+        return due
+
+    def summary(self) -> dict[str, Any]:
+        """Final and sustained rates, cuts and the rate trajectory"""
+        return {
+            "final_rate": self.rate,
+            "sustained_rate": self.sustained_rate,
+            "cuts": self.cuts,
+            "trajectory": [{"elapsed": elapsed, "rate": rate, "reason": reason}
+                           for elapsed, rate, reason in self.trajectory],
+        }
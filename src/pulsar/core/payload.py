@@ -0,0 +1,120 @@
+# pulsar/core/payload.py
+import struct
+import time
+from typing import Any, Callable, Optional, Sequence
+
+import numpy as np
+
+SIZE_DISTRIBUTIONS = ("fixed", "uniform", "lognormal", "empirical")
+
+# Sequence number, send time in ns since the epoch and send time on the
+# monotonic clock in ns, at the start of every payload
+HEADER = struct.Struct("<QQQ")
+_TIMESTAMPS = struct.Struct("<QQ")
+
+DEFAULT_POOL_SIZE = 1024
+
+
+def read_header(payload: Any) -> tuple[int, int, int]:
+    """
+    Read the header stamped on a payload
+    :payload: bytes, bytearray or memoryview starting with a header
+    :return: Sequence number, send time in ns since the epoch and send time on the monotonic clock
+    """
+    return HEADER.unpack_from(payload)
+
+
+class PayloadPool:
+    """
+    Pool of preallocated payload buffers with sizes drawn from a distribution
+    Sizes are drawn once and every buffer is carved out of one arena, filled
+    with random bytes up front. Getting a payload only stamps its header in
+    place and hands out a memoryview, so sending allocates nothing per
+    message. Buffers are reused round-robin: pool_size must exceed the
+    messages a producer holds on to, e.g. the ones in flight.
+    """
+
+    def __init__(self,
+                 size: int = 100,
+                 distribution: str = "fixed",
+                 max_size: Optional[int] = None,
+                 sigma: float = 0.5,
+                 sizes: Optional[Sequence[tuple[int, float]]] = None,
+                 pool_size: int = DEFAULT_POOL_SIZE,
+                 seed: Optional[int] = None,
+                 clock: Callable[[], int] = time.time_ns,
+                 monotonic: Callable[[], int] = time.monotonic_ns):
+        """
+        :size: Size in bytes for "fixed", smallest size for "uniform", median size for "lognormal"
+        :distribution: One of SIZE_DISTRIBUTIONS
+        :max_size: Largest size for "uniform", and the cap of the other distributions
+        :sigma: Standard deviation of the log of the sizes for "lognormal"
+        :sizes: (size, weight) pairs for "empirical", e.g. a histogram of production payload sizes
+        :pool_size: Number of distinct buffers
+        :seed: Seed of the size and content generator, for reproducible runs
+        :clock: Wall clock the timestamps are stamped from, in ns
+        :monotonic: Monotonic clock also stamped, in ns; comparable across processes of one host
+        """
+        if distribution not in SIZE_DISTRIBUTIONS:
+            raise ValueError(f"Unknown size distribution {distribution!r}, expected one of {SIZE_DISTRIBUTIONS}")
+        if pool_size < 1:
+            raise ValueError("pool_size must be at least 1")
+        self.distribution = distribution
+        self.clock = clock
+        self.monotonic = monotonic
+        rng = np.random.default_rng(seed)
+
+        if distribution == "fixed":
+            drawn = np.full(pool_size, size)
+        elif distribution == "uniform":
+            if max_size is None or max_size < size:
+                raise ValueError("A uniform size distribution needs max_size of at least size")
+            drawn = rng.integers(size, max_size, pool_size, endpoint=True)
+        elif distribution == "lognormal":
+            drawn = np.rint(rng.lognormal(np.log(size), sigma, pool_size))
+        else:
+            if not sizes:
+                raise ValueError("An empirical size distribution needs (size, weight) pairs")
+            values, weights = np.array([s for s, _ in sizes]), np.array([w for _, w in sizes], dtype=np.float64)
+            drawn = rng.choice(values, pool_size, p=weights / weights.sum())
+        self.sizes = np.clip(drawn, HEADER.size, max_size or None).astype(np.int64)
+
+        offsets = np.concatenate([[0], np.cumsum(self.sizes)])
+        self._arena = bytearray(rng.bytes(int(offsets[-1])))
+        arena = memoryview(self._arena)
+        self._buffers = [arena[start:end] for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+
+    def __len__(self) -> int:
+        return len(self._buffers)
+
+    def payload(self, sequence: int) -> memoryview:
+        """Get the buffer of a sequence number, stamped with the sequence number and the current times"""
+        buffer = self._buffers[sequence % len(self._buffers)]
+        HEADER.pack_into(buffer, 0, sequence, self.clock(), self.monotonic())
+        return buffer
+
+    def stamped(self, send: Callable[..., Any]) -> Callable[..., Any]:
+        """
+        Wrap a send so every payload's timestamps are restamped right before it is sent
+        Payloads are drawn before any pacing wait; the wrapped send keeps the
+        timestamps at the actual send, as end-to-end latency needs.
+        """
+        clock, monotonic, pack_into = self.clock, self.monotonic, _TIMESTAMPS.pack_into
+        offset = HEADER.size - _TIMESTAMPS.size
+
+        def send_stamped(payload: memoryview, *args: Any, **kwargs: Any) -> Any:
+            pack_into(payload, offset, clock(), monotonic())
+            return send(payload, *args, **kwargs)
+
+        return send_stamped
+
+    def summary(self) -> dict[str, Any]:
+        """Distribution and sizes, in bytes, of the pooled payloads"""
+        return {
+            "distribution": self.distribution,
+            "pool_size": len(self._buffers),
+            "mean_size": float(self.sizes.mean()),
+            "min_size": int(self.sizes.min()),
+            "max_size": int(self.sizes.max()),
+            "p99_size": float(np.percentile(self.sizes, 99)),
+        }
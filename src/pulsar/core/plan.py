@@ -0,0 +1,117 @@
+# pulsar/core/plan.py
+import heapq
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping, Sequence
+
+from pulsar.core.command import StageCommand
+from pulsar.core.exceptions import (
+    PulsarStageAlreadyExistsError,
+    PulsarStageCycleError,
+    PulsarStageDependencyError,
+)
+
+
+@dataclass(frozen=True)
+class ExecutionPlan:
+    """Immutable, validated execution order for a stage graph"""
+
+    stages: Mapping[str, StageCommand]
+    order: tuple[str, ...]
+    levels: tuple[tuple[str, ...], ...]
+    dependencies: Mapping[str, frozenset[str]]
+    dependents: Mapping[str, tuple[str, ...]]
+
+    @classmethod
+    def compile(cls,
+                stages: Sequence[StageCommand],
+                prerequisites: Sequence[StageCommand] = ()) -> 'ExecutionPlan':
+        """
+        Compile a stage graph into an execution plan
+        :stages: Stages to execute, in insertion order
+        :prerequisites: Stages every other stage implicitly depends on
+        :return: The compiled plan
+        :raises PulsarStageAlreadyExistsError: If two different stages share a name
+        :raises PulsarStageDependencyError: If a stage depends on a stage outside the graph
+        :raises PulsarStageCycleError: If the dependencies contain a cycle
+        """
+        nodes: dict[str, StageCommand] = {}
+        for stage in [*prerequisites, *stages]:
+            existing = nodes.setdefault(stage.name, stage)
+            if existing is not stage:
+                raise PulsarStageAlreadyExistsError(stage.name)
+
+        prerequisite_names = [stage.name for stage in prerequisites]
+        dependencies: dict[str, frozenset[str]] = {}
+        for name, stage in nodes.items():
+            deps = set()
+            for dep in stage.dependencies:
+                if nodes.get(dep.name) is not dep:
+                    raise PulsarStageDependencyError(stage_name=name, dependency=dep.name)
+                deps.add(dep.name)
+            if name not in prerequisite_names:
+                deps.update(prerequisite_names)
+            dependencies[name] = frozenset(deps)
+
+        dependents: dict[str, list[str]] = {name: [] for name in nodes}
+        for name, deps in dependencies.items():
+            for dep in deps:
+                dependents[dep].append(name)
+
+        order = cls._sort(list(nodes), dependencies, dependents)
+
+        level_of: dict[str, int] = {}
+        for name in order:
+            level_of[name] = 1 + max((level_of[dep] for dep in dependencies[name]), default=-1)
+        levels = [[] for _ in range(max(level_of.values(), default=-1) + 1)]
+        for name in order:
+            levels[level_of[name]].append(name)
+
+        position = {name: i for i, name in enumerate(order)}
+        return cls(
+            stages=MappingProxyType(nodes),
+            order=tuple(order),
+            levels=tuple(tuple(level) for level in levels),
+            dependencies=MappingProxyType(dependencies),
+            dependents=MappingProxyType({
+                name: tuple(sorted(names, key=position.__getitem__)) for name, names in dependents.items()
+            }),
+        )
+
+    @staticmethod
+    def _sort(names: list[str],
+              dependencies: dict[str, frozenset[str]],
+              dependents: dict[str, list[str]]) -> list[str]:
+        """Topologically sort names, breaking ties by insertion order"""
+        index = {name: i for i, name in enumerate(names)}
+        in_degree = {name: len(deps) for name, deps in dependencies.items()}
+        ready = [index[name] for name, degree in in_degree.items() if degree == 0]
+        heapq.heapify(ready)
+        order = []
+
+        while ready:
+            name = names[heapq.heappop(ready)]
+            order.append(name)
+            for dependent in dependents[name]:
+                in_degree[dependent] -= 1
+                if in_degree[dependent] == 0:
+                    heapq.heappush(ready, index[dependent])
+
+        if len(order) != len(names):
+            remaining = set(names) - set(order)
+            raise PulsarStageCycleError(ExecutionPlan._find_cycle(remaining, dependencies))
+
+        return order
+
+    @staticmethod
+    def _find_cycle(remaining: set[str], dependencies: dict[str, frozenset[str]]) -> list[str]:
+        """Walk dependency edges among unsorted stages until a stage repeats"""
+        path: list[str] = []
+        name = min(remaining)
+        while name not in path:
+            path.append(name)
+            name = min(dep for dep in dependencies[name] if dep in remaining)
+        return path[path.index(name):] + [name]
+
+    def __len__(self) -> int:
+        return len(self.order)
@@ -0,0 +1,247 @@
+# pulsar/core/producer_group.py
+import itertools
+import queue
+import threading
+import zlib
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, Union
+
+from pulsar.core.batching import message_size
+from pulsar.core.dependencies import BaseDependency, Producer
+from pulsar.core.inflight import SendCallback
+from pulsar.core.metrics import Counter, MetricRegistry
+
+ROUTERS = ("round_robin", "key_hash")
+
+# Called with the message, its key and the number of partitions; returns a partition index
+Router = Callable[[Any, Any, int], int]
+
+_STOP = object()
+
+
+@dataclass
+class Partition:
+    """A topic partition and the producer sending to it"""
+    topic: str
+    index: int
+    producer: Any
+
+    @property
+    def name(self) -> str:
+        return f"{self.topic}-{self.index}"
+
+
+def key_hash(message: Any, key: Any, partitions: int) -> int:
+    """
+    Route by a stable hash of the key, the message itself when there is no key
+    crc32 is used rather than hash(), which is salted per process for strings.
+    """
+    key = message if key is None else key
+    data = key if isinstance(key, bytes) else str(key).encode()
+    return zlib.crc32(data) % partitions
+
+
+class ProducerGroup(BaseDependency):
+    """
+    Producer fanning messages out over the partitions of one or more topics
+    Every partition has its own producer, drained by its own worker thread
+    from a bounded queue, so partitions send concurrently and a slow partition
+    only holds up the messages routed to it. Sending blocks while the chosen
+    partition's queue is full. The group has the Producer interface and is
+    injected in stages as their "producer" dependency.
+    """
+
+    def __init__(self,
+                 partitions: list[Partition],
+                 router: Union[str, Router] = "round_robin",
+                 key: Optional[Callable[[Any], Any]] = None,
+                 metrics: Optional[Any] = None,
+                 queue_size: int = 1000):
+        """
+        :partitions: Partitions the group sends to
+        :router: "round_robin", "key_hash" or a callable taking the message,
+                 its key and the number of partitions and returning a partition index
+        :key: Extracts a message's key when send_message() is not given one
+        :metrics: Metrics dependency, or any registry with counter(), fed with
+                  per-partition "partition.<topic>-<index>.sent" and ".bytes" counters
+        :queue_size: Messages queued per partition before sending blocks
+        """
+        if not partitions:
+            raise ValueError("A producer group needs at least one partition")
+        if isinstance(router, str) and router not in ROUTERS:
+            raise ValueError(f"Unknown router {router!r}, expected one of {ROUTERS} or a callable")
+        self.partitions = partitions
+        self.router = router
+        self.key = key
+        self.metrics = metrics
+        self.queue_size = queue_size
+        self._reset()
+
+    @classmethod
+    def for_topics(cls,
+                   topics: dict[str, int],
+                   factory: Callable[[str, int], Any] = lambda topic, index: Producer({"topic": topic, "partition": index}),
+                   **kwargs: Any) -> "ProducerGroup":
+        """
+        Build a group with one producer per partition
+        :topics: Number of partitions per topic
+        :factory: Creates the producer of a topic partition
+        :return: Group over every partition of every topic, in order
+        """
+        partitions = [Partition(topic, index, factory(topic, index))
+                      for topic, count in topics.items() for index in range(count)]
+        return cls(partitions, **kwargs)
+
+    def _reset(self) -> None:
+        registry = self.metrics if self.metrics is not None else MetricRegistry()
+        self._sent: list[Counter] = [registry.counter(f"partition.{p.name}.sent") for p in self.partitions]
+        self._bytes: list[Counter] = [registry.counter(f"partition.{p.name}.bytes") for p in self.partitions]
+        self._next = itertools.count()
+        self._queues: list[queue.Queue] = []
+        self._threads: list[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._error: Optional[Exception] = None
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        for name in ("_sent", "_bytes", "_next", "_queues", "_threads", "_lock", "_error"):
+            del state[name]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._reset()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._threads:
+                return
+            self._queues = [queue.Queue(self.queue_size) for _ in self.partitions]
+            self._threads = [
+                threading.Thread(target=self._drain, args=(index,), name=f"pulsar-partition-{p.name}", daemon=True)
+                for index, p in enumerate(self.partitions)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def _drain(self, index: int) -> None:
+        producer = self.partitions[index].producer
+        sent, nbytes = self._sent[index], self._bytes[index]
+        pending = self._queues[index]
+        while True:
+            item = pending.get()
+            try:
+                if item is _STOP:
+                    return
+                message, future = item
+                try:
+                    producer.send_message(message)
+                except Exception as e:
+                    if future is None:
+                        # Surfaced to the sending thread on its next send or flush
+                        self._error = e
+                    else:
+                        future.set_exception(e)
+                    continue
+                sent.inc()
+                nbytes.inc(message_size(message))
+                if future is not None:
+                    future.set_result(None)
+            finally:
+                pending.task_done()
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def route(self, message: Any, key: Any = None) -> int:
+        """Index of the partition a message is sent to"""
+        if key is None and self.key is not None:
+            key = self.key(message)
+        if self.router == "round_robin":
+            return next(self._next) % len(self.partitions)
+        if self.router == "key_hash":
+            return key_hash(message, key, len(self.partitions))
+        return self.router(message, key, len(self.partitions)) % len(self.partitions)
+
+    def _enqueue(self, message: Any, key: Any, future: Optional[Future]) -> None:
+        if not self._threads:
+            self._start()
+        self._raise_error()
+        self._queues[self.route(message, key)].put((message, future))
+
+    def connect(self) -> None:
+        """Connect every partition's producer and start the workers"""
+        for partition in self.partitions:
+            partition.producer.connect()
+        self._start()
+
+    def disconnect(self) -> None:
+        """Send the queued messages, stop the workers and disconnect every producer"""
+        with self._lock:
+            queues, threads = self._queues, self._threads
+            self._queues, self._threads = [], []
+        for pending in queues:
+            pending.put(_STOP)
+        for thread in threads:
+            thread.join()
+        for partition in self.partitions:
+            partition.producer.disconnect()
+
+    def close(self) -> None:
+        self.disconnect()
+
+    def capabilities(self) -> frozenset[str]:
+        """Capabilities every partition's producer shares, plus partitioning"""
+        shared = frozenset.intersection(*(
+            p.producer.capabilities() if hasattr(p.producer, "capabilities") else frozenset()
+            for p in self.partitions
+        ))
+        # Messages are queued and acknowledged by the partition workers, never sent as one batch
+        return (shared - {"batch"}) | {"async", "partitions"}
+
+    def send_message(self, msg: Any, key: Any = None) -> None:
+        """
+        Queue a message on the partition its key routes to
+        :msg: Message to send
+        :key: Routing key, defaults to the key extracted from the message
+        """
+        self._enqueue(msg, key, None)
+
+    def send_batch(self, msgs: list[Any]) -> None:
+        """Queue every message of a batch, each routed on its own"""
+        for msg in msgs:
+            self._enqueue(msg, None, None)
+
+    def send_async(self, msg: Any, callback: Optional[SendCallback] = None, key: Any = None) -> Future:
+        """
+        Queue a message, returning a future resolved once its partition sent it
+        :callback: Called with the future from the partition's worker thread
+        """
+        future: Future = Future()
+        if callback is not None:
+            future.add_done_callback(callback)
+        self._enqueue(msg, key, future)
+        return future
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for every queued message to be sent
+        The timeout applies to each partition in turn.
+        :return: False if the timeout expired first
+        """
+        for pending in list(self._queues):
+            with pending.all_tasks_done:
+                if not pending.all_tasks_done.wait_for(lambda: not pending.unfinished_tasks, timeout):
+                    return False
+        self._raise_error()
+        return True
+
+    def partition_counts(self) -> dict[str, int]:
+        """Messages sent per partition"""
+        return {p.name: sent.value for p, sent in zip(self.partitions, self._sent)}
+
+    def is_available(self) -> bool:
+        return all(partition.producer.is_available() for partition in self.partitions)
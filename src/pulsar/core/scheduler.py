@@ -0,0 +1,182 @@
+# pulsar/core/scheduler.py
+import asyncio
+import heapq
+import time
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Optional, Any, Callable, Awaitable
+
+from pulsar.core.command import StageCommand
+from pulsar.core.models import StageResult, StageStatus, StageTimings
+from pulsar.core.plan import ExecutionPlan
+
+StageExecutor = Callable[[StageCommand, dict[str, Any]], StageResult]
+AsyncStageExecutor = Callable[[StageCommand, dict[str, Any]], Awaitable[StageResult]]
+
+
+def _execute(stage: StageCommand, context: dict[str, Any]) -> StageResult:
+    return stage.execute(context)
+
+
+async def _execute_async(stage: StageCommand, context: dict[str, Any]) -> StageResult:
+    return await stage.execute_async(context)
+
+
+class _Progress:
+    """Bookkeeping shared by the thread pool and asyncio scheduling loops"""
+
+    def __init__(self,
+                 plan: ExecutionPlan,
+                 context: dict[str, Any],
+                 completed: Optional[dict[str, StageResult]] = None):
+        completed = {name: result for name, result in (completed or {}).items() if name in plan.stages}
+        self.plan = plan
+        self.index = {name: i for i, name in enumerate(plan.order)}
+        self.waiting_on = {
+            name: set(deps) - completed.keys()
+            for name, deps in plan.dependencies.items() if name not in completed
+        }
+        self.ready = [self.index[name] for name, deps in self.waiting_on.items() if not deps]
+        heapq.heapify(self.ready)
+        now = time.monotonic_ns()
+        self.ready_at = {self.plan.order[i]: now for i in self.ready}
+        self.started_at: dict[str, int] = {}
+        self.results: dict[str, StageResult] = dict(completed)
+        self.context = {**context, "stage_results": self.results}
+        self.failed = False
+
+    def next_ready(self) -> Optional[str]:
+        """Pop the next stage whose dependencies are done, None once nothing may start"""
+        if self.failed or not self.ready:
+            return None
+        return self.plan.order[heapq.heappop(self.ready)]
+
+    def execute(self, execute: StageExecutor, stage: StageCommand) -> StageResult:
+        """Run a stage on a worker, noting when the worker picked it up"""
+        self.started_at[stage.name] = time.monotonic_ns()
+        return execute(stage, self.context)
+
+    async def execute_async(self, execute_async: AsyncStageExecutor, stage: StageCommand) -> StageResult:
+        self.started_at[stage.name] = time.monotonic_ns()
+        return await execute_async(stage, self.context)
+
+    def _time(self, name: str, result: StageResult) -> None:
+        """Attach scheduling timestamps, timing stages that do not time themselves as a whole"""
+        if result.timings is None:
+            result.timings = StageTimings(start=self.started_at.get(name), end=time.monotonic_ns())
+        result.timings.ready = self.ready_at[name]
+
+    def finish(self, name: str, result: StageResult) -> None:
+        """Record a stage result and release the dependents it was blocking"""
+        self._time(name, result)
+        self.results[name] = result
+        if result.status == StageStatus.FAILED:
+            self.failed = True
+            return
+
+        for dependent in self.plan.dependents[name]:
+            if dependent not in self.waiting_on:
+                continue
+            self.waiting_on[dependent].discard(name)
+            if not self.waiting_on[dependent]:
+                heapq.heappush(self.ready, self.index[dependent])
+                self.ready_at[dependent] = time.monotonic_ns()
+
+    def ordered_results(self) -> dict[str, StageResult]:
+        return {name: self.results[name] for name in self.plan.order if name in self.results}
+
+
+class DagScheduler:
+    """Runs a stage graph on a thread pool, starting each stage as soon as its dependencies finish"""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        """
+        :max_workers: Size of the thread pool, None uses the ThreadPoolExecutor default
+        """
+        self.max_workers = max_workers
+
+    def run(self,
+            plan: ExecutionPlan,
+            context: dict[str, Any],
+            execute: StageExecutor = _execute,
+            completed: Optional[dict[str, StageResult]] = None) -> dict[str, StageResult]:
+        """
+        Execute every stage of a plan exactly once while honouring its dependencies
+        :plan: Compiled plan to execute
+        :context: Context passed to every stage. Results of finished stages are
+                  exposed to downstream stages under context["stage_results"].
+        :execute: Callable running a single stage, defaults to stage.execute
+        :completed: Results of stages finished by an earlier run; they are not
+                    executed again and their results are fed to downstream stages
+        :return: Results keyed by stage name, in plan order. No new stages are
+                 started once a stage has failed.
+        """
+        progress = _Progress(plan, context, completed)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers,
+                                thread_name_prefix="pulsar-stage") as pool:
+            running: dict[Future, str] = {}
+
+            while True:
+                while (name := progress.next_ready()) is not None:
+                    running[pool.submit(progress.execute, execute, plan.stages[name])] = name
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = StageResult(name, StageStatus.FAILED, error=e)
+                    progress.finish(name, result)
+
+        return progress.ordered_results()
+
+    async def run_async(self,
+                        plan: ExecutionPlan,
+                        context: dict[str, Any],
+                        execute: StageExecutor = _execute,
+                        execute_async: AsyncStageExecutor = _execute_async,
+                        completed: Optional[dict[str, StageResult]] = None) -> dict[str, StageResult]:
+        """
+        Execute a plan on the running event loop
+        Stages providing execute_async are awaited directly, so any number of them
+        can wait on I/O at once. Synchronous stages are bridged onto the thread pool.
+        :plan: Compiled plan to execute
+        :context: Context passed to every stage
+        :execute: Callable running a single synchronous stage
+        :execute_async: Coroutine function running a single asynchronous stage
+        :completed: Results of stages finished by an earlier run
+        :return: Results keyed by stage name, in plan order
+        """
+        loop = asyncio.get_running_loop()
+        progress = _Progress(plan, context, completed)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers,
+                                thread_name_prefix="pulsar-stage") as pool:
+            running: dict[asyncio.Future, str] = {}
+
+            while True:
+                while (name := progress.next_ready()) is not None:
+                    stage = plan.stages[name]
+                    if hasattr(stage, "execute_async"):
+                        future = asyncio.ensure_future(progress.execute_async(execute_async, stage))
+                    else:
+                        future = loop.run_in_executor(pool, progress.execute, execute, stage)
+                    running[future] = name
+
+                if not running:
+                    break
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = StageResult(name, StageStatus.FAILED, error=e)
+                    progress.finish(name, result)
+
+        return progress.ordered_results()
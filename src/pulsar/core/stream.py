@@ -0,0 +1,84 @@
+# pulsar/core/stream.py
+import queue
+import threading
+from typing import Any, Callable, Iterator, Optional
+
+DEFAULT_STREAM_BUFFER = 1024
+
+
+class StageStream:
+    """
+    Bounded stream of the records a generator stage yields
+    A background thread pulls records from the generator into a bounded queue,
+    so the producing stage runs ahead of its consumer by at most maxsize
+    records and peak memory stays constant. A stream has a single consumer.
+    """
+
+    _END = object()
+
+    def __init__(self,
+                 source: Iterator[Any],
+                 maxsize: int = DEFAULT_STREAM_BUFFER,
+                 on_close: Optional[Callable[[Optional[Exception]], None]] = None,
+                 name: str = "stream"):
+        """
+        :source: Generator producing the records
+        :maxsize: Number of records buffered between producer and consumer
+        :on_close: Called from the pump thread once the source is exhausted or
+                   has failed, with the error or None. An exception raised by
+                   it becomes the stream's error.
+        :name: Name used for the pump thread
+        """
+        self.name = name
+        self.error: Optional[Exception] = None
+        self.count = 0
+        self._source = source
+        self._on_close = on_close
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self._finished = threading.Event()
+        self._thread = threading.Thread(target=self._pump, name=f"pulsar-stream-{name}", daemon=True)
+        self._thread.start()
+
+    def _pump(self) -> None:
+        try:
+            for record in self._source:
+                self._queue.put(record)
+                self.count += 1
+        except Exception as e:
+            self.error = e
+        finally:
+            self._queue.put(self._END)
+            try:
+                if self._on_close:
+                    self._on_close(self.error)
+            except Exception as e:
+                self.error = self.error or e
+            finally:
+                self._finished.set()
+
+    def __iter__(self) -> Iterator[Any]:
+        while True:
+            record = self._queue.get()
+            if record is self._END:
+                # Leave the marker for join() and any later iteration
+                self._queue.put(self._END)
+                if self.error:
+                    raise self.error
+                return
+            yield record
+
+    @property
+    def done(self) -> bool:
+        """Whether the source has been exhausted and the stream closed"""
+        return self._finished.is_set()
+
+    def join(self) -> Optional[Exception]:
+        """
+        Discard unconsumed records and wait for the source to finish
+        :return: The error raised by the source, if any
+        """
+        while self._queue.get() is not self._END:
+            pass
+        self._queue.put(self._END)
+        self._finished.wait()
+        return self.error
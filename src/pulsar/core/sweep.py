@@ -0,0 +1,275 @@
+# pulsar/core/sweep.py
+import itertools
+import multiprocessing
+import pickle
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator, Optional, Union
+
+from pulsar.core.executors import picklable_context
+from pulsar.core.models import StageResult, StageStatus
+
+SWEEP_MODES = ("thread", "process")
+
+Grid = Union[dict[str, Any], list[dict[str, Any]]]
+
+
+def expand_grid(grid: Grid) -> list[dict[str, Any]]:
+    """
+    Expand a parameter grid into the list of parameter combinations
+    :grid: Either a dict mapping each parameter to a list of values (scalars
+           are treated as a single value), or an explicit list of combinations
+    :return: One dict of testcase parameters per combination
+    """
+    if isinstance(grid, list):
+        return [dict(point) for point in grid]
+
+    names = list(grid)
+    values = [value if isinstance(value, (list, tuple)) else [value] for value in grid.values()]
+    return [dict(zip(names, combination)) for combination in itertools.product(*values)]
+
+
+@dataclass
+class SweepPoint:
+    """Outcome of running the workflow for one parameter combination"""
+    index: int
+    params: dict[str, Any]
+    result: StageResult
+    elapsed: float
+    # What the stages recorded into their metrics dependency during this point only
+    metrics: Optional[Any] = None
+
+
+@dataclass
+class SweepSummary:
+    """Aggregated metrics over the points of a sweep"""
+    points: int = 0
+    completed: int = 0
+    failed: int = 0
+    wall_time: float = 0.0
+    point_times: list[float] = field(default_factory=list)
+    # Metrics of every point merged, None if the stages have no metrics dependency
+    metrics: Optional[Any] = None
+
+    @property
+    def points_per_second(self) -> float:
+        return self.points / self.wall_time if self.wall_time else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        times = self.point_times or [0.0]
+        summary = {
+            "points": self.points,
+            "completed": self.completed,
+            "failed": self.failed,
+            "wall_time": self.wall_time,
+            "points_per_second": self.points_per_second,
+            "min_point_time": min(times),
+            "mean_point_time": statistics.fmean(times),
+            "max_point_time": max(times),
+        }
+        if self.metrics is not None:
+            summary["metrics"] = self.metrics.registry.snapshot()
+            if hasattr(self.metrics, "latency_summary"):
+                summary["latency"] = self.metrics.latency_summary()
+        return summary
+
+
+StageDependencies = list[tuple[type, dict[str, Any]]]
+
+
+def _stages(workflow: Any) -> Iterator[Any]:
+    """Every stage of a workflow, including those of nested workflows"""
+    for stage in workflow.plan.stages.values():
+        yield stage
+        if hasattr(stage, "plan"):
+            yield from _stages(stage)
+
+
+def _isolate(workflow: Any, stage_dependencies: StageDependencies) -> tuple[Any, StageDependencies]:
+    """
+    Copy a workflow and its stages' dependencies for a sweep thread
+    Stages keep their dependencies and connection state on their class, so
+    every stage of the copy is moved to a private subclass: set_dependencies()
+    and flags such as _producer_connected then only reach this copy.
+    """
+    workflow, stage_dependencies = pickle.loads(pickle.dumps((workflow, stage_dependencies)))
+    subclasses: dict[type, type] = {}
+    for stage in _stages(workflow):
+        stage_class = type(stage)
+        if stage_class not in subclasses:
+            # The copied dependencies start disconnected, whatever the original stage's state
+            state = {name: False for klass in stage_class.__mro__ for name, value in vars(klass).items()
+                     if name.endswith("_connected") and isinstance(value, bool)}
+            subclasses[stage_class] = type(stage_class.__name__, (stage_class,), {
+                "__module__": stage_class.__module__,
+                "__qualname__": stage_class.__qualname__,
+                **state,
+            })
+        stage.__class__ = subclasses[stage_class]
+    return workflow, [(subclasses.get(stage_class, stage_class), dependencies)
+                      for stage_class, dependencies in stage_dependencies]
+
+
+def _run_point(workflow: Any,
+               stage_dependencies: StageDependencies,
+               context: dict[str, Any],
+               params: dict[str, Any]) -> tuple[StageResult, float, Optional[Any]]:
+    """
+    Run the workflow for one combination, recording into fresh shards of its metrics
+    :return: The workflow's result, its run time and what it recorded into its metrics
+    """
+    shards: dict[int, Any] = {}
+    for stage_class, dependencies in stage_dependencies:
+        metrics = dependencies.get("metrics")
+        if metrics is not None and hasattr(metrics, "shard"):
+            if id(metrics) not in shards:
+                shards[id(metrics)] = metrics.shard()
+            dependencies = {**dependencies, "metrics": shards[id(metrics)]}
+        stage_class.set_dependencies(**dependencies)
+
+    start = time.perf_counter()
+    result = workflow.execute({**context, "testcase_params": params})
+    elapsed = time.perf_counter() - start
+
+    recorded = None
+    for shard in shards.values():
+        if recorded is None:
+            recorded = shard
+        else:
+            recorded.merge(shard)
+    return result, elapsed, recorded
+
+
+# Workflow owned by a sweep worker process and its stages' dependencies, set once by _init_worker
+_worker_workflow = None
+_worker_dependencies: StageDependencies = []
+
+
+def _init_worker(workflow: Any,
+                 stage_dependencies: StageDependencies,
+                 initializer: Optional[Callable[[], None]]) -> None:
+    """Process pool initializer: restore the workflow and its stages' dependencies"""
+    global _worker_workflow, _worker_dependencies
+    _worker_workflow = workflow
+    for stage_class, dependencies in stage_dependencies:
+        stage_class.set_dependencies(**dependencies)
+    if initializer:
+        initializer()
+    # The initializer may have replaced the dependencies
+    _worker_dependencies = [(stage_class, stage_class.get_deps()) for stage_class, _ in stage_dependencies]
+
+
+def _run_in_worker(params: dict[str, Any], context: dict[str, Any]) -> tuple[StageResult, float, Optional[Any]]:
+    result, elapsed, metrics = _run_point(_worker_workflow, _worker_dependencies, context, params)
+    if result.error is not None:
+        # Pulsar exceptions take extra constructor arguments and cannot be unpickled
+        try:
+            pickle.loads(pickle.dumps(result.error))
+        except Exception:
+            result.error = RuntimeError(str(result.error))
+    return result, elapsed, metrics
+
+
+class SweepRun:
+    """
+    Runs independent copies of a workflow over a parameter grid
+    Iterating yields a SweepPoint per combination as soon as it finishes;
+    summary aggregates the points seen so far.
+    """
+
+    def __init__(self,
+                 workflow: Any,
+                 grid: Grid,
+                 workers: Optional[int] = None,
+                 mode: str = "thread",
+                 context: Optional[dict[str, Any]] = None,
+                 initializer: Optional[Callable[[], None]] = None):
+        """
+        :workflow: Workflow (CompositeStage) to run for every combination
+        :grid: Parameter grid, see expand_grid()
+        :workers: Number of combinations running at the same time
+        :mode: "thread" runs combinations on threads, "process" in worker
+               processes; either way, every worker has its own copy of the
+               workflow and of the stage dependencies, so the workflow and its
+               dependencies must be picklable. Process mode also runs stages
+               that hold the GIL in parallel.
+        :context: Base context; "testcase_params" is replaced per combination.
+                  In process mode only its picklable entries are shipped.
+        :initializer: Process mode only, picklable callable run once in each
+                      worker, e.g. to create fresh dependencies
+        """
+        if mode not in SWEEP_MODES:
+            raise ValueError(f"Unknown sweep mode '{mode}', expected one of {SWEEP_MODES}")
+        self.workflow = workflow
+        self.points = expand_grid(grid)
+        self.workers = workers
+        self.mode = mode
+        self.context = context or {}
+        self.initializer = initializer
+        self.summary = SweepSummary()
+        self._local = threading.local()
+
+    def _record(self, point: SweepPoint) -> SweepPoint:
+        self.summary.points += 1
+        self.summary.point_times.append(point.elapsed)
+        if point.metrics is not None:
+            if self.summary.metrics is None:
+                self.summary.metrics = point.metrics.shard()
+            self.summary.metrics.merge(point.metrics)
+        if point.result.status == StageStatus.FAILED:
+            self.summary.failed += 1
+        else:
+            self.summary.completed += 1
+        return point
+
+    def _run_thread(self, params: dict[str, Any]) -> tuple[StageResult, float, Optional[Any]]:
+        isolated = getattr(self._local, "isolated", None)
+        if isolated is None:
+            isolated = self._local.isolated = _isolate(self.workflow, self._stage_dependencies())
+        workflow, stage_dependencies = isolated
+        return _run_point(workflow, stage_dependencies, self.context, params)
+
+    def _stage_dependencies(self) -> StageDependencies:
+        """Snapshot the class-level dependencies of every stage in the workflow"""
+        snapshot = {}
+        for stage in _stages(self.workflow):
+            if hasattr(stage, "get_deps"):
+                snapshot[type(stage)] = stage.get_deps()
+        return list(snapshot.items())
+
+    def _executor(self):
+        if self.mode == "thread":
+            return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pulsar-sweep")
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.workflow, self._stage_dependencies(), self.initializer)
+        )
+
+    def __iter__(self) -> Iterator[SweepPoint]:
+        start = time.perf_counter()
+        with self._executor() as pool:
+            if self.mode == "thread":
+                futures = {pool.submit(self._run_thread, params): i for i, params in enumerate(self.points)}
+            else:
+                context = picklable_context(self.context)
+                futures = {pool.submit(_run_in_worker, params, context): i for i, params in enumerate(self.points)}
+
+            for future in as_completed(futures):
+                index = futures[future]
+                params = self.points[index]
+                try:
+                    result, elapsed, metrics = future.result()
+                except Exception as e:
+                    result = StageResult(self.workflow.name, StageStatus.FAILED, error=e)
+                    elapsed, metrics = 0.0, None
+                self.summary.wall_time = time.perf_counter() - start
+                yield self._record(SweepPoint(index, params, result, elapsed, metrics))
+
+    def run(self) -> list[SweepPoint]:
+        """Run the whole sweep and return its points in grid order"""
+        return sorted(self, key=lambda point: point.index)
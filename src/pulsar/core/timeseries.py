@@ -0,0 +1,367 @@
+# pulsar/core/timeseries.py
+import threading
+import time
+from array import array
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+# Events buffered before they are folded into the interval columns
+STAGING_SIZE = 65536
+
+
+class TimeSeriesStore:
+    """
+    Columnar store bucketing sends, bytes and latency samples into fixed intervals
+    Recording only appends to flat staging arrays; events are folded into the
+    per-interval NumPy columns in vectorized batches. Latencies are kept per
+    interval as counts over log-spaced buckets, so windowed percentiles are
+    computed without keeping every sample; only non-zero buckets are stored.
+    A store is meant to be written by one thread and may be read from others
+    meanwhile; merge() stores recorded by other threads or processes.
+    """
+
+    def __init__(self,
+                 interval: float = 0.1,
+                 latency_growth: float = 1.05,
+                 latency_range: tuple[float, float] = (0.001, 100_000.0),
+                 clock: Callable[[], float] = time.monotonic,
+                 start: Optional[float] = None):
+        """
+        :interval: Width of an interval in seconds
+        :latency_growth: Ratio between consecutive latency bucket edges, i.e.
+                         the relative precision of the percentiles
+        :latency_range: Smallest and largest latency in milliseconds told apart
+        :clock: Clock the timestamps are read from, in seconds
+        :start: Time of the first interval, defaults to the first recorded event
+        """
+        self.interval = interval
+        self.latency_growth = latency_growth
+        self.latency_range = latency_range
+        self.clock = clock
+        self.start = start
+        self._log_low = np.log(latency_range[0])
+        self._log_growth = np.log(latency_growth)
+        self.latency_edges = latency_range[0] * latency_growth ** np.arange(
+            int(np.ceil(np.log(latency_range[1] / latency_range[0]) / self._log_growth)) + 1
+        )
+
+        self._length = 0
+        self._sends = np.zeros(0, dtype=np.int64)
+        self._bytes = np.zeros(0, dtype=np.int64)
+        # Non-zero latency buckets: sorted keys interval * buckets + bucket, and their counts
+        self._latency_keys = np.zeros(0, dtype=np.int64)
+        self._latency_counts = np.zeros(0, dtype=np.int64)
+        self._latency_sum = np.zeros(0, dtype=np.float64)
+        # Held while staging arrays are appended to or folded, so other threads can read
+        self._lock = threading.Lock()
+        self._reset_staging()
+
+    def _reset_staging(self) -> None:
+        self._send_times = array("d")
+        self._send_counts = array("q")
+        self._send_bytes = array("q")
+        self._latency_times = array("d")
+        self._latency_values = array("d")
+
+    def record_send(self, count: int = 1, nbytes: int = 0, timestamp: Optional[float] = None) -> None:
+        """
+        Record messages sent
+        :count: Number of messages
+        :nbytes: Total size of the messages
+        :timestamp: Time of the send, defaults to now
+        """
+        timestamp = self.clock() if timestamp is None else timestamp
+        with self._lock:
+            self._send_times.append(timestamp)
+            self._send_counts.append(count)
+            self._send_bytes.append(nbytes)
+            if len(self._send_times) >= STAGING_SIZE:
+                self._flush()
+
+    def record_latency(self, latency: float, timestamp: Optional[float] = None) -> None:
+        """
+        Record a latency sample
+        :latency: Latency in milliseconds
+        :timestamp: Time the sample completed, defaults to now
+        """
+        timestamp = self.clock() if timestamp is None else timestamp
+        with self._lock:
+            self._latency_times.append(timestamp)
+            self._latency_values.append(latency)
+            if len(self._latency_times) >= STAGING_SIZE:
+                self._flush()
+
+    def _grow(self, length: int) -> None:
+        """Make room for length intervals, doubling the columns' capacity"""
+        if length > len(self._sends):
+            capacity = max(length, 2 * len(self._sends), 64)
+            extra = capacity - len(self._sends)
+            self._sends = np.concatenate([self._sends, np.zeros(extra, dtype=np.int64)])
+            self._bytes = np.concatenate([self._bytes, np.zeros(extra, dtype=np.int64)])
+            self._latency_sum = np.concatenate([self._latency_sum, np.zeros(extra, dtype=np.float64)])
+        self._length = max(self._length, length)
+
+    def _intervals(self, times: np.ndarray) -> np.ndarray:
+        indexes = np.floor((times - self.start) / self.interval).astype(np.int64)
+        return np.maximum(indexes, 0)
+
+    def _latency_buckets(self, latencies: np.ndarray) -> np.ndarray:
+        buckets = np.ceil((np.log(np.maximum(latencies, self.latency_range[0])) - self._log_low) / self._log_growth)
+        return np.clip(buckets, 0, len(self.latency_edges) - 1).astype(np.int64)
+
+    def _add_latency(self, keys: np.ndarray, counts: np.ndarray) -> None:
+        """Add counts to latency buckets by key, keeping the keys sorted and unique"""
+        keys, inverse = np.unique(np.concatenate([self._latency_keys, keys]), return_inverse=True)
+        totals = np.zeros(len(keys), dtype=np.int64)
+        np.add.at(totals, inverse.reshape(-1), np.concatenate([self._latency_counts, counts]))
+        self._latency_keys, self._latency_counts = keys, totals
+
+    def flush(self) -> None:
+        """Fold the staged events into the interval columns"""
+        with self._lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        """flush() with the lock held"""
+        send_times = np.frombuffer(self._send_times, dtype=np.float64)
+        send_counts = np.frombuffer(self._send_counts, dtype=np.int64)
+        send_bytes = np.frombuffer(self._send_bytes, dtype=np.int64)
+        latency_times = np.frombuffer(self._latency_times, dtype=np.float64)
+        latency_values = np.frombuffer(self._latency_values, dtype=np.float64)
+        if not len(send_times) and not len(latency_times):
+            return
+        if self.start is None:
+            self.start = float(min(np.concatenate([send_times, latency_times])))
+
+        if len(send_times):
+            indexes = self._intervals(send_times)
+            self._grow(int(indexes.max()) + 1)
+            np.add.at(self._sends, indexes, send_counts)
+            np.add.at(self._bytes, indexes, send_bytes)
+        if len(latency_times):
+            indexes = self._intervals(latency_times)
+            self._grow(int(indexes.max()) + 1)
+            keys = indexes * len(self.latency_edges) + self._latency_buckets(latency_values)
+            self._add_latency(keys, np.ones(len(keys), dtype=np.int64))
+            np.add.at(self._latency_sum, indexes, latency_values)
+        # The views above must be released before the staging arrays are replaced
+        del send_times, send_counts, send_bytes, latency_times, latency_values
+        self._reset_staging()
+
+    @property
+    def times(self) -> np.ndarray:
+        """Start of every interval, in seconds since the first one"""
+        with self._lock:
+            self._flush()
+            return np.arange(self._length) * self.interval
+
+    @property
+    def sends(self) -> np.ndarray:
+        """Messages sent per interval"""
+        with self._lock:
+            self._flush()
+            return self._sends[:self._length].copy()
+
+    @property
+    def bytes(self) -> np.ndarray:
+        """Bytes sent per interval"""
+        with self._lock:
+            self._flush()
+            return self._bytes[:self._length].copy()
+
+    @property
+    def latency_counts(self) -> np.ndarray:
+        """
+        Latency samples per interval and bucket, shape (intervals, buckets)
+        Expanded from the non-zero buckets on every read, for export; the
+        windowed statistics work on the sparse buckets instead.
+        """
+        with self._lock:
+            self._flush()
+            counts = np.zeros((self._length, len(self.latency_edges)), dtype=np.int64)
+            counts.reshape(-1)[self._latency_keys] = self._latency_counts
+            return counts
+
+    def _latency_columns(self) -> tuple[np.ndarray, np.ndarray]:
+        """Latency samples and their sum per interval"""
+        with self._lock:
+            self._flush()
+            samples = np.bincount(self._latency_keys // len(self.latency_edges),
+                                  weights=self._latency_counts, minlength=self._length)
+            return samples, self._latency_sum[:self._length].copy()
+
+    def _windowed(self, values: np.ndarray, window: int) -> np.ndarray:
+        """Sum of values over a trailing window of intervals, along the first axis"""
+        if window < 1:
+            raise ValueError(f"window must be at least 1 interval, got {window}")
+        totals = np.cumsum(values, axis=0)
+        totals[window:] = totals[window:] - totals[:-window]
+        return totals
+
+    def rate(self, window: int = 1) -> np.ndarray:
+        """Messages per second over a trailing window of intervals"""
+        return self._windowed(self.sends, window) / (self.interval * np.minimum(np.arange(1, self._length + 1), window))
+
+    def byte_rate(self, window: int = 1) -> np.ndarray:
+        """Bytes per second over a trailing window of intervals"""
+        return self._windowed(self.bytes, window) / (self.interval * np.minimum(np.arange(1, self._length + 1), window))
+
+    def latency_mean(self, window: int = 1) -> np.ndarray:
+        """Mean latency in milliseconds over a trailing window of intervals, NaN where no samples completed"""
+        samples, sums = self._latency_columns()
+        counts = self._windowed(samples, window)
+        sums = self._windowed(sums, window)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(counts > 0, sums / counts, np.nan)
+
+    def rolling_percentile(self, percentile: float, window: int = 10) -> np.ndarray:
+        """
+        Latency percentile over a trailing window of intervals
+        :percentile: Percentile between 0 and 100
+        :window: Number of intervals per window
+        :return: Upper edge of the bucket holding the percentile, in
+                 milliseconds, per interval; NaN where the window has no samples
+        """
+        if window < 1:
+            raise ValueError(f"window must be at least 1 interval, got {window}")
+        nbuckets = len(self.latency_edges)
+        with self._lock:
+            self._flush()
+            length = self._length
+            intervals, buckets = np.divmod(self._latency_keys, nbuckets)
+            counts = self._latency_counts.copy()
+
+        # Every non-zero bucket counts towards the windows ending in the next window intervals;
+        # the windowed counts stay sparse, keyed like the store by interval and bucket
+        ends = (intervals[:, None] + np.arange(window)).reshape(-1)
+        keep = ends < length
+        keys = ends[keep] * nbuckets + np.repeat(buckets, window)[keep]
+        keys, inverse = np.unique(keys, return_inverse=True)
+        windowed = np.zeros(len(keys), dtype=np.int64)
+        np.add.at(windowed, inverse, np.repeat(counts, window)[keep])
+        ends, buckets = np.divmod(keys, nbuckets)
+
+        # Cumulative counts within each window, then the first bucket reaching the target rank
+        totals = np.bincount(ends, weights=windowed, minlength=length)
+        cumulative = np.cumsum(windowed)
+        cumulative -= (cumulative - windowed)[np.searchsorted(ends, ends)]
+        targets = np.maximum(np.ceil(percentile / 100.0 * totals), 1)
+        reached = np.flatnonzero(cumulative >= targets[ends])
+        found, first = np.unique(ends[reached], return_index=True)
+
+        result = np.full(length, np.nan)
+        result[found] = self.latency_edges[buckets[reached[first]]]
+        return result
+
+    def stalls(self, threshold: float = 0.1, window: int = 1) -> np.ndarray:
+        """
+        Find intervals where throughput collapsed, e.g. GC pauses or broker throttling
+        :threshold: Fraction of the median non-zero rate below which an interval counts as stalled
+        :window: Smoothing window passed to rate()
+        :return: Start times, in seconds, of the stalled intervals between the first and last send
+        """
+        rate = self.rate(window)
+        active = np.flatnonzero(self.sends)
+        if not len(active):
+            return np.zeros(0)
+        first, last = active[0], active[-1]
+        median = np.median(rate[first:last + 1][rate[first:last + 1] > 0])
+        stalled = np.flatnonzero(rate[first:last + 1] < threshold * median) + first
+        return stalled * self.interval
+
+    def merge(self, other: "TimeSeriesStore") -> "TimeSeriesStore":
+        """
+        Add the intervals of another store with the same interval and buckets
+        Intervals are aligned on the stores' start times, which must come from
+        the same clock, e.g. time.monotonic in threads or processes of one host.
+        :return: self, to chain merges
+        """
+        if other.interval != self.interval or len(other.latency_edges) != len(self.latency_edges):
+            raise ValueError("Cannot merge time series with different intervals or latency buckets")
+        with other._lock:
+            other._flush()
+            start, length = other.start, other._length
+            sends, nbytes = other._sends[:length].copy(), other._bytes[:length].copy()
+            keys, counts = other._latency_keys.copy(), other._latency_counts.copy()
+            sums = other._latency_sum[:length].copy()
+        if start is None:
+            return self
+
+        with self._lock:
+            self._flush()
+            if self.start is None:
+                self.start = start
+            elif start < self.start:
+                shift = int(round((self.start - start) / self.interval))
+                self._shift(shift)
+                self.start -= shift * self.interval
+            offset = int(round((start - self.start) / self.interval))
+
+            self._grow(offset + length)
+            end = offset + length
+            self._sends[offset:end] += sends
+            self._bytes[offset:end] += nbytes
+            self._latency_sum[offset:end] += sums
+            self._add_latency(keys + offset * len(self.latency_edges), counts)
+        return self
+
+    def _shift(self, shift: int) -> None:
+        """Move every interval later by shift intervals"""
+        length = self._length
+        self._grow(length + shift)
+        for column in (self._sends, self._bytes, self._latency_sum):
+            column[shift:length + shift] = column[:length].copy()
+            column[:shift] = 0
+        self._latency_keys = self._latency_keys + shift * len(self.latency_edges)
+
+    def __getstate__(self) -> dict[str, Any]:
+        self.flush()
+        state = self.__dict__.copy()
+        for name in ("_send_times", "_send_counts", "_send_bytes", "_latency_times", "_latency_values", "_lock"):
+            del state[name]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self._reset_staging()
+
+    def save(self, path: str) -> None:
+        """Save the store as a compressed .npz archive"""
+        with self._lock:
+            self._flush()
+            np.savez_compressed(
+                path,
+                config=np.array([self.interval, self.latency_growth, *self.latency_range,
+                                 np.nan if self.start is None else self.start]),
+                sends=self._sends[:self._length],
+                bytes=self._bytes[:self._length],
+                latency_keys=self._latency_keys,
+                latency_counts=self._latency_counts,
+                latency_sum=self._latency_sum[:self._length],
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "TimeSeriesStore":
+        """Load a store written by save()"""
+        with np.load(path) as data:
+            interval, growth, low, high, start = data["config"].tolist()
+            store = cls(interval, growth, (low, high), start=None if np.isnan(start) else start)
+            store._length = len(data["sends"])
+            store._sends = data["sends"].copy()
+            store._bytes = data["bytes"].copy()
+            store._latency_keys = data["latency_keys"].copy()
+            store._latency_counts = data["latency_counts"].copy()
+            store._latency_sum = data["latency_sum"].copy()
+        return store
+
+    def to_dict(self) -> dict[str, list[float]]:
+        """Per-interval columns as plain lists, e.g. for a JSON report"""
+        return {
+            "time": self.times.tolist(),
+            "sends": self.sends.tolist(),
+            "bytes": self.bytes.tolist(),
+            "rate": self.rate().tolist(),
+            "latency_mean": self.latency_mean().tolist(),
+        }
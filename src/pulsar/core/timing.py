@@ -0,0 +1,169 @@
+# pulsar/core/timing.py
+import json
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from pulsar.core.models import StageResult, StageTimings
+from pulsar.core.plan import ExecutionPlan
+
+# Phases reported for every stage, as (name, first timestamp, last timestamp)
+PHASES = (
+    ("queued", "ready", "start"),
+    ("setup", "start", "setup_end"),
+    ("run", "setup_end", "run_end"),
+    ("teardown", "run_end", "end"),
+)
+
+
+@dataclass
+class StageSpan:
+    """Timing of one stage, in nanoseconds relative to the start of the workflow"""
+    stage_name: str
+    start: int
+    end: int
+    queue_delay: Optional[int]
+    setup: Optional[int]
+    run: Optional[int]
+    teardown: Optional[int]
+
+    @property
+    def duration(self) -> int:
+        return self.end - self.start
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "stage": self.stage_name,
+            "start_ns": self.start,
+            "end_ns": self.end,
+            "duration_ns": self.duration,
+            "queue_delay_ns": self.queue_delay,
+            "setup_ns": self.setup,
+            "run_ns": self.run,
+            "teardown_ns": self.teardown,
+        }
+
+
+class TimingReport:
+    """
+    Per-stage spans of a workflow run and the critical path through its DAG
+    The critical path is walked back from the stage that finished last, each
+    time following the dependency that finished last, i.e. the one that
+    actually held the stage back.
+    """
+
+    def __init__(self, plan: ExecutionPlan, results: dict[str, StageResult]):
+        """
+        :plan: Plan the workflow ran
+        :results: Stage results produced by the scheduler; stages without
+                  timings, e.g. restored from a checkpoint, are left out
+        """
+        self._timings: dict[str, StageTimings] = {
+            name: result.timings for name, result in results.items()
+            if result.timings is not None and result.timings.start is not None
+            and result.timings.end is not None
+        }
+        starts = [t.ready if t.ready is not None else t.start for t in self._timings.values()]
+        self.origin = min(starts) if starts else 0
+        self.spans = [self._span(name, self._timings[name]) for name in plan.order if name in self._timings]
+        self.critical_path = self._critical_path(plan)
+
+    def _span(self, name: str, timings: StageTimings) -> StageSpan:
+        return StageSpan(
+            stage_name=name,
+            start=timings.start - self.origin,
+            end=timings.end - self.origin,
+            queue_delay=timings.queue_delay,
+            setup=timings.setup,
+            run=timings.run,
+            teardown=timings.teardown,
+        )
+
+    def _critical_path(self, plan: ExecutionPlan) -> list[str]:
+        if not self._timings:
+            return []
+        name = max(self._timings, key=lambda n: self._timings[n].end)
+        path = [name]
+        while True:
+            deps = [dep for dep in plan.dependencies[name] if dep in self._timings]
+            if not deps:
+                break
+            name = max(deps, key=lambda n: self._timings[n].end)
+            path.append(name)
+        path.reverse()
+        return path
+
+    @property
+    def wall_time(self) -> int:
+        """Nanoseconds from the first stage becoming ready to the last one finishing"""
+        return max((span.end for span in self.spans), default=0)
+
+    @property
+    def critical_path_time(self) -> int:
+        """Nanoseconds spent in the stages on the critical path, excluding queueing"""
+        spans = {span.stage_name: span for span in self.spans}
+        return sum(spans[name].duration for name in self.critical_path)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "wall_time_ns": self.wall_time,
+            "critical_path": self.critical_path,
+            "critical_path_ns": self.critical_path_time,
+            "stages": [span.to_dict() for span in self.spans],
+        }
+
+    def to_text(self) -> str:
+        """Render the spans as a table, marking stages on the critical path with *"""
+        def ms(value: Optional[int]) -> str:
+            return "-" if value is None else f"{value / 1e6:.3f}"
+
+        width = max([len(span.stage_name) for span in self.spans] + [5])
+        lines = [
+            f"  {'stage':<{width}} {'start':>10} {'span':>10} {'queued':>10} "
+            f"{'setup':>10} {'run':>10} {'teardown':>10}  (ms)"
+        ]
+        for span in self.spans:
+            marker = "*" if span.stage_name in self.critical_path else " "
+            lines.append(
+                f"{marker} {span.stage_name:<{width}} {ms(span.start):>10} {ms(span.duration):>10} "
+                f"{ms(span.queue_delay):>10} {ms(span.setup):>10} {ms(span.run):>10} {ms(span.teardown):>10}"
+            )
+        lines.append(f"Critical path: {' -> '.join(self.critical_path)} ({ms(self.critical_path_time)} ms "
+                     f"of {ms(self.wall_time)} ms wall time)")
+        return "\n".join(lines)
+
+    def to_chrome_trace(self, process_name: str = "workflow") -> dict[str, Any]:
+        """
+        Export the spans as Chrome trace-event JSON (chrome://tracing, Perfetto)
+        Every stage gets its own track holding its span and one event per phase.
+        """
+        events: list[dict[str, Any]] = [
+            {"name": "process_name", "ph": "M", "pid": 1, "args": {"name": process_name}}
+        ]
+        for tid, span in enumerate(self.spans, start=1):
+            timings = self._timings[span.stage_name]
+            events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": tid,
+                           "args": {"name": span.stage_name}})
+            events.append({
+                "name": span.stage_name,
+                "cat": "critical" if span.stage_name in self.critical_path else "stage",
+                "ph": "X", "pid": 1, "tid": tid,
+                "ts": span.start / 1e3,
+                "dur": span.duration / 1e3,
+            })
+            for phase, first, last in PHASES:
+                first, last = getattr(timings, first), getattr(timings, last)
+                if first is None or last is None:
+                    continue
+                events.append({
+                    "name": phase,
+                    "cat": "phase",
+                    "ph": "X", "pid": 1, "tid": tid,
+                    "ts": (first - self.origin) / 1e3,
+                    "dur": (last - first) / 1e3,
+                })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path: str, process_name: str = "workflow") -> None:
+        """Write the Chrome trace-event JSON to a file"""
+        with open(path, "w") as f:
+            json.dump(self.to_chrome_trace(process_name), f)
@@ -1,12 +1,16 @@
 # pulsar/stages/base_stage.py
+import inspect
+import time
 from typing import Any, Optional
 from abc import ABC, abstractmethod
 from rich import print as rprint
 
 from pulsar.core.exceptions import PulsarStageDependencyError
-from pulsar.core.models import StageMetadata, StageStatus, StageResult
-from pulsar.core.exceptions import PulsarStageExecutionFailureError
-from pulsar.core.command import StageCommand
+from pulsar.core.models import StageMetadata, StageStatus, StageResult, StageTimings
+from pulsar.core.exceptions import PulsarStageConfigurationError, PulsarStageExecutionFailureError
+from pulsar.core.command import StageCommand, AsyncStageCommand
+from pulsar.core.executors import run_in_process
+from pulsar.core.stream import StageStream, DEFAULT_STREAM_BUFFER
 
 from testplan.common.entity.base import Runnable
 from testplan.testing.multitest.base import RuntimeEnvironment
@@ -111,6 +115,7 @@ class BaseStage(StageCommand):
 
     def execute(self, context: dict[str, Any]) -> StageResult:
         """Execute the stage with proper lifecycle"""
+        timings = StageTimings(start=time.monotonic_ns())
         self.status = StageStatus.RUNNING
 
         try:
@@ -118,24 +123,83 @@ class BaseStage(StageCommand):
             result = context.get("result", None)
 
             self.setup(env, result)
+            timings.setup_end = time.monotonic_ns()
             # Run stage logic
-            run_result = self.run(context)
+            run_result = self._run(context)
+            if inspect.isgenerator(run_result):
+                # Hand records to downstream stages while they are produced
+                return self._stream(run_result, env, result, timings)
+            timings.run_end = time.monotonic_ns()
             self.teardown(env, result)
+            timings.end = time.monotonic_ns()
             self.status = StageStatus.COMPLETED
 
             return StageResult(
                 self.name,
                 StageStatus.COMPLETED,
-                result=run_result
+                result=run_result,
+                timings=timings
             )
         except PulsarStageExecutionFailureError as e:
+            timings.end = time.monotonic_ns()
             self.status = StageStatus.FAILED
             return StageResult(
                 self.name,
                 StageStatus.FAILED,
-                error=e
+                error=e,
+                timings=timings
             )
 
+    def _stream(self,
+                records: Any,
+                env: Optional[Any],
+                result: Optional[Any],
+                timings: StageTimings) -> StageResult:
+        """
+        Wrap the generator returned by run() in a bounded StageStream
+        The result is returned straight away with status RUNNING so dependents
+        can consume the records while they are produced. Teardown and the final
+        status change happen once the generator is exhausted.
+        """
+        def close(error: Optional[Exception]) -> None:
+            timings.run_end = time.monotonic_ns()
+            try:
+                if error is None:
+                    self.teardown(env, result)
+            except Exception:
+                self.status = StageStatus.FAILED
+                raise
+            finally:
+                timings.end = time.monotonic_ns()
+            self.status = StageStatus.FAILED if error else StageStatus.COMPLETED
+
+        stream = StageStream(
+            records,
+            maxsize=self.metadata.get("stream_buffer", DEFAULT_STREAM_BUFFER),
+            on_close=close,
+            name=self.name
+        )
+        return StageResult(
+            self.name,
+            StageStatus.RUNNING,
+            result=stream,
+            timings=timings
+        )
+
+    def _run(self, context: dict[str, Any]) -> Any:
+        """
+        Run the stage logic according to its execution policy
+        Stages with metadata["executor"] == "process" run on the shared process
+        pool so CPU-bound work is not limited by the GIL.
+        :raises PulsarStageConfigurationError: If a process stage streams records from a generator
+        """
+        if self.metadata.get("executor") == "process":
+            if inspect.isgeneratorfunction(self.run):
+                # A generator cannot be pickled back from the worker
+                raise PulsarStageConfigurationError(self.name, "executor 'process' cannot stream from a generator run()")
+            return run_in_process(self, context)
+        return self.run(context)
+
     @abstractmethod
     def run(self, context: dict[str, Any]) -> Any:
         """ Implement stage-specific logic """
@@ -158,14 +222,15 @@ class BaseStage(StageCommand):
     def teardown(self, env: Optional[dict[str, Any]] = None, result: Optional[Any] = None) -> None:
         """Tear down the stage and clean up resources"""
 
-        if not isinstance(result, Result):
+        # env and result are absent when the stage runs outside testplan, e.g. in a sweep worker process
+        if result is not None and not isinstance(result, Result):
           
             print(type(result))
             raise PulsarStageExecutionFailureError(
                 stage_name=self.name,
                 error_message=f"Result object is not of type Result"
             )
-        if not isinstance(env, RuntimeEnvironment): # Runnable):
+        if env is not None and not isinstance(env, RuntimeEnvironment): # Runnable):
             print(type(env))
             raise PulsarStageExecutionFailureError(
                 stage_name=self.name,
@@ -190,4 +255,51 @@ class BaseStage(StageCommand):
 
     def _cleanup(self, env: Optional[dict[str, Any]] = None, result: Optional[Any] = None) -> None:
         """Override this method in subclasses to perform specific cleanup"""
-        pass
\ No newline at end of file
+        pass
+
+
+class AsyncBaseStage(BaseStage, AsyncStageCommand):
+    """Base class for Pulsar Stages whose run logic is a coroutine"""
+
+    def execute(self, context: dict[str, Any]) -> StageResult:
+        """Execute the stage on a new event loop in the calling thread"""
+        return AsyncStageCommand.execute(self, context)
+
+    async def execute_async(self, context: dict[str, Any]) -> StageResult:
+        """Execute the stage with proper lifecycle, awaiting the run coroutine"""
+        timings = StageTimings(start=time.monotonic_ns())
+        self.status = StageStatus.RUNNING
+
+        try:
+            env = context.get("env", None)
+            result = context.get("result", None)
+
+            self.setup(env, result)
+            timings.setup_end = time.monotonic_ns()
+            # Run stage logic without blocking the event loop
+            run_result = await self.run(context)
+            timings.run_end = time.monotonic_ns()
+            self.teardown(env, result)
+            timings.end = time.monotonic_ns()
+            self.status = StageStatus.COMPLETED
+
+            return StageResult(
+                self.name,
+                StageStatus.COMPLETED,
+                result=run_result,
+                timings=timings
+            )
+        except PulsarStageExecutionFailureError as e:
+            timings.end = time.monotonic_ns()
+            self.status = StageStatus.FAILED
+            return StageResult(
+                self.name,
+                StageStatus.FAILED,
+                error=e,
+                timings=timings
+            )
+
+    @abstractmethod
+    async def run(self, context: dict[str, Any]) -> Any:
+        """ Implement stage-specific asynchronous logic """
+        pass
@@ -0,0 +1,393 @@
+# pulsar/stages/consume_messages.py
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
+
+from rich import print as rprint
+
+from pulsar.stages.base_stage import BaseStage
+from pulsar.core.dependencies import Consumer
+from pulsar.core.exceptions import PulsarStageInvalidParameterError
+from pulsar.core.histogram import LatencyHistogram
+from pulsar.core.latency import EndToEndRecorder
+from pulsar.core.metrics import Counter
+
+RECEIVE_MODES = ("single", "batch")
+
+ACK_MODES = ("individual", "cumulative", "batched")
+
+
+class _Subscription:
+    """Progress shared by the consumers of one run: the messages left to receive and the backlog drain"""
+
+    def __init__(self, num_messages: Optional[int], backlog: int, clock):
+        self.remaining = num_messages
+        self.backlog = backlog
+        self.received = 0
+        self.drained_at: Optional[float] = None
+        self.last_received: Optional[float] = None
+        self.clock = clock
+        self._lock = threading.Lock()
+
+    def reserve(self, count: int) -> int:
+        """Claim up to count messages to receive, 0 once num_messages were claimed"""
+        if self.remaining is None:
+            return count
+        with self._lock:
+            count = min(count, self.remaining)
+            self.remaining -= count
+            return count
+
+    def release(self, count: int) -> None:
+        """Give back claimed messages that did not arrive"""
+        if self.remaining is not None and count:
+            with self._lock:
+                self.remaining += count
+
+    def record(self, count: int) -> None:
+        now = self.clock()
+        with self._lock:
+            self.received += count
+            self.last_received = now
+            if self.drained_at is None and self.received >= self.backlog:
+                self.drained_at = now
+
+
+class ConsumeMessagesStage(BaseStage):
+    """Stage for consuming messages from a subscription and measuring receive throughput."""
+
+    name = "consume_messages"
+    dependencies = ["consumer", "metrics", "logger"]  # Required dependencies
+    optional = False  # This stage is required
+
+    _consumer_connected = False  # Flag to check if consumer is connected
+
+    metadata = {
+        "name": name,
+        "description": "Stage to consume messages from a Pulsar subscription.",
+        "version": "1.0",
+        "author": "Pulsar Team",
+        "tags": ["consumer", "messages", "performance"],
+        "dependencies": dependencies,
+        "optional": optional,
+        "parameters": {
+            "num_messages": {
+                "type": int,
+                "description": "Number of messages to receive, all of them until the subscription is idle if not set."
+            },
+            "duration": {
+                "type": float,
+                "description": "Longest time to keep receiving for, in seconds."
+            },
+            "idle_timeout": {
+                "type": float,
+                "description": "Stop once no message arrived for this many seconds."
+            },
+            "receive_mode": {
+                "type": str,
+                "description": "'single' hands messages out one by one, 'batch' in batches of batch_size."
+            },
+            "batch_size": {
+                "type": int,
+                "description": "In batch mode, messages handed out per batch."
+            },
+            "receiver_queue_size": {
+                "type": int,
+                "description": "Messages each consumer prefetches from the broker per fetch."
+            },
+            "ack_mode": {
+                "type": str,
+                "description": "'individual' acks every message, 'cumulative' acks up to the last message of "
+                               "each batch, 'batched' groups individual acks into ack_batch_size requests."
+            },
+            "ack_batch_size": {
+                "type": int,
+                "description": "In batched ack mode, acknowledgements sent per request."
+            },
+            "consumers": {
+                "type": int,
+                "description": "Consumers sharing the subscription, each on its own thread."
+            },
+            "end_to_end": {
+                "type": bool,
+                "description": "Decode payload headers and record publish-to-receive latency."
+            }
+        },
+        "additional_info": {
+            "requires_permissions": ["read_messages"],
+            "average_runtime": "varies by backlog",
+            "supported_message_types": ["string", "json", "bytes"]
+        }
+    }
+
+    @classmethod
+    def setup(cls,
+              env: Optional[dict[str, Any]] = None,
+              result: Optional[Any] = None) -> None:
+        """
+        Set up the consume_messages stage.
+        :param env: Environment for the stage.
+        :param result: Result object for logging.
+        """
+        if not cls.is_available():
+            rprint(f"[bold red]Cannot setup {cls.name} - dependencies not met[/bold red]")
+            if result:
+                result.log(f"Cannot setup {cls.name} - dependencies not met")
+            raise RuntimeError(f"Required stage {cls.name} missing dependencies")
+
+        logger = cls.get_deps()["logger"]
+        consumer = cls.get_deps()["consumer"]
+
+        if result:
+            result.log(f"========= Setting up {cls.name} stage =========")
+
+        try:
+            rprint(f"[bold blue]Setting up stage:[/bold blue] [yellow]{cls.name}[/yellow]")
+            if not cls._consumer_connected:
+                logger.info("Connecting consumer...")
+                consumer.connect()
+                cls._consumer_connected = True
+                logger.info("Consumer connected successfully")
+
+            if result:
+                result.log(f"Setting up {cls.name} stage - consumer connected")
+
+        except Exception as e:
+            error_msg = f"Failed to connect consumer in {cls.name}: {str(e)}"
+            logger.error(error_msg)
+            if result:
+                result.log(error_msg)
+            raise RuntimeError(error_msg)
+
+    @classmethod
+    def run(cls, context: dict[str, Any]) -> Any:
+        """
+        Run the consume_messages stage.
+        :param context: Context for the stage execution.
+        :return: Receive throughput, backlog drain time, acks and latencies of the run.
+        """
+        if not cls._consumer_connected:
+            rprint(f"[bold red]Cannot run {cls.name} - consumer not connected[/bold red]")
+            raise RuntimeError(f"Consumer not connected in {cls.name} stage")
+
+        consumer = cls.get_deps()["consumer"]
+        logger = cls.get_deps()["logger"]
+        metrics = cls.get_deps()["metrics"]
+        result = context.get("result", None)
+
+        params = context.get("testcase_params", context)
+        duration = params.get("duration")
+        if not duration:
+            raise PulsarStageInvalidParameterError(stage_name=cls.name, parameter=params, message="No duration param provided for the stage.")
+        receive_mode = params.get("receive_mode", "single")
+        if receive_mode not in RECEIVE_MODES:
+            raise PulsarStageInvalidParameterError(stage_name=cls.name, parameter="receive_mode", message=f"Unknown receive_mode '{receive_mode}', expected one of {RECEIVE_MODES}.")
+        ack_mode = params.get("ack_mode", "individual")
+        if ack_mode not in ACK_MODES:
+            raise PulsarStageInvalidParameterError(stage_name=cls.name, parameter="ack_mode", message=f"Unknown ack_mode '{ack_mode}', expected one of {ACK_MODES}.")
+        consumers = params.get("consumers", 1)
+        if ack_mode == "cumulative" and consumers > 1:
+            raise PulsarStageInvalidParameterError(stage_name=cls.name, parameter="ack_mode", message="Cumulative acks need a single consumer, shared subscriptions ack individually.")
+
+        logger.info(f"Running {cls.name} stage")
+        try:
+            rprint(f"[bold blue]Running stage:[/bold blue] [yellow]{cls.name}[/yellow]")
+            received = metrics.counter("messages.received")
+            acks = metrics.counter("acks.sent")
+            clock = time.perf_counter
+            start = clock()
+            subscription = _Subscription(params.get("num_messages"), consumer.backlog(), clock)
+            if result:
+                result.log(f"Receiving {params.get('num_messages') or 'all'} messages, backlog of {subscription.backlog}")
+
+            with ThreadPoolExecutor(max_workers=consumers, thread_name_prefix="pulsar-consumer") as pool:
+                futures = [
+                    pool.submit(cls._consume, consumer, subscription, received, acks,
+                                start + duration, params.get("idle_timeout", 0.5), receive_mode,
+                                params.get("batch_size", 100), params.get("receiver_queue_size", 1000),
+                                ack_mode, params.get("ack_batch_size", 100), params.get("end_to_end", False))
+                    for _ in range(consumers)
+                ]
+                outcomes = [future.result() for future in futures]
+
+            summary = cls._summarize(outcomes, subscription, start, ack_mode)
+            metrics.merge_latency("receive", summary.pop("receive_latency"))
+            if "end_to_end_latency" in summary:
+                metrics.merge_latency("end_to_end", summary.pop("end_to_end_latency"))
+
+            rprint(f"[bold green]Successfully received {summary['messages_received']} messages[/bold green]")
+            if result:
+                result.log(f"Successfully received {summary['messages_received']} messages")
+            return summary
+
+        except Exception as e:
+            error_msg = f"Error consuming messages in {cls.name}: {str(e)}"
+            logger.error(error_msg)
+            raise RuntimeError(error_msg)
+
+    @classmethod
+    def _consume(cls,
+                 consumer: Consumer,
+                 subscription: _Subscription,
+                 received: Counter,
+                 acks: Counter,
+                 deadline: float,
+                 idle_timeout: float,
+                 receive_mode: str,
+                 batch_size: int,
+                 receiver_queue_size: int,
+                 ack_mode: str,
+                 ack_batch_size: int,
+                 end_to_end: bool) -> dict[str, Any]:
+        """
+        Receive and acknowledge messages on one consumer until the run is over.
+        :param subscription: Progress shared with the other consumers.
+        :param deadline: Time at which to stop, on the subscription's clock.
+        :param receiver_queue_size: Messages fetched from the broker at once, then handed out locally.
+        :return: Messages received and acks sent by this consumer, with its histograms.
+        """
+        clock = subscription.clock
+        fetch_latency = LatencyHistogram()
+        recorder = EndToEndRecorder() if end_to_end else None
+        pending_acks: list[int] = []
+        count = 0
+        ack_requests = 0
+        idle_since = clock()
+
+        now = idle_since
+        while now < deadline:
+            wanted = subscription.reserve(receiver_queue_size)
+            if not wanted:
+                break
+            started = clock()
+            first, messages = consumer.receive_batch(wanted, timeout=max(0.0, min(idle_timeout, deadline - started, 0.05)))
+            subscription.release(wanted - len(messages))
+            now = clock()
+            if not messages:
+                if now - idle_since >= idle_timeout:
+                    break
+                continue
+            idle_since = now
+            fetch_latency.record((now - started) * 1e6)
+
+            step = 1 if receive_mode == "single" else batch_size
+            for offset in range(0, len(messages), step):
+                handed = messages[offset:offset + step]
+                first_id = first + offset
+                if recorder:
+                    recorder.record_all(handed)
+                if ack_mode == "individual":
+                    for message_id in range(first_id, first_id + len(handed)):
+                        consumer.acknowledge([message_id])
+                    ack_requests += len(handed)
+                elif ack_mode == "cumulative":
+                    consumer.acknowledge_cumulative(first_id + len(handed) - 1)
+                    ack_requests += 1
+                else:
+                    pending_acks.extend(range(first_id, first_id + len(handed)))
+                    if len(pending_acks) >= ack_batch_size:
+                        consumer.acknowledge(pending_acks)
+                        pending_acks = []
+                        ack_requests += 1
+            count += len(messages)
+            received.inc(len(messages))
+            subscription.record(len(messages))
+
+        if pending_acks:
+            consumer.acknowledge(pending_acks)
+            ack_requests += 1
+        acks.inc(ack_requests)
+        return {"received": count, "ack_requests": ack_requests, "fetch_latency": fetch_latency, "recorder": recorder}
+
+    @classmethod
+    def _summarize(cls,
+                   outcomes: list[dict[str, Any]],
+                   subscription: _Subscription,
+                   start: float,
+                   ack_mode: str) -> dict[str, Any]:
+        """Merge what every consumer recorded into the summary of the run."""
+        fetch_latency = LatencyHistogram()
+        for outcome in outcomes:
+            fetch_latency.merge(outcome["fetch_latency"])
+        # Time spent receiving, leaving out the idle wait that ended the run
+        elapsed = (subscription.last_received or start) - start
+        summary = {
+            "messages_received": subscription.received,
+            "elapsed": elapsed,
+            "receive_rate": subscription.received / elapsed if elapsed else 0.0,
+            "consumers": len(outcomes),
+            "per_consumer": [outcome["received"] for outcome in outcomes],
+            "initial_backlog": subscription.backlog,
+            "drain_time": subscription.drained_at - start if subscription.drained_at is not None else None,
+            "ack_mode": ack_mode,
+            "ack_requests": sum(outcome["ack_requests"] for outcome in outcomes),
+            "fetch_latency_ms": fetch_latency.summary(scale=1000.0),
+            "receive_latency": fetch_latency,
+        }
+        recorders = [outcome["recorder"] for outcome in outcomes if outcome["recorder"] is not None]
+        if recorders:
+            end_to_end = LatencyHistogram()
+            for recorder in recorders:
+                end_to_end.merge(recorder.histogram)
+            duplicates = sum(recorder.duplicates for recorder in recorders)
+            # Consumers split one sequence between them, so gaps are counted over all of them together
+            highest = max(recorder.max_sequence for recorder in recorders)
+            distinct = sum(recorder.received for recorder in recorders) - duplicates
+            summary["end_to_end"] = {
+                "missing": highest + 1 - distinct,
+                "duplicates": duplicates,
+                "reordered": sum(recorder.reordered for recorder in recorders),
+                "negative": sum(recorder.negative for recorder in recorders),
+                "latency_ms": end_to_end.summary(scale=1000.0),
+            }
+            summary["end_to_end_latency"] = end_to_end
+        return summary
+
+    @classmethod
+    def teardown(cls,
+                 env: Optional[dict[str, Any]] = None,
+                 result: Optional[Any] = None) -> None:
+        """
+        Tear down the consume_messages stage.
+        :param env: Environment for the stage.
+        :param result: Result object for logging.
+        """
+        if not cls.is_available():
+            return
+
+        logger = cls.get_deps()["logger"]
+        consumer = cls.get_deps()["consumer"]
+
+        if result:
+            result.log(f"Tearing down {cls.name} stage")
+
+        try:
+            if cls._consumer_connected:
+                consumer.disconnect()
+                cls._consumer_connected = False
+                logger.info("Consumer disconnected successfully")
+
+            if result:
+                result.log(f"Tearing down {cls.name} stage - consumer disconnected")
+
+        except Exception as e:
+            error_msg = f"Error disconnecting consumer in {cls.name}: {str(e)}"
+            logger.error(error_msg)
+            if result:
+                result.log(error_msg)
+            if not cls.optional:
+                raise RuntimeError(error_msg)
+
+
+# Create module-level functions that use the class methods
+def init_dependencies(**dependencies):
+    """Initialize the stage's dependencies."""
+    ConsumeMessagesStage.set_dependencies(**dependencies)
+
+setup = ConsumeMessagesStage.setup
+run = ConsumeMessagesStage.run
+teardown = ConsumeMessagesStage.teardown
+name = ConsumeMessagesStage.name
+metadata = ConsumeMessagesStage.get_metadata
+is_available = ConsumeMessagesStage.is_available
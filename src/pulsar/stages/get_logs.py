@@ -17,6 +17,7 @@ class GetLogsStage(BaseStage):
         "version": "1.0.0",
         "author": "mdaloia",
         "tags": ["logs", "monitoring"],
+        "cacheable": True,  # Identical log queries are served from the workflow cache
         "additional_info": {
             "requires_permissions": ["read_logs"],
             "average_runtime": "2s",
@@ -100,7 +101,6 @@ class GetLogsStage(BaseStage):
 
         # Add custom teardown logic here
         rprint(f"[bold red]Tearing down {self.name} stage[/bold red]")
-        result.log(f"Tearing down {self.name} stage")
 
     @classmethod
     def is_available(cls) -> bool:
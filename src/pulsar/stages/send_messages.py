@@ -1,11 +1,25 @@
 # pulsar/stages/send_messages.py
-from typing import Any, Optional
+import functools
+import itertools
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Iterable, Optional, Union
 
 from rich import print as rprint
 
 from pulsar.stages.base_stage import BaseStage
 from pulsar.core.dependencies import Producer, Metrics, Logger
+from pulsar.core.batching import MessageBatcher, DEFAULT_BATCH_SIZE, message_size
 from pulsar.core.exceptions import PulsarStageInvalidParameterError
+from pulsar.core.executors import picklable_context
+from pulsar.core.histogram import LatencyHistogram
+from pulsar.core.inflight import DEFAULT_MAX_PENDING
+from pulsar.core.metrics import Counter
+from pulsar.core.payload import PayloadPool, DEFAULT_POOL_SIZE, SIZE_DISTRIBUTIONS
+from pulsar.core.producer_group import ProducerGroup
+from pulsar.core.pacing import AimdRateController, IntendedSchedule, TokenBucket, LOAD_MODES, SEND_UNTIL
+from pulsar.core.timeseries import TimeSeriesStore
 
 
 # TODO: move to helpers?
@@ -47,9 +61,128 @@ class SendMessagesStage(BaseStage):
                 "type": int,
                 "description": "Number of messages to send."
             },
+            "source": {
+                "type": str,
+                "description": "Name of an upstream stage whose result or stream holds the messages to send."
+            },
             "duration": {
                 "type": int,
                 "description": "Duration for sending messages."
+            },
+            "rate": {
+                "type": float,
+                "description": "Target rate in messages per second; sends are paced and their latency recorded."
+            },
+            "mode": {
+                "type": str,
+                "description": "'closed' sends each message once the previous one returned, 'open' sends on a "
+                               "fixed timeline and measures latency from each message's intended start."
+            },
+            "correct_latency": {
+                "type": bool,
+                "description": "In closed mode with a rate, correct latency samples for coordinated omission."
+            },
+            "burst": {
+                "type": int,
+                "description": "In closed mode with a rate, messages that may go out back to back after a pause."
+            },
+            "ramp_up": {
+                "type": float,
+                "description": "Seconds over which the rate ramps up linearly to its target."
+            },
+            "record_latency": {
+                "type": bool,
+                "description": "Without a rate, time every send to record its latency; off by default so "
+                               "unpaced runs measure peak throughput."
+            },
+            "until": {
+                "type": str,
+                "description": "'count' sends num_messages, 'duration' keeps sending for duration seconds."
+            },
+            "batch_size": {
+                "type": int,
+                "description": "Send messages in batches of up to this many messages."
+            },
+            "batch_bytes": {
+                "type": int,
+                "description": "Flush a batch once it holds this many bytes."
+            },
+            "linger_ms": {
+                "type": float,
+                "description": "Flush a batch once its oldest message waited this many milliseconds."
+            },
+            "send_async": {
+                "type": bool,
+                "description": "Pipeline sends through producer.send_async, recording latency on completion."
+            },
+            "max_pending": {
+                "type": int,
+                "description": "With send_async, messages allowed in flight before sending blocks."
+            },
+            "adaptive": {
+                "type": bool,
+                "description": "In closed mode, start at rate and adapt it to backpressure: raise it by rate_step "
+                               "after every clean adjust_interval, cut it by rate_backoff after a congested one."
+            },
+            "min_rate": {
+                "type": float,
+                "description": "With adaptive, lowest rate cuts go down to."
+            },
+            "max_rate": {
+                "type": float,
+                "description": "With adaptive, highest rate increases go up to."
+            },
+            "rate_step": {
+                "type": float,
+                "description": "With adaptive, messages per second added after a clean interval."
+            },
+            "rate_backoff": {
+                "type": float,
+                "description": "With adaptive, factor the rate is multiplied by after a congested interval."
+            },
+            "adjust_interval": {
+                "type": float,
+                "description": "With adaptive, seconds of sends observed before each rate adjustment."
+            },
+            "latency_target_ms": {
+                "type": float,
+                "description": "With adaptive, p90 send latency above which an interval is congested, "
+                               "three times the lowest p90 seen by default."
+            },
+            "max_error_rate": {
+                "type": float,
+                "description": "With adaptive, share of failed sends above which an interval is congested."
+            },
+            "payload_size": {
+                "type": int,
+                "description": "Send preallocated binary payloads of this size (median for lognormal) "
+                               "instead of text messages, stamped with a sequence number and timestamp."
+            },
+            "payload_distribution": {
+                "type": str,
+                "description": "Payload size distribution: 'fixed', 'uniform', 'lognormal' or 'empirical'."
+            },
+            "payload_max_size": {
+                "type": int,
+                "description": "Largest payload size, the upper bound of 'uniform'."
+            },
+            "payload_sigma": {
+                "type": float,
+                "description": "Standard deviation of the log of the payload sizes for 'lognormal'."
+            },
+            "payload_sizes": {
+                "type": list,
+                "description": "(size, weight) pairs drawn from by 'empirical'."
+            },
+            "payload_pool": {
+                "type": int,
+                "description": "Number of preallocated payload buffers, reused round-robin. It must exceed the "
+                               "messages the batcher and producer may hold at once; by default, twice that."
+            },
+            "processes": {
+                "type": int,
+                "description": "Split num_messages and rate over this many worker processes, each with "
+                               "its own copy of the producer, and merge their metrics."
             }
         },
         "additional_info": {
@@ -71,7 +204,8 @@ class SendMessagesStage(BaseStage):
 
         if not cls.is_available():
             rprint(f"[bold red]Cannot setup {cls.name} - dependencies not met[/bold red]")
-            result.log(f"Cannot setup {cls.name} - dependencies not met")
+            if result:
+                result.log(f"Cannot setup {cls.name} - dependencies not met")
             raise RuntimeError(f"Required stage {cls.name} missing dependencies")
         
         logger = cls.get_deps()["logger"]
@@ -87,7 +221,8 @@ class SendMessagesStage(BaseStage):
         # Add custom setup logic here
         try:
             rprint(f"[bold blue]Setting up stage:[/bold blue] [yellow]{cls.name}[/yellow]")
-            result.log(f"Connecting to producer for stage: {cls.name}")
+            if result:
+                result.log(f"Connecting to producer for stage: {cls.name}")
 
             # Connect the producer if not already connected
             if not cls._producer_connected:
@@ -142,7 +277,11 @@ class SendMessagesStage(BaseStage):
 
         found_num_messages = check_nested_key(params, "num_messages")
         num_messages = params.get("num_messages")
-        if not num_messages: # or if "num_messages" not in params:
+        source = params.get("source")  # upstream stage streaming the messages to send
+        until = params.get("until", "count")
+        if until not in SEND_UNTIL:
+            raise PulsarStageInvalidParameterError(stage_name=cls.name, parameter="until", message=f"Unknown until '{until}', expected one of {SEND_UNTIL}.")
+        if not num_messages and not source and until == "count": # or if "num_messages" not in params:
             rprint("[bold red]No num_messages provided for the stage.[/bold red]")
             raise PulsarStageInvalidParameterError(stage_name=cls.name, parameter=params, message="No num_messages param provided for the stage.")
 
@@ -151,29 +290,575 @@ class SendMessagesStage(BaseStage):
             rprint("[bold red]No duration provided for the stage.[/bold red]")
             raise PulsarStageInvalidParameterError(stage_name=cls.name, parameter=params, message="No duration param provided for the stage.")
 
-        logger.info(f"Sending: '{num_messages}' messages for {duration} seconds")
+        mode = params.get("mode", "closed")
+        rate = params.get("rate")
+        if mode not in LOAD_MODES:
+            raise PulsarStageInvalidParameterError(stage_name=cls.name, parameter="mode", message=f"Unknown mode '{mode}', expected one of {LOAD_MODES}.")
+        if mode == "open" and not rate:
+            raise PulsarStageInvalidParameterError(stage_name=cls.name, parameter="rate", message="Open-loop mode needs a rate param.")
+        if params.get("adaptive") and (mode == "open" or not rate):
+            raise PulsarStageInvalidParameterError(stage_name=cls.name, parameter="adaptive", message="Adaptive sending needs closed mode and a starting rate param.")
+        if params.get("send_async") and (params.get("batch_size") or params.get("batch_bytes") or params.get("linger_ms")):
+            raise PulsarStageInvalidParameterError(stage_name=cls.name, parameter="send_async", message="send_async cannot be combined with batching params.")
+        if params.get("payload_distribution", "fixed") not in SIZE_DISTRIBUTIONS:
+            raise PulsarStageInvalidParameterError(stage_name=cls.name, parameter="payload_distribution", message=f"Unknown payload_distribution '{params['payload_distribution']}', expected one of {SIZE_DISTRIBUTIONS}.")
+        if params.get("payload_size") and source:
+            raise PulsarStageInvalidParameterError(stage_name=cls.name, parameter="payload_size", message="Generated payloads cannot be combined with a source stage.")
+        processes = params.get("processes") or 1
+        if processes > 1 and source:
+            raise PulsarStageInvalidParameterError(stage_name=cls.name, parameter="processes", message="A source stage cannot be split over processes.")
+        config = getattr(producer, "config", {})
+        if processes > 1 and config.get("broker") is not None and "broker_address" not in config:
+            raise PulsarStageInvalidParameterError(stage_name=cls.name, parameter="processes", message="An in-process broker cannot be shared with worker processes, serve it and pass broker_address instead.")
+
+        if until == "duration":
+            logger.info(f"Sending messages for {duration} seconds")
+        else:
+            logger.info(f"Sending: '{num_messages}' messages for {duration} seconds")
+
+        if processes > 1:
+            return cls._run_sharded(context, params, processes)
+        pool = cls._payload_pool(params, producer)
+        # With until="duration" the deadline ends the run, num_messages does not cap it
+        limit = None if until == "duration" else num_messages
 
         # Use the injected dependencies
         try:
             rprint(f"[bold blue]Running stage:[/bold blue] [yellow]{cls.name}[/yellow]")
             if result:
-                result.log(f"Sending {num_messages} messages")
-            for i in range(num_messages):
-                message = f"Test message {i}"
-                producer.send_message(message)
-                metrics.record_send(value=1.0, tags={"stage": cls.name})
-
-            rprint(f"[bold green]Successfully sent {num_messages} messages[/bold green]")
+                result.log(f"Sending {limit or 'all'} messages")
+            # Resolve everything the loop touches once, it runs per message
+            send = producer.send_message
+            sent = metrics.counter("messages.sent")
+            series = metrics.series_recorder()
+            batcher = cls._batcher(params, producer, metrics)
+            if batcher:
+                send = batcher.add
+            send_async = getattr(producer, "send_async", None)
+            if pool:
+                count = range(limit) if limit else itertools.count()
+                messages = map(pool.payload, count)
+                send = pool.stamped(send)
+                send_async = send_async and pool.stamped(send_async)
+            else:
+                messages = cls._messages(context, limit, source)
+            deadline = duration if until == "duration" else None
+            pacer = None
+            if rate and params.get("adaptive"):
+                pacer = cls._rate_controller(params, metrics, series.clock)
+            elif rate:
+                if mode == "open":
+                    pacer = IntendedSchedule(rate, clock=series.clock, ramp_up=params.get("ramp_up", 0.0))
+                else:
+                    pacer = TokenBucket(rate, burst=params.get("burst", 1), ramp_up=params.get("ramp_up", 0.0), clock=series.clock)
+            try:
+                if params.get("send_async"):
+                    summary = cls._send_pipelined(messages, send_async, producer.flush, sent, series, pacer, mode, deadline, params.get("max_pending"))
+                elif pacer:
+                    summary = cls._send_paced(messages, send, sent, series, pacer, mode, params.get("correct_latency", False), deadline)
+                else:
+                    summary = cls._send_unpaced(messages, send, sent, series, deadline, params.get("record_latency", False))
+                latency = summary.pop("latency")
+                if latency is not None:
+                    metrics.merge_latency("send", latency)
+            finally:
+                if batcher:
+                    batcher.close()
+            # Producers that queue sends, e.g. a ProducerGroup, deliver them before the run reports
+            if hasattr(producer, "flush"):
+                producer.flush()
+            if batcher:
+                metrics.merge_latency("send_batch", batcher.latency)
+                summary["batching"] = batcher.summary()
+            if pool:
+                summary["payload"] = pool.summary()
+            if isinstance(pacer, AimdRateController):
+                summary["adaptive"] = pacer.summary()
+            messages_sent = summary["messages_sent"]
+
+            rprint(f"[bold green]Successfully sent {messages_sent} messages[/bold green]")
             if result:
-                result.log(f"Successfully sent {num_messages} messages")
+                result.log(f"Successfully sent {messages_sent} messages")
 
-            return {"messages_sent": num_messages}
+            return summary
 
         except Exception as e:
             error_msg = f"Error sending messages in {cls.name}: {str(e)}"
             logger.error(error_msg)
             raise RuntimeError(error_msg) 
 
+    @classmethod
+    def _batcher(cls, params: dict[str, Any], producer: Producer, metrics: Metrics) -> Optional[MessageBatcher]:
+        """
+        Create the batching layer requested by the batch_size, batch_bytes and linger_ms params.
+        :return: A MessageBatcher sending through producer.send_batch, None when batching is off.
+        """
+        batch_size = params.get("batch_size")
+        batch_bytes = params.get("batch_bytes")
+        linger_ms = params.get("linger_ms")
+        if not (batch_size or batch_bytes or linger_ms):
+            return None
+
+        batches = metrics.counter("batches.sent")
+        batch_bytes_sent = metrics.counter("batches.bytes")
+
+        def on_flush(size: int, nbytes: int, elapsed: float, reason: str) -> None:
+            batches.inc()
+            batch_bytes_sent.inc(nbytes)
+
+        return MessageBatcher(
+            producer.send_batch,
+            max_messages=batch_size or DEFAULT_BATCH_SIZE,
+            max_bytes=batch_bytes,
+            linger=(linger_ms or 0) / 1000,
+            on_flush=on_flush
+        )
+
+    @classmethod
+    def _rate_controller(cls, params: dict[str, Any], metrics: Metrics, clock: Callable[[], float]) -> AimdRateController:
+        """
+        Create the adaptive pacer requested by the adaptive param.
+        Its rate is kept in the "send.target_rate" gauge and its cuts in the "send.rate_cuts" counter;
+        the whole trajectory is returned in the summary of the run.
+        """
+        target_rate = metrics.gauge("send.target_rate")
+        rate_cuts = metrics.counter("send.rate_cuts")
+        controller = None
+
+        def on_adjust(rate: float) -> None:
+            target_rate.set(rate)
+            if controller.trajectory[-1][2] != "increase":
+                rate_cuts.inc()
+
+        controller = AimdRateController(
+            params["rate"],
+            min_rate=params.get("min_rate", 1.0),
+            max_rate=params.get("max_rate"),
+            step=params.get("rate_step"),
+            backoff=params.get("rate_backoff", 0.5),
+            adjust_interval=params.get("adjust_interval", 0.1),
+            latency_target_ms=params.get("latency_target_ms"),
+            max_error_rate=params.get("max_error_rate", 0.01),
+            max_pending=params.get("max_pending"),
+            on_adjust=on_adjust,
+            clock=clock
+        )
+        target_rate.set(controller.rate)
+        return controller
+
+    @classmethod
+    def _send_unpaced(cls,
+                      messages: Iterable[Any],
+                      send: Callable[[Any], None],
+                      sent: Counter,
+                      series: TimeSeriesStore,
+                      duration: Optional[float],
+                      record_latency: bool = False) -> dict[str, Any]:
+        """
+        Send messages as fast as the producer takes them.
+        :param duration: Seconds to keep sending for, None sends every message.
+        :param record_latency: Time every send; otherwise sends are counted once per series interval,
+                               keeping the loop that measures peak throughput down to one clock read.
+        :return: Summary of the run, with the latency histogram (microseconds) under "latency",
+                 None when latency was not recorded.
+        """
+        clock = series.clock
+        start = clock()
+        end = start + duration if duration is not None else None
+        if not record_latency:
+            return cls._send_counted(messages, send, sent, series, start, end)
+
+        latency = LatencyHistogram()
+        messages_sent = 0
+        now = start
+        for message in messages:
+            started = clock()
+            send(message)
+            now = clock()
+            elapsed_us = (now - started) * 1e6
+            latency.record(elapsed_us)
+            sent.inc()
+            series.record_send(nbytes=message_size(message), timestamp=now)
+            series.record_latency(elapsed_us / 1000, timestamp=now)
+            messages_sent += 1
+            if end is not None and now >= end:
+                break
+        elapsed = now - start
+        return {
+            "messages_sent": messages_sent,
+            "elapsed": elapsed,
+            "mode": "closed",
+            "achieved_rate": messages_sent / elapsed if elapsed else 0.0,
+            "latency_ms": latency.summary(scale=1000.0),
+            "latency": latency,
+        }
+
+    @classmethod
+    def _send_counted(cls,
+                      messages: Iterable[Any],
+                      send: Callable[[Any], None],
+                      sent: Counter,
+                      series: TimeSeriesStore,
+                      start: float,
+                      end: Optional[float]) -> dict[str, Any]:
+        """
+        Send messages as fast as the producer takes them, without timing each send.
+        Sends and bytes are added up per series interval and recorded once it ends.
+        :return: Summary of the run, with None under "latency".
+        """
+        clock = series.clock
+        interval = series.interval
+        origin = start if series.start is None else series.start
+        index = int((start - origin) // interval)
+        boundary = origin + (index + 1) * interval
+        messages_sent = pending = pending_bytes = 0
+        now = start
+        for message in messages:
+            send(message)
+            now = clock()
+            if now >= boundary:
+                if pending:
+                    sent.inc(pending)
+                    series.record_send(pending, pending_bytes, timestamp=origin + index * interval)
+                    pending = pending_bytes = 0
+                index = int((now - origin) // interval)
+                boundary = origin + (index + 1) * interval
+            pending += 1
+            pending_bytes += message_size(message)
+            messages_sent += 1
+            if end is not None and now >= end:
+                break
+        if pending:
+            sent.inc(pending)
+            series.record_send(pending, pending_bytes, timestamp=origin + index * interval)
+        elapsed = now - start
+        return {
+            "messages_sent": messages_sent,
+            "elapsed": elapsed,
+            "mode": "closed",
+            "achieved_rate": messages_sent / elapsed if elapsed else 0.0,
+            "latency": None,
+        }
+
+    @classmethod
+    def _send_paced(cls,
+                    messages: Iterable[Any],
+                    send: Callable[[Any], None],
+                    sent: Counter,
+                    series: TimeSeriesStore,
+                    pacer: Union[IntendedSchedule, TokenBucket, AimdRateController],
+                    mode: str,
+                    correct_latency: bool,
+                    duration: Optional[float] = None) -> dict[str, Any]:
+        """
+        Send messages at the pacer's rate, recording each send's latency.
+        :param messages: Messages to send.
+        :param send: Callable sending one message. When batching, it adds the message to the
+                     batch, so the latency covers the enqueue and any flush it triggered.
+        :param sent: Counter of messages sent.
+        :param series: Time series recording sends and latencies per interval.
+        :param pacer: IntendedSchedule for open mode, TokenBucket for closed mode. An AimdRateController
+                      is fed every send's latency; its failed sends are counted instead of raised.
+        :param mode: 'open' measures latency from each message's intended start, so time spent
+                     waiting behind a stalled send counts; 'closed' measures from the actual start.
+        :param correct_latency: In closed mode, backfill the samples a stall hid (coordinated omission).
+        :param duration: Seconds to keep sending for, None sends every message.
+        :return: Summary of the run, with the latency histogram (microseconds) under "latency".
+        """
+        clock = pacer.clock
+        latency = LatencyHistogram()
+        interval_us = pacer.interval * 1e6
+        correct = correct_latency and mode == "closed"
+        adaptive = isinstance(pacer, AimdRateController)
+        end = None
+        messages_sent = 0
+        send_errors = 0
+        finished = None
+
+        for message in messages:
+            intended = pacer.next()
+            if end is None and duration is not None:
+                end = pacer.start + duration
+            started = intended if mode == "open" else clock()
+            try:
+                send(message)
+            except Exception:
+                if not adaptive:
+                    raise
+                finished = clock()
+                pacer.observe(error=True)
+                send_errors += 1
+                if end is not None and finished >= end:
+                    break
+                continue
+            finished = clock()
+            elapsed_us = (finished - started) * 1e6
+            if adaptive:
+                pacer.observe(elapsed_us / 1000)
+            if correct:
+                latency.record_corrected(elapsed_us, interval_us)
+            else:
+                latency.record(elapsed_us)
+            sent.inc()
+            series.record_send(nbytes=message_size(message), timestamp=finished)
+            series.record_latency(elapsed_us / 1000, timestamp=finished)
+            messages_sent += 1
+            if end is not None and finished >= end:
+                break
+
+        elapsed = finished - pacer.start if finished is not None else 0.0
+        summary = {
+            "messages_sent": messages_sent,
+            "elapsed": elapsed,
+            "mode": mode,
+            "target_rate": pacer.rate,
+            "achieved_rate": messages_sent / elapsed if elapsed else 0.0,
+            "max_lag_ms": pacer.max_lag * 1000,
+            "latency_ms": latency.summary(scale=1000.0),
+            "latency": latency,
+        }
+        if adaptive:
+            summary["send_errors"] = send_errors
+        return summary
+
+    @classmethod
+    def _send_pipelined(cls,
+                        messages: Iterable[Any],
+                        send_async: Callable[..., Future],
+                        flush: Callable[[], Any],
+                        sent: Counter,
+                        series: TimeSeriesStore,
+                        pacer: Optional[Union[IntendedSchedule, TokenBucket, AimdRateController]],
+                        mode: str,
+                        duration: Optional[float],
+                        max_pending: Optional[int]) -> dict[str, Any]:
+        """
+        Send messages through the producer's send_async, keeping several in flight.
+        Latency is recorded by each message's completion callback, from its intended
+        start in open mode and from the moment it was handed to the producer otherwise.
+        :param send_async: The producer's send_async, taking a message and a completion callback.
+        :param flush: The producer's flush, waiting for every message in flight.
+        :param pacer: Pacer for the send rate, None sends as fast as the window allows. An
+                      AimdRateController is fed every completion and the messages in flight;
+                      its failed sends are counted instead of raised.
+        :param max_pending: Messages the stage keeps in flight, on top of the producer's own window.
+        :return: Summary of the run, with the latency histogram (microseconds) under "latency".
+        """
+        clock = series.clock
+        latency = LatencyHistogram()
+        lock = threading.Lock()
+        window = threading.BoundedSemaphore(max_pending) if max_pending else None
+        errors: list[Exception] = []
+        adaptive = isinstance(pacer, AimdRateController)
+        completions = 0
+        messages_sent = 0
+        if adaptive:
+            pacer.pending = lambda: messages_sent - completions
+
+        def completed(started: float, nbytes: int, future: Future) -> None:
+            nonlocal completions
+            finished = clock()
+            if window:
+                window.release()
+            error = future.exception()
+            with lock:
+                completions += 1
+                if error is not None:
+                    errors.append(error)
+                    if adaptive:
+                        pacer.observe(error=True)
+                    return
+                elapsed_us = (finished - started) * 1e6
+                if adaptive:
+                    pacer.observe(elapsed_us / 1000)
+                latency.record(elapsed_us)
+                series.record_send(nbytes=nbytes, timestamp=finished)
+                series.record_latency(elapsed_us / 1000, timestamp=finished)
+            sent.inc()
+
+        start = clock()
+        end = start + duration if duration is not None else None
+        for message in messages:
+            intended = pacer.next() if pacer else None
+            if window:
+                window.acquire()
+            started = intended if pacer and mode == "open" else clock()
+            send_async(message, callback=functools.partial(completed, started, message_size(message)))
+            messages_sent += 1
+            if end is not None and clock() >= end:
+                break
+        flush()
+
+        if errors and not adaptive:
+            raise RuntimeError(f"{len(errors)} of {messages_sent} asynchronous sends failed: {errors[0]}")
+        elapsed = clock() - start
+        summary = {
+            "messages_sent": messages_sent,
+            "elapsed": elapsed,
+            "mode": mode,
+            "achieved_rate": messages_sent / elapsed if elapsed else 0.0,
+            "max_lag_ms": pacer.max_lag * 1000 if pacer else 0.0,
+            "latency_ms": latency.summary(scale=1000.0),
+            "latency": latency,
+        }
+        if adaptive:
+            summary["send_errors"] = len(errors)
+        return summary
+
+    @classmethod
+    def _shard_params(cls, params: dict[str, Any], processes: int) -> list[dict[str, Any]]:
+        """
+        Split the params of a run over worker processes.
+        :param params: Parameters for the stage.
+        :param processes: Number of worker processes.
+        :return: Params of every shard; num_messages and rate are divided between them.
+        """
+        num_messages = params.get("num_messages")
+        rate = params.get("rate")
+        shards = []
+        for index in range(processes):
+            shard = {**params, "processes": 1}
+            if num_messages and params.get("until") != "duration":
+                shard["num_messages"] = num_messages // processes + (index < num_messages % processes)
+                if not shard["num_messages"]:
+                    continue
+            if rate:
+                shard["rate"] = rate / processes
+            shards.append(shard)
+        return shards
+
+    @classmethod
+    def _run_sharded(cls, context: dict[str, Any], params: dict[str, Any], processes: int) -> dict[str, Any]:
+        """
+        Run the stage in worker processes and merge what they recorded.
+        Workers are spawned, each sending its shard with its own copy of the producer
+        into an empty shard of the metrics. Their counters, latencies and time series
+        are merged into the metrics dependency once every worker finished.
+        :param context: Context for the stage execution.
+        :param params: Parameters for the stage.
+        :param processes: Number of worker processes.
+        :return: Summary of the run, with the summary of every shard under "shards".
+        """
+        deps = cls.get_deps()
+        metrics = deps["metrics"]
+        result = context.get("result", None)
+        shards = cls._shard_params(params, processes)
+        shard_metrics = [metrics.shard() for _ in shards]
+        local_context = picklable_context(context)
+
+        rprint(f"[bold blue]Running stage:[/bold blue] [yellow]{cls.name}[/yellow] in {len(shards)} processes")
+        if result:
+            result.log(f"Sending {params.get('num_messages') or 'all'} messages from {len(shards)} processes")
+        with ProcessPoolExecutor(max_workers=len(shards), mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = [
+                pool.submit(_run_shard, {**deps, "metrics": recorder}, {**local_context, "testcase_params": shard})
+                for shard, recorder in zip(shards, shard_metrics)
+            ]
+            outcomes = []
+            for index, future in enumerate(futures):
+                try:
+                    outcomes.append(future.result())
+                except Exception as e:
+                    raise RuntimeError(f"Shard {index} of {cls.name} failed: {e}") from e
+
+        latency = LatencyHistogram()
+        summaries = []
+        for summary, recorder in outcomes:
+            metrics.merge(recorder)
+            latency.merge(recorder.latency_histogram("send"))
+            summaries.append(summary)
+
+        messages_sent = sum(summary["messages_sent"] for summary in summaries)
+        elapsed = max(summary.get("elapsed", 0.0) for summary in summaries)
+        merged = {
+            "messages_sent": messages_sent,
+            "elapsed": elapsed,
+            "achieved_rate": messages_sent / elapsed if elapsed else 0.0,
+            "processes": len(shards),
+            "shards": summaries,
+        }
+        if params.get("rate"):
+            merged["target_rate"] = params["rate"]
+        if latency.total_count:
+            merged["latency_ms"] = latency.summary(scale=1000.0)
+
+        rprint(f"[bold green]Successfully sent {messages_sent} messages[/bold green]")
+        if result:
+            result.log(f"Successfully sent {messages_sent} messages")
+        return merged
+
+    @classmethod
+    def _messages_held(cls, params: dict[str, Any], producer: Producer) -> int:
+        """
+        Most messages the batcher and the producer may still hold once handed to them.
+        Pooled payloads are reused round-robin, so a buffer must not come round again while held.
+        :param params: Parameters for the stage.
+        :param producer: Producer the messages are handed to.
+        :return: Messages held in the pending batch, the producer's queues and its async window.
+        """
+        held = 0
+        if params.get("batch_size") or params.get("batch_bytes") or params.get("linger_ms"):
+            held += params.get("batch_size") or DEFAULT_BATCH_SIZE
+        if isinstance(producer, ProducerGroup):
+            # Each partition queues queue_size messages, plus the one its worker is sending
+            held += (producer.queue_size + 1) * len(producer.partitions)
+        elif params.get("send_async"):
+            window = getattr(producer, "config", {}).get("max_pending", DEFAULT_MAX_PENDING)
+            held += min(params.get("max_pending") or window, window)
+        return held
+
+    @classmethod
+    def _payload_pool(cls, params: dict[str, Any], producer: Producer) -> Optional[PayloadPool]:
+        """
+        Create the pool of preallocated payloads when the params ask for generated payloads.
+        :param params: Parameters for the stage.
+        :param producer: Producer the payloads are sent through, sizing the pool.
+        :return: PayloadPool, or None to send text messages.
+        """
+        if not params.get("payload_size") and not params.get("payload_sizes"):
+            return None
+        held = cls._messages_held(params, producer)
+        pool_size = params.get("payload_pool", max(DEFAULT_POOL_SIZE, 2 * held))
+        if pool_size <= held:
+            message = f"A pool of {pool_size} payloads would reuse buffers still held, up to {held} messages are batched, queued or in flight."
+            raise PulsarStageInvalidParameterError(stage_name=cls.name, parameter="payload_pool", message=message)
+        try:
+            return PayloadPool(
+                size=params.get("payload_size", 100),
+                distribution=params.get("payload_distribution", "fixed"),
+                max_size=params.get("payload_max_size"),
+                sigma=params.get("payload_sigma", 0.5),
+                sizes=params.get("payload_sizes"),
+                pool_size=pool_size,
+            )
+        except ValueError as e:
+            raise PulsarStageInvalidParameterError(stage_name=cls.name, parameter="payload_size", message=str(e))
+
+    @classmethod
+    def _messages(cls, context: dict[str, Any], num_messages: Optional[int], source: Optional[str]) -> Iterable[Any]:
+        """
+        Get the messages to send.
+        :param context: Context for the stage execution.
+        :param num_messages: Maximum number of messages, None sends everything the source yields,
+                             or generates messages until the duration runs out.
+        :param source: Name of an upstream stage whose result (e.g. a StageStream) holds the messages.
+        :return: Iterable over the messages, consumed lazily so streamed records are never materialized.
+        """
+        if not source:
+            count = range(num_messages) if num_messages else itertools.count()
+            return (f"Test message {i}" for i in count)
+
+        upstream = context.get("stage_results", {}).get(source)
+        if upstream is None:
+            raise PulsarStageInvalidParameterError(
+                stage_name=cls.name,
+                parameter="source",
+                message=f"No result available from upstream stage '{source}'."
+            )
+        if num_messages:
+            return itertools.islice(upstream.result, num_messages)
+        return upstream.result
+
     @classmethod
     def teardown(cls, 
                 # params: Optional[dict[str, Any]] = None, 
@@ -231,6 +916,19 @@ class SendMessagesStage(BaseStage):
         logger.info("Cleaning up send_messages stage resources")
         producer.close()  # Close producer connection
 
+def _run_shard(dependencies: dict[str, Any], context: dict[str, Any]) -> tuple[dict[str, Any], Any]:
+    """Worker entry point of a sharded run: send one shard, return its summary and the metrics it recorded"""
+    SendMessagesStage.set_dependencies(**dependencies)
+    producer = dependencies["producer"]
+    producer.connect()
+    SendMessagesStage._producer_connected = True
+    try:
+        summary = SendMessagesStage.run(context)
+    finally:
+        producer.disconnect()
+        SendMessagesStage._producer_connected = False
+    return summary, dependencies["metrics"]
+
 # Create module-level functions that use the class methods
 def init_dependencies(**dependencies):
     """Initialize the stage's dependencies."""
@@ -4,6 +4,9 @@ from testplan import test_plan
 from testplan.testing.multitest import MultiTest
 
 from pulsar.tests.test_suite_workflow import WorkflowTestSuite
+from pulsar.tests.test_suite_scheduler import SchedulerTestSuite
+from pulsar.tests.test_suite_metrics import MetricsTestSuite
+from pulsar.tests.test_suite_load import LoadTestSuite
 from pulsar.tests.test_suite import (
   StageTestSuite1, StageTestSuite2, 
   PulsarMessageTestSuite, PulsarTestSuiteCommand,
@@ -22,7 +25,7 @@ def main(plan):
     # Running with workflow builder
     multitest_workflow = MultiTest(
         name="Pulsar Stages Workflow Test",
-        suites=[WorkflowTestSuite()]
+        suites=[WorkflowTestSuite(), SchedulerTestSuite(), MetricsTestSuite(), LoadTestSuite()]
     )
 
     plan.add(multitest)
@@ -1,5 +1,9 @@
 # pulsar/tests/mock_dependencies.py
 from pulsar.core.dependencies import BaseDependency
+from pulsar.core.histogram import LatencyHistogram
+from pulsar.core.inflight import AsyncSender
+from pulsar.core.metrics import MetricRegistry
+from pulsar.core.timeseries import TimeSeriesStore
 
 
 class MockLogger(BaseDependency):
@@ -15,12 +19,17 @@ class MockLogger(BaseDependency):
 class MockProducer(BaseDependency):
     def __init__(self):
         self.messages = []
+        self.batches = []
         self._connected = True
+        self._sender = None
 
     def connect(self):
         self._connected = True
 
     def disconnect(self):
+        if self._sender is not None:
+            self._sender.close()
+            self._sender = None
         self._connected = False
 
     def send_message(self, msg):
@@ -28,6 +37,26 @@ class MockProducer(BaseDependency):
             raise RuntimeError("Producer not connected")
         self.messages.append(msg)
 
+    def send_batch(self, msgs):
+        if not self._connected:
+            raise RuntimeError("Producer not connected")
+        self.batches.append(len(msgs))
+        self.messages.extend(msgs)
+
+    def close(self):
+        self.disconnect()
+
+    def capabilities(self):
+        return frozenset({"batch", "async"})
+
+    def send_async(self, msg, callback=None):
+        if self._sender is None:
+            self._sender = AsyncSender(self.send_message)
+        return self._sender.submit(msg, callback)
+
+    def flush(self, timeout=None):
+        return self._sender is None or self._sender.drain(timeout)
+
     def is_available(self):
         return self._connected
         # Simulate availability for testing purposes
@@ -35,10 +64,40 @@ class MockProducer(BaseDependency):
 
 class MockMetrics(BaseDependency):
     def __init__(self):
-        self.metrics = {}
+        self.registry = MetricRegistry()
+        self.series = TimeSeriesStore()
+        self.latencies = {}
+
+    @property
+    def metrics(self):
+        return self.registry.snapshot()
+
+    def counter(self, name):
+        return self.registry.counter(name)
+
+    def gauge(self, name):
+        return self.registry.gauge(name)
+
+    def series_recorder(self):
+        return self.series
+
+    def merge_latency(self, operation, histogram):
+        self.latencies.setdefault(operation, LatencyHistogram()).merge(histogram)
 
     def record_send(self, value=1.0, tags=None):
-        self.metrics["messages.sent"] = self.metrics.get("messages.sent", 0) + value
+        self.counter("messages.sent").inc(value)
+
+    def latency_histogram(self, operation):
+        return self.latencies.get(operation, LatencyHistogram()).copy()
+
+    def shard(self):
+        return MockMetrics()
+
+    def merge(self, other):
+        self.registry.merge(other.registry)
+        self.series.merge(other.series)
+        for operation, histogram in other.latencies.items():
+            self.merge_latency(operation, histogram)
 
     def is_available(self):
         return True
@@ -0,0 +1,417 @@
+# pulsar/tests/test_suite_load.py
+import threading
+import time
+
+import numpy as np
+
+from testplan.testing.multitest import testsuite, testcase
+
+from pulsar.core.backends import ProducerBackend, check_conformance, register_backend, unregister_backend
+from pulsar.core.broker import BrokerClient, LoopbackBroker, ServiceTime
+from pulsar.core.dependencies import Consumer, Producer
+from pulsar.core.exceptions import PulsarBrokerQueueFullError, PulsarStageInvalidParameterError
+from pulsar.core.harness import BackendComparison, BackendRun, compare_backends
+from pulsar.core.inflight import AsyncSender
+from pulsar.core.latency import EndToEndRecorder, measure_clock_offset
+from pulsar.core.models import StageResult, StageStatus
+from pulsar.core.payload import PayloadPool, read_header
+from pulsar.core.producer_group import Partition, ProducerGroup, key_hash
+from pulsar.stages.consume_messages import ConsumeMessagesStage
+from pulsar.stages.send_messages import SendMessagesStage
+from pulsar.tests.mock_dependencies import MockLogger, MockProducer, MockMetrics
+from pulsar.utils.helpers import create_context
+
+
+class StallingProducer(MockProducer):
+    """Producer whose send blocks once, like a broker pausing"""
+
+    def __init__(self, stall_at: int, stall: float):
+        super().__init__()
+        self.stall_at = stall_at
+        self.stall = stall
+
+    def send_message(self, msg):
+        if len(self.messages) == self.stall_at:
+            time.sleep(self.stall)
+        super().send_message(msg)
+
+
+class RoundTripProducer(MockProducer):
+    """Producer whose sends take a round trip, with a broker serving many sends at once"""
+
+    def __init__(self, rtt: float, max_pending: int):
+        super().__init__()
+        self.rtt = rtt
+        self.max_pending = max_pending
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+
+    def send_message(self, msg):
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        time.sleep(self.rtt)
+        with self._lock:
+            self.in_flight -= 1
+        super().send_message(msg)
+
+    def send_async(self, msg, callback=None):
+        if self._sender is None:
+            self._sender = AsyncSender(self.send_message, self.max_pending)
+        return self._sender.submit(msg, callback)
+
+
+def send(env, result, producer, **params):
+    """Run SendMessagesStage against the given producer and return its output"""
+    metrics = MockMetrics()
+    SendMessagesStage.set_dependencies(producer=producer, metrics=metrics, logger=MockLogger())
+    params.setdefault("duration", 1)
+    stage_result = SendMessagesStage().execute(create_context(env, result, **params))
+    return stage_result, metrics
+
+
+def consume(env, result, consumer, **params):
+    """Run ConsumeMessagesStage against the given consumer and return its output"""
+    metrics = MockMetrics()
+    ConsumeMessagesStage.set_dependencies(consumer=consumer, metrics=metrics, logger=MockLogger())
+    params.setdefault("duration", 5)
+    params.setdefault("idle_timeout", 0.2)
+    stage_result = ConsumeMessagesStage().execute(create_context(env, result, **params))
+    return stage_result, metrics
+
+
+@testsuite(name="Load Generation Test Suite")
+class LoadTestSuite:
+    """Test suite for paced and open-loop message sending"""
+
+    @testcase
+    def test_open_loop_latency_includes_backlog(self, env, result):
+        """A stall should show up in every message queued behind it, not only in the stalled one"""
+        params = dict(num_messages=200, rate=1000)
+
+        open_result, _ = send(env, result, StallingProducer(stall_at=50, stall=0.05), mode="open", **params)
+        closed_result, _ = send(env, result, StallingProducer(stall_at=50, stall=0.05), mode="closed", **params)
+        corrected_result, metrics = send(
+            env, result, StallingProducer(stall_at=50, stall=0.05), mode="closed", correct_latency=True, **params
+        )
+
+        for stage_result in (open_result, closed_result, corrected_result):
+            result.equal(stage_result.status, StageStatus.COMPLETED, "Stage completed")
+            result.equal(stage_result.result["messages_sent"], 200, "Every message was sent")
+
+        open_latency = open_result.result["latency_ms"]
+        closed_latency = closed_result.result["latency_ms"]
+        corrected_latency = corrected_result.result["latency_ms"]
+        result.greater(open_latency["p90"], 10.0, "Open loop charges queued messages for the stall")
+        result.less(closed_latency["p90"], 10.0, "Closed loop hides the stall behind one sample")
+        result.greater(corrected_latency["p90"], 10.0, "Correction backfills the samples the stall hid")
+        result.greater_equal(open_result.result["max_lag_ms"], 40.0, "Schedule lag was reported")
+        result.equal(metrics.latencies["send"].total_count, corrected_latency["count"], "Latencies reached the metrics")
+
+    @testcase
+    def test_open_loop_holds_target_rate(self, env, result):
+        """Sends should follow the intended timeline rather than run flat out"""
+        start = time.perf_counter()
+        stage_result, _ = send(env, result, MockProducer(), num_messages=300, rate=2000, mode="open")
+        elapsed = time.perf_counter() - start
+
+        result.greater_equal(elapsed, 0.149, "Sends were spread over the schedule")
+        result.less(abs(stage_result.result["achieved_rate"] - 2000) / 2000, 0.05, "Achieved rate matches the target")
+
+    @testcase
+    def test_duration_mode_runs_at_target_rate(self, env, result):
+        """Sending for a duration should follow the token bucket's rate and ramp-up"""
+        steady, _ = send(env, result, MockProducer(), until="duration", duration=0.5, rate=2000, burst=10)
+        ramped, _ = send(env, result, MockProducer(), until="duration", duration=0.5, rate=2000, ramp_up=0.5)
+
+        result.equal(steady.status, StageStatus.COMPLETED, "Stage completed without num_messages")
+        result.less(abs(steady.result["elapsed"] - 0.5), 0.05, "Stage ran for the requested duration")
+        result.less(abs(steady.result["messages_sent"] - 1000) / 1000, 0.05, "Steady run sent rate x duration messages")
+        result.less(abs(ramped.result["messages_sent"] - 500) / 500, 0.15, "Ramp-up halved the messages sent over the ramp")
+
+        capped, _ = send(env, result, MockProducer(), until="duration", duration=0.3, rate=2000, num_messages=100)
+        result.greater(capped.result["messages_sent"], 500, "num_messages does not end a duration run")
+
+    @testcase
+    def test_batches_flush_on_size_and_linger(self, env, result):
+        """Messages should be grouped into batches, flushed when full or when they lingered"""
+        producer = MockProducer()
+        full, metrics = send(env, result, producer, num_messages=1000, batch_size=64)
+        result.equal(producer.messages, [f"Test message {i}" for i in range(1000)], "Messages kept their order")
+        result.equal(producer.batches, [64] * 15 + [40], "Batches were flushed when full, then at the end")
+        result.equal(full.result["batching"]["flush_reasons"]["size"], 15, "Size flushes were counted")
+        result.equal(metrics.metrics["batches.sent"], 16, "Per-batch metrics were recorded")
+
+        producer = MockProducer()
+        lingered, _ = send(env, result, producer, num_messages=100, rate=500, batch_size=1000, linger_ms=20)
+        result.equal(len(producer.messages), 100, "Every message was sent")
+        result.greater(lingered.result["batching"]["flush_reasons"]["linger"], 0, "Slow batches were flushed by linger")
+        result.less_equal(max(producer.batches), 15, "Linger bounded how long messages waited")
+
+    @testcase
+    def test_send_async_pipelines_within_window(self, env, result):
+        """Async sends should overlap round trips, never exceeding the in-flight window"""
+        producer = RoundTripProducer(rtt=0.005, max_pending=32)
+        stage_result, metrics = send(env, result, producer, num_messages=400, send_async=True, max_pending=16)
+
+        result.equal(stage_result.status, StageStatus.COMPLETED, "Stage completed")
+        result.equal(len(producer.messages), 400, "Every message was sent")
+        result.less_equal(producer.peak_in_flight, 16, "The stage window bounded messages in flight")
+        result.greater(producer.peak_in_flight, 1, "Sends overlapped")
+        result.greater(stage_result.result["achieved_rate"], 2 / producer.rtt, "Pipelining beat one send per round trip")
+        result.equal(metrics.latencies["send"].total_count, 400, "Every completion recorded a latency")
+        result.greater_equal(stage_result.result["latency_ms"]["p50"], 5.0, "Latency covers the round trip")
+        result.equal(metrics.metrics["messages.sent"], 400, "Completions were counted")
+
+        # A broker serving 32 requests at once, 5ms each: one send at a time would take 2s
+        broker = LoopbackBroker(service_time=ServiceTime("fixed", 5.0), workers=32)
+        producer = Producer({"broker": broker, "max_pending": 32, "send_workers": 16})
+        stage_result, _ = send(env, result, producer, num_messages=400, send_async=True)
+        result.equal(broker.depth("pulsar"), 400, "The real Producer sent every message")
+        result.greater(stage_result.result["achieved_rate"], 4 / 0.005, "The real Producer pipelined its window")
+        sender = AsyncSender(producer.send_message)
+        result.less_equal(sender._executor._max_workers, 32, "The default window does not start a thread per message")
+        sender.close()
+
+    @testcase
+    def test_producer_group_routes_partitions(self, env, result):
+        """A producer group should spread sends over its partitions, counting each one"""
+        metrics = MockMetrics()
+        group = ProducerGroup.for_topics({"orders": 2, "audit": 2}, lambda topic, index: MockProducer(), metrics=metrics)
+        stage_result, _ = send(env, result, group, num_messages=400)
+        result.equal(stage_result.status, StageStatus.COMPLETED, "Stage completed")
+        result.equal(list(group.partition_counts().values()), [100] * 4, "Round-robin spread messages evenly")
+        result.equal(metrics.metrics["partition.audit-1.sent"], 100, "Per-partition counters reached the metrics")
+
+        partitions = [Partition("orders", index, MockProducer()) for index in range(3)]
+        group = ProducerGroup(partitions, router="key_hash", key=lambda msg: msg.split(":")[0])
+        for i in range(300):
+            group.send_message(f"customer-{i % 7}:order-{i}")
+        group.flush()
+        group.disconnect()
+        for partition in partitions:
+            keys = {msg.split(":")[0] for msg in partition.producer.messages}
+            result.true(all(key_hash(None, key, 3) == partition.index for key in keys), f"{partition.name} only got its keys")
+        result.equal(sum(len(p.producer.messages) for p in partitions), 300, "Every keyed message was sent")
+
+    @testcase
+    def test_payload_pool_stamps_preallocated_buffers(self, env, result):
+        """Generated payloads should follow the size distribution and carry their sequence and send time"""
+        producer = RoundTripProducer(rtt=0.0, max_pending=8)
+        before = time.time_ns()
+        stage_result, metrics = send(env, result, producer, num_messages=500, payload_size=64, send_async=True)
+        headers = [read_header(msg) for msg in producer.messages]
+
+        result.equal(sorted(seq for seq, _, _ in headers), list(range(500)), "Every payload carried its sequence number")
+        result.true(all(before <= stamp <= time.time_ns() for _, stamp, _ in headers), "Payloads were stamped at send time")
+        result.equal({len(msg) for msg in producer.messages}, {64}, "Payloads have the fixed size")
+        result.equal(int(metrics.series.bytes.sum()), 500 * 64, "Payload bytes were recorded")
+        result.equal(stage_result.result["payload"]["mean_size"], 64.0, "Payload sizes were reported")
+
+        broker = LoopbackBroker()
+        send(env, result, Producer({"broker": broker}), num_messages=2000, payload_size=64, batch_size=2000)
+        sequences = {read_header(msg)[0] for msg in broker.consume("pulsar", 2000)}
+        result.equal(len(sequences), 2000, "Buffers held in a pending batch were not reused")
+        with result.raises(PulsarStageInvalidParameterError, description="A pool smaller than a batch is refused"):
+            send(env, result, Producer({"broker": broker}), num_messages=10, payload_size=64, batch_size=200, payload_pool=100)
+
+        lognormal = PayloadPool(size=1000, distribution="lognormal", sigma=0.5, pool_size=4000, seed=1)
+        result.less(abs(float(np.median(lognormal.sizes)) - 1000) / 1000, 0.05, "Lognormal sizes centre on the median")
+        empirical = PayloadPool(distribution="empirical", sizes=[(100, 0.9), (10_000, 0.1)], pool_size=1000, seed=1)
+        result.equal(set(empirical.sizes.tolist()), {100, 10_000}, "Empirical sizes come from the histogram")
+        result.less(abs(float((empirical.sizes == 100).mean()) - 0.9), 0.05, "Empirical sizes follow their weights")
+
+    @testcase
+    def test_sharded_run_merges_worker_metrics(self, env, result):
+        """Splitting a run over processes should divide the work and merge what every worker recorded"""
+        stage_result, metrics = send(env, result, MockProducer(), num_messages=1001, rate=2000, processes=2)
+
+        result.equal(stage_result.status, StageStatus.COMPLETED, "Stage completed")
+        result.equal([shard["messages_sent"] for shard in stage_result.result["shards"]], [501, 500], "num_messages was split")
+        result.equal([shard["target_rate"] for shard in stage_result.result["shards"]], [1000, 1000], "The rate was split")
+        result.equal(metrics.metrics["messages.sent"], 1001, "Worker counters were merged")
+        result.equal(metrics.latencies["send"].total_count, 1001, "Worker latencies were merged")
+        result.equal(int(metrics.series.sends.sum()), 1001, "Worker time series were merged")
+        result.less(abs(stage_result.result["achieved_rate"] - 2000) / 2000, 0.1, "Workers together held the target rate")
+
+        broker = LoopbackBroker()
+        with result.raises(PulsarStageInvalidParameterError, description="An in-process broker is not split over processes"):
+            send(env, result, Producer({"broker": broker}), num_messages=200, processes=2)
+        server = broker.serve()
+        try:
+            host, port = server.server_address
+            stage_result, _ = send(env, result, Producer({"broker_address": f"{host}:{port}"}), num_messages=200, processes=2)
+        finally:
+            server.close()
+        result.equal(stage_result.status, StageStatus.COMPLETED, "Workers reached a served broker")
+        result.equal(broker.stats()["produced"], 200, "The parent's broker received every shard's messages")
+
+    @testcase
+    def test_loopback_broker_serves_producers(self, env, result):
+        """Producers should reach the loopback broker in-process and over TCP, within its limits"""
+        broker = LoopbackBroker(ServiceTime("fixed", mean_ms=2.0), workers=4)
+        producer = Producer({"broker": broker, "max_pending": 16, "send_workers": 4})
+        stage_result, _ = send(env, result, producer, num_messages=200, send_async=True)
+        result.equal(broker.stats()["produced"], 200, "The broker acknowledged every message")
+        result.greater_equal(stage_result.result["latency_ms"]["p50"], 2.0, "Latency includes the service time")
+        result.greater(stage_result.result["achieved_rate"], 1000, "Broker workers served sends concurrently")
+
+        broker = LoopbackBroker()
+        server = broker.serve()
+        client = BrokerClient(server.server_address)
+        try:
+            host, port = server.server_address
+            send(env, result, Producer({"broker_address": f"{host}:{port}", "topic": "tcp"}), num_messages=100, batch_size=30)
+            consumed = client.consume("tcp", max_messages=1000, timeout=1.0)
+            result.equal(consumed, [f"Test message {i}".encode() for i in range(100)], "Messages crossed the socket in order")
+        finally:
+            client.close()
+            server.close()
+
+        bounded = LoopbackBroker(max_queue=10)
+        for i in range(10):
+            bounded.produce("bounded", i)
+        with result.raises(PulsarBrokerQueueFullError, description="A full topic rejects produce requests"):
+            bounded.produce("bounded", 10)
+        result.equal(bounded.consume("bounded", max_messages=3), [0, 1, 2], "Consumers drain the oldest messages")
+
+        throttled = LoopbackBroker(throttle_rate=1000)
+        start = time.perf_counter()
+        for i in range(200):
+            throttled.produce("throttled", i)
+        result.greater_equal(time.perf_counter() - start, 0.19, "The throttle held produce requests to its rate")
+
+    @testcase
+    def test_backends_compared_under_identical_load(self, env, result):
+        """Registered backends should conform to the protocol and run the same workload side by side"""
+        register_backend("mock", lambda config: MockProducer())
+        try:
+            comparison = compare_backends({"num_messages": 300, "duration": 5, "record_latency": True}, ["loopback", "mock"])
+            paced = compare_backends({"num_messages": 300, "duration": 5, "rate": 3000}, ["mock"])
+        finally:
+            unregister_backend("mock")
+
+        rows = comparison.to_dict()["backends"]
+        result.equal([row["backend"] for row in rows], ["loopback", "mock"], "Every backend ran")
+        result.equal([row["messages_sent"] for row in rows], [300, 300], "Backends got the same workload")
+        result.true(all(row["problems"] == [] for row in rows), "Backends conform to the protocol")
+        result.true(all(row["achieved_rate"] > 0 for row in rows), "Closed-loop throughput was measured per backend")
+        result.true(all(row["p99"] > 0 for row in rows), "Closed-loop latencies were recorded per backend")
+        result.greater(paced.to_dict()["backends"][0]["p99"], 0, "Paced latencies were recorded")
+
+        unpaced, metrics = send(env, result, MockProducer(), num_messages=300, payload_size=64)
+        result.greater(unpaced.result["achieved_rate"], 0, "Peak throughput was measured")
+        result.equal(metrics.latency_histogram("send").total_count, 0, "Sends were not timed unless asked")
+        result.equal(metrics.metrics["messages.sent"], 300, "Sends were counted")
+        result.equal((int(metrics.series.sends.sum()), int(metrics.series.bytes.sum())), (300, 300 * 64),
+                     "Sends and bytes reached the time series")
+
+        failed = BackendComparison({}, [BackendRun("broken", frozenset(), [], StageResult("send_messages", StageStatus.FAILED), MockMetrics())])
+        result.contain("n/a", failed.to_text(), "What a run did not measure is shown as n/a, not 0")
+        result.true(isinstance(MockProducer(), ProducerBackend), "MockProducer implements the protocol")
+        result.contain("missing send_async()", check_conformance(object()), "Missing methods are reported")
+        result.log(comparison.to_text())
+
+    @testcase
+    def test_end_to_end_latency_from_payload_stamps(self, env, result):
+        """Receivers should decode send stamps into publish-to-receive latency, correcting for clock offsets"""
+        broker = LoopbackBroker()
+        consumer = Consumer({"broker": broker})
+        consumer.connect()
+        recorder = EndToEndRecorder()
+        done = threading.Event()
+
+        def receive():
+            while not done.is_set() or broker.depth("pulsar"):
+                recorder.record_all(consumer.receive(max_messages=100, timeout=0.01))
+
+        receiver = threading.Thread(target=receive)
+        receiver.start()
+        try:
+            send(env, result, Producer({"broker": broker}), num_messages=500, rate=5000, payload_size=64)
+        finally:
+            done.set()
+            receiver.join()
+            consumer.close()
+
+        summary = recorder.summary()
+        result.equal(summary["received"], 500, "Every message was received")
+        result.equal((summary["missing"], summary["reordered"], summary["duplicates"]), (0, 0, 0), "Deliveries were complete and in order")
+        result.greater(summary["latency_ms"]["p50"], 0.0, "Latency was measured")
+        result.less(summary["latency_ms"]["max"], 1000.0, "Latency spans publish to receive only")
+        result.equal((recorder._low_water, recorder._above), (500, set()), "In-order sequences are kept as a low-water mark")
+
+        pool = PayloadPool(size=32, pool_size=1)
+        bounded = EndToEndRecorder(reorder_window=4)
+        for sequence in [0, 2, 1, 1, 3, *range(5, 11)]:
+            bounded.record(pool.payload(sequence))
+        result.equal(
+            (bounded.missing(), bounded.duplicates, bounded.reordered), (1, 1, 1),
+            "Gaps, duplicates and reordering are counted with a bounded window"
+        )
+        result.equal(bounded._above, set(), "The gap past the reorder window was given up")
+
+        skew_ns = 5_000_000_000
+        offset = measure_clock_offset(lambda: time.time_ns() + skew_ns)
+        result.less(abs(offset.offset_ns - skew_ns), 1_000_000, "The clock offset was estimated")
+        skewed = PayloadPool(size=32, pool_size=1, clock=lambda: time.time_ns() + skew_ns)
+        corrected = EndToEndRecorder(clock="realtime", offset=offset)
+        result.less(corrected.record(skewed.payload(0)), 10.0, "Realtime stamps were moved onto the local clock")
+        result.equal(corrected.negative, 0, "No stamp landed in the future")
+
+    @testcase
+    def test_consumers_drain_backlog_and_acknowledge(self, env, result):
+        """Consumers sharing a subscription should drain the backlog, acknowledging every message"""
+        broker = LoopbackBroker()
+        pool = PayloadPool(size=64)
+        broker.produce_batch("pulsar", [bytes(pool.payload(seq)) for seq in range(1000)])
+
+        stage_result, metrics = consume(env, result, Consumer({"broker": broker}), consumers=2,
+                                        receive_mode="batch", batch_size=50, receiver_queue_size=200,
+                                        ack_mode="batched", ack_batch_size=100, end_to_end=True)
+        summary = stage_result.result
+        result.equal(stage_result.status, StageStatus.COMPLETED, "Stage completed")
+        result.equal(summary["messages_received"], 1000, "The whole backlog was received")
+        result.equal(sum(summary["per_consumer"]), 1000, "Consumers split the backlog")
+        result.equal(broker.stats()["acked"], 1000, "Every message was acknowledged")
+        result.equal(broker._acked_above["pulsar"], set(), "Contiguous acks were folded into the low-water mark")
+        result.equal(broker.depth("pulsar"), 0, "The backlog was drained")
+        result.equal(
+            (summary["end_to_end"]["missing"], summary["end_to_end"]["duplicates"]), (0, 0),
+            "Delivery gaps and duplicates were counted across consumers"
+        )
+        result.greater(summary["drain_time"], 0.0, "Backlog drain time was measured")
+        result.greater(summary["receive_rate"], 0.0, "Receive throughput was measured")
+        result.equal(metrics.latency_histogram("end_to_end").total_count, 1000, "End-to-end latency was recorded")
+
+        broker.produce_batch("pulsar", [b"x"] * 500)
+        stage_result, _ = consume(env, result, Consumer({"broker": broker}), num_messages=300,
+                                  receive_mode="batch", batch_size=100, ack_mode="cumulative")
+        result.equal(stage_result.result["messages_received"], 300, "Receiving stopped at num_messages")
+        result.equal(stage_result.result["ack_requests"], 3, "One cumulative ack per batch")
+        result.equal(broker.depth("pulsar"), 200, "The rest of the backlog is left")
+        result.equal(broker.stats()["acked"], 1300, "Cumulative acks covered every received message")
+
+        with result.raises(PulsarStageInvalidParameterError, description="Cumulative acks are refused on shared subscriptions"):
+            consume(env, result, Consumer({"broker": broker}), consumers=2, ack_mode="cumulative")
+
+    @testcase
+    def test_adaptive_rate_converges_on_sustainable_throughput(self, env, result):
+        """An adaptive sender should back off when the broker cannot keep up and settle near its capacity"""
+        # One worker serving each request in 1ms sustains at most ~1000 messages/s
+        broker = LoopbackBroker(service_time=ServiceTime("fixed", 1.0))
+        stage_result, metrics = send(env, result, Producer({"broker": broker}), until="duration", duration=1.5,
+                                     rate=200, adaptive=True, rate_step=200, adjust_interval=0.05)
+        adaptive = stage_result.result["adaptive"]
+        reasons = {point["reason"] for point in adaptive["trajectory"]}
+        result.equal(stage_result.status, StageStatus.COMPLETED, "Stage completed")
+        result.greater(adaptive["cuts"], 0, "The rate was cut once sends fell behind")
+        result.contain("increase", reasons, "The rate was raised while sends kept up")
+        result.greater(adaptive["sustained_rate"], 300.0, "The rate climbed towards capacity")
+        result.less(adaptive["sustained_rate"], 1500.0, "The rate stayed near capacity")
+        result.equal(metrics.registry.get("send.target_rate"), adaptive["final_rate"], "The rate gauge tracks the controller")
+        result.equal(metrics.registry.get("send.rate_cuts"), adaptive["cuts"], "Cuts were counted")
+
+        with result.raises(PulsarStageInvalidParameterError, description="Adaptive sending needs a starting rate"):
+            send(env, result, MockProducer(), num_messages=10, adaptive=True)
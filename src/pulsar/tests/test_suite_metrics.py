@@ -0,0 +1,148 @@
+# pulsar/tests/test_suite_metrics.py
+import os
+import pickle
+import random
+import tempfile
+import threading
+
+import numpy as np
+
+from testplan.testing.multitest import testsuite, testcase
+
+from pulsar.core.dependencies import Metrics
+from pulsar.core.histogram import LatencyHistogram
+from pulsar.core.timeseries import TimeSeriesStore
+
+
+@testsuite(name="Metrics Test Suite")
+class MetricsTestSuite:
+    """Test suite for the metrics dependency and its recorders"""
+
+    @testcase
+    def test_histogram_percentiles_within_precision(self, env, result):
+        """Percentiles should stay within the configured relative error of the exact values"""
+        rng = random.Random(42)
+        values = sorted(int(rng.lognormvariate(7, 1)) + 1 for _ in range(50_000))
+        histogram = LatencyHistogram(significant_figures=3)
+        for value in values:
+            histogram.record(value)
+
+        for percentile in (50, 90, 99, 99.9):
+            exact = values[int(len(values) * percentile / 100) - 1]
+            result.less_equal(
+                abs(histogram.percentile(percentile) - exact) / exact, 0.001,
+                f"p{percentile} is within 3 significant figures"
+            )
+        result.equal(histogram.percentile(100), values[-1], "p100 is the exact maximum")
+
+        restored = LatencyHistogram.from_dict(histogram.to_dict())
+        result.equal(restored.summary(), histogram.summary(), "Exported histogram round-trips")
+
+    @testcase
+    def test_latency_merged_across_threads(self, env, result):
+        """Latency samples from every thread should end up in the operation's histogram"""
+        metrics = Metrics()
+
+        def record():
+            for i in range(1000):
+                metrics.record_latency(i / 100, operation="send")
+
+        threads = [threading.Thread(target=record) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        histogram = metrics.latency_histogram("send")
+        result.equal(histogram.total_count, 4000, "No sample was lost")
+        result.equal(histogram.max, 9990, "Latencies are kept in microseconds")
+
+        worker = pickle.loads(pickle.dumps(metrics))
+        worker.record_latency(50.0, operation="send")
+        metrics.merge_latency("send", worker.latency_histogram("send"))
+        summary = metrics.latency_summary()["pulsar.latency.send"]
+        result.equal(summary["count"], 8001, "Histograms merge across processes")
+        result.equal(summary["max"], 50.0, "Summary is reported in milliseconds")
+        result.equal(metrics._thread_histograms["send"], [], "Histograms of finished threads were folded")
+
+        run = LatencyHistogram()
+        run.record(1000)
+        for _ in range(200):
+            metrics.merge_latency("send", run)
+        result.equal(len(metrics._histograms), 1, "Merged runs accumulate into one histogram")
+        result.equal(metrics.latency_histogram("send").total_count, 8201, "Every merged run was counted")
+
+    @testcase
+    def test_sharded_counter_sums_thread_shards(self, env, result):
+        """Counter handles should count every increment from every thread without locking"""
+        metrics = Metrics()
+        sent = metrics.counter("messages.sent")
+        in_flight = metrics.gauge("messages.in_flight")
+
+        def send():
+            for _ in range(10_000):
+                sent.inc()
+                metrics.record_send()
+
+        threads = [threading.Thread(target=send) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        in_flight.set(3)
+
+        result.true(metrics.counter("messages.sent") is sent, "Handles are resolved once per name")
+        result.equal(metrics.get_metric("pulsar.messages.sent"), 160_000, "Shards are summed on read")
+        result.equal(metrics.registry.snapshot()["pulsar.messages.in_flight"], 3, "Gauges are read by name")
+
+        worker = pickle.loads(pickle.dumps(metrics))
+        worker.counter("messages.sent").inc(5)
+        result.equal(worker.get_metric("pulsar.messages.sent"), 160_005, "Counters carry their value across processes")
+
+    @testcase
+    def test_time_series_shows_stalls(self, env, result):
+        """Per-interval throughput should expose a mid-run stall and survive save/load"""
+        series = TimeSeriesStore(interval=0.1, start=0.0)
+        for i in range(2000):
+            timestamp = (i + 0.5) / 1000
+            if 1.0 <= timestamp < 1.3:
+                continue
+            series.record_send(nbytes=100, timestamp=timestamp)
+            series.record_latency(5.0 if i % 100 == 0 else 1.0, timestamp=timestamp)
+
+        result.equal(series.sends.tolist(), [100] * 10 + [0] * 3 + [100] * 7, "Sends were bucketed per interval")
+        result.equal(series.rate()[0], 1000.0, "Rate is reported per second")
+        result.equal(series.stalls().round(1).tolist(), [1.0, 1.1, 1.2], "Stalled intervals were found")
+        result.less(series.rolling_percentile(50, window=10)[9], 1.05, "Rolling median is within bucket precision")
+        result.greater(series.rolling_percentile(99.9, window=10)[9], 5.0, "Rolling tail picks up slow samples")
+        result.true(np.isnan(series.rolling_percentile(50, window=3)[12]), "Windows without samples have no percentile")
+        result.equal(series.rolling_percentile(50, window=3)[13], series.rolling_percentile(50, window=1)[13],
+                     "Windows only count the intervals they cover")
+        for statistic in (series.rate, series.byte_rate, series.latency_mean, lambda window: series.rolling_percentile(50, window)):
+            with result.raises(ValueError, description="An empty window is rejected"):
+                statistic(0)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "series.npz")
+            series.save(path)
+            loaded = TimeSeriesStore.load(path)
+        result.equal(loaded.latency_counts.tolist(), series.latency_counts.tolist(), "Store round-trips through save/load")
+        result.equal(loaded.bytes.sum(), 170_000, "Bytes were kept")
+        result.equal(len(series._latency_keys), 2 * 17, "Only non-zero latency buckets are stored")
+
+        metrics = Metrics()
+        done = threading.Event()
+
+        def record():
+            recorder = metrics.series_recorder()
+            for i in range(200_000):
+                recorder.record_send(nbytes=10)
+                recorder.record_latency(1.0)
+            done.set()
+
+        writer = threading.Thread(target=record)
+        writer.start()
+        while not done.is_set():
+            metrics.time_series()
+        writer.join()
+        result.equal(int(metrics.time_series().sends.sum()), 200_000, "Reads during a run neither fail nor lose events")
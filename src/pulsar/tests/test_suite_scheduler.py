@@ -0,0 +1,509 @@
+# pulsar/tests/test_suite_scheduler.py
+import asyncio
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Optional
+
+from testplan.testing.multitest import testsuite, testcase
+
+from pulsar.core.builder import WorkflowBuilder
+from pulsar.core.cache import StageResultCache
+from pulsar.core.checkpoint import CheckpointStore
+from pulsar.core.command import StageCommand, AsyncStageCommand
+from pulsar.core.exceptions import PulsarStageConfigurationError, PulsarStageCycleError
+from pulsar.core.models import StageResult, StageStatus
+from pulsar.core.observer import StageObserver, ObserverBus
+from pulsar.core.stream import StageStream
+from pulsar.stages.base_stage import BaseStage
+from pulsar.stages.send_messages import SendMessagesStage
+from pulsar.tests.mock_dependencies import MockLogger, MockProducer, MockMetrics
+from pulsar.utils.helpers import create_context
+
+
+class SleepStage(StageCommand):
+    """Stage that sleeps and records when it ran"""
+
+    def __init__(self, name: str, delay: float = 0.2, fail: bool = False):
+        super().__init__(name)
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def execute(self, context: dict[str, Any]) -> StageResult:
+        with self._lock:
+            self.calls += 1
+        self.status = StageStatus.RUNNING
+        self.started_at = time.monotonic()
+        time.sleep(self.delay)
+        self.finished_at = time.monotonic()
+        if self.fail:
+            self.status = StageStatus.FAILED
+            return StageResult(self.name, StageStatus.FAILED, error=RuntimeError(f"{self.name} failed"))
+        self.status = StageStatus.COMPLETED
+        return StageResult(self.name, StageStatus.COMPLETED, result=self.name)
+
+
+class AsyncSleepStage(AsyncStageCommand):
+    """Stage that awaits a sleep instead of blocking a thread"""
+
+    def __init__(self, name: str, delay: float = 0.2):
+        super().__init__(name)
+        self.delay = delay
+
+    async def execute_async(self, context: dict[str, Any]) -> StageResult:
+        self.status = StageStatus.RUNNING
+        await asyncio.sleep(self.delay)
+        self.status = StageStatus.COMPLETED
+        return StageResult(self.name, StageStatus.COMPLETED, result=self.name)
+
+
+class CacheObserver(StageObserver):
+    """Observer collecting cache hit/miss notifications"""
+
+    def __init__(self):
+        self.events = []
+
+    def update(self, result: StageResult) -> None:
+        if result.metadata and "cache" in result.metadata:
+            self.events.append(result.metadata["cache"])
+
+
+class SlowObserver(StageObserver):
+    """Observer taking a while to handle every status change"""
+
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.results = []
+
+    def update(self, result: StageResult) -> None:
+        time.sleep(self.delay)
+        self.results.append((result.stage_name, result.status))
+
+
+class ReplayLogsStage(BaseStage):
+    """Stage streaming log lines, tracking how far it runs ahead of the producer"""
+
+    name = "replay_logs"
+    dependencies = []
+    metadata = {"stream_buffer": 16}
+
+    def __init__(self, producer: MockProducer, num_lines: int):
+        super().__init__()
+        self.producer = producer
+        self.num_lines = num_lines
+        self.max_lag = 0
+
+    def run(self, context: dict[str, Any]) -> Any:
+        for i in range(self.num_lines):
+            self.max_lag = max(self.max_lag, i - len(self.producer.messages))
+            yield f"log line {i}"
+
+
+class RelayStage(StageCommand):
+    """Stage streaming numbered records, or relaying the stream of an upstream stage"""
+
+    def __init__(self, name: str, upstream: Optional[str] = None, num_records: int = 100):
+        super().__init__(name)
+        self.upstream = upstream
+        self.num_records = num_records
+        self.calls = 0
+
+    def execute(self, context: dict[str, Any]) -> StageResult:
+        self.calls += 1
+        if self.upstream:
+            upstream = context["stage_results"][self.upstream].result
+            records = (record for record in upstream)
+        else:
+            records = iter(range(self.num_records))
+        self.status = StageStatus.COMPLETED
+        return StageResult(self.name, StageStatus.COMPLETED, result=StageStream(records, name=self.name))
+
+
+class DrainStage(StageCommand):
+    """Stage counting the records of an upstream stream, optionally failing afterwards"""
+
+    def __init__(self, name: str, upstream: str, fail: bool = False):
+        super().__init__(name)
+        self.upstream = upstream
+        self.fail = fail
+        self.received = 0
+
+    def execute(self, context: dict[str, Any]) -> StageResult:
+        self.received = sum(1 for _ in context["stage_results"][self.upstream].result)
+        self.status = StageStatus.FAILED if self.fail else StageStatus.COMPLETED
+        if self.fail:
+            return StageResult(self.name, StageStatus.FAILED, error=RuntimeError(f"{self.name} failed"))
+        return StageResult(self.name, StageStatus.COMPLETED, result=self.received)
+
+
+class ChecksumStage(BaseStage):
+    """CPU-bound stage run on the process pool, needing its setup to have run where it runs"""
+
+    name = "checksum"
+    dependencies = []
+    metadata = {"executor": "process"}
+    _ready = False
+
+    @classmethod
+    def setup(cls, env: Optional[Any] = None, result: Optional[Any] = None) -> None:
+        cls._ready = True
+
+    def teardown(self, env: Optional[Any] = None, result: Optional[Any] = None) -> None:
+        type(self)._ready = False
+
+    def run(self, context: dict[str, Any]) -> Any:
+        if not self._ready:
+            raise RuntimeError("checksum stage was not set up")
+        limit = context["testcase_params"]["limit"]
+        return os.getpid(), sum(i * i % 7 for i in range(limit))
+
+
+class StreamingChecksumStage(ChecksumStage):
+    """Process stage that wrongly tries to stream its records"""
+
+    name = "streaming_checksum"
+
+    def run(self, context: dict[str, Any]) -> Any:
+        yield from range(context["testcase_params"]["limit"])
+
+
+@testsuite(name="Workflow Scheduler Test Suite")
+class SchedulerTestSuite:
+    """Test suite for DAG scheduling of workflow stages"""
+
+    @testcase
+    def test_independent_stages_run_concurrently(self, env, result):
+        """Independent stages should overlap, so wall time tracks the critical path"""
+        stages = [SleepStage(f"get_{i}") for i in range(4)]
+        builder = WorkflowBuilder("parallel_workflow", max_workers=4)
+        for stage in stages:
+            builder.add_stage(stage)
+        send = SleepStage("send")
+        builder.add_stage(send, depends_on=[stage.name for stage in stages])
+        workflow = builder.build()
+
+        start = time.monotonic()
+        workflow_result = workflow.execute({})
+        elapsed = time.monotonic() - start
+
+        result.equal(workflow_result.status, StageStatus.COMPLETED, "Workflow completed")
+        result.less(elapsed, 0.8, "Independent stages ran concurrently")
+        result.true(
+            all(send.started_at >= stage.finished_at for stage in stages),
+            "Dependent stage started after all of its dependencies"
+        )
+        result.equal(
+            [r.stage_name for r in workflow_result.result],
+            ["get_0", "get_1", "get_2", "get_3", "send"],
+            "Results are reported in topological order"
+        )
+
+    @testcase
+    def test_failure_stops_dependents(self, env, result):
+        """A failed stage should fail the workflow and prevent its dependents from running"""
+        broken = SleepStage("broken", delay=0.01, fail=True)
+        downstream = SleepStage("downstream", delay=0.01)
+        workflow = (
+            WorkflowBuilder("failing_workflow", max_workers=2)
+            .add_stage(broken)
+            .add_stage(downstream, depends_on=["broken"])
+            .build()
+        )
+
+        workflow_result = workflow.execute({})
+
+        result.equal(workflow_result.status, StageStatus.FAILED, "Workflow failed")
+        result.equal(str(workflow_result.error), "broken failed", "Stage error is propagated")
+        result.equal(downstream.calls, 0, "Dependent stage did not run")
+
+    @testcase
+    def test_shared_dependency_runs_once(self, env, result):
+        """A diamond-shaped graph should run its shared dependency once per execution"""
+        root = SleepStage("root", delay=0.01)
+        left = SleepStage("left", delay=0.01)
+        right = SleepStage("right", delay=0.01)
+        join = SleepStage("join", delay=0.01)
+        workflow = (
+            WorkflowBuilder("diamond_workflow")
+            .add_stage(root)
+            .add_stage(left, depends_on=["root"])
+            .add_stage(right, depends_on=["root"])
+            .add_stage(join, depends_on=["left", "right"])
+            .build()
+        )
+
+        result.equal(
+            workflow.plan.levels,
+            (("root",), ("left", "right"), ("join",)),
+            "Plan is levelized"
+        )
+
+        for _ in range(3):
+            workflow.execute({})
+        result.equal(root.calls, 3, "Shared dependency ran once per execution")
+        result.equal(join.calls, 3, "Join stage ran once per execution")
+
+    @testcase
+    def test_cycle_detected_at_build_time(self, env, result):
+        """Cyclic dependencies should be rejected by build()"""
+        first = SleepStage("first")
+        second = SleepStage("second")
+        builder = (
+            WorkflowBuilder("cyclic_workflow")
+            .add_stage(first)
+            .add_stage(second, depends_on=["first"])
+        )
+        first.add_dependency(second)
+
+        with result.raises(PulsarStageCycleError):
+            builder.build()
+
+        collect = SleepStage("collect", delay=0)
+        workflow = WorkflowBuilder("mutated_workflow").add_stage(collect).build()
+        late = SleepStage("late", delay=0)
+        workflow.substages.append(late)
+        workflow.execute({})
+        result.equal(late.calls, 1, "A stage added after build() was scheduled")
+        collect.add_dependency(late)
+        result.equal(workflow.plan.dependencies["collect"], frozenset({"late"}), "The plan follows edges added after build()")
+
+    @testcase
+    def test_async_stages_awaited_concurrently(self, env, result):
+        """Async stages should share one event loop and sync stages should be bridged"""
+        builder = WorkflowBuilder("async_workflow", max_workers=2)
+        for i in range(100):
+            builder.add_stage(AsyncSleepStage(f"wait_{i}"))
+        builder.add_stage(SleepStage("blocking"))
+        builder.add_stage(AsyncSleepStage("report"), depends_on=["wait_0", "blocking"])
+        workflow = builder.build()
+
+        start = time.monotonic()
+        workflow_result = asyncio.run(workflow.execute_async({}))
+        elapsed = time.monotonic() - start
+
+        result.equal(workflow_result.status, StageStatus.COMPLETED, "Workflow completed")
+        result.equal(len(workflow_result.result), 102, "Every stage reported a result")
+        result.less(elapsed, 1.0, "Independent stages were awaited concurrently")
+
+    @testcase
+    def test_cacheable_stage_served_from_cache(self, env, result):
+        """Cacheable stages should run once per distinct parameter set, across cache instances"""
+        with tempfile.TemporaryDirectory() as directory:
+            observer = CacheObserver()
+
+            def build_workflow():
+                stage = SleepStage("collect", delay=0.01)
+                stage.metadata = {"cacheable": True, "version": "1.0.0"}
+                stage.add_observer(observer)
+                workflow = (
+                    WorkflowBuilder("cached_workflow")
+                    .with_cache(StageResultCache(directory=directory, ttl=60))
+                    .add_stage(stage)
+                    .build()
+                )
+                return workflow, stage
+
+            workflow, stage = build_workflow()
+            for params in [{"limit": 1, "log_type": "app"}, {"log_type": "app", "limit": 1}, {"limit": 2}]:
+                workflow_result = workflow.execute({"testcase_params": params})
+                result.equal(workflow_result.status, StageStatus.COMPLETED, "Workflow completed")
+            result.equal(stage.calls, 2, "Equivalent parameters were served from the memory tier")
+
+            # A fresh cache only shares the on-disk tier
+            workflow, stage = build_workflow()
+            workflow.execute({"testcase_params": {"limit": 2}})
+            result.equal(stage.calls, 0, "Result was served from the disk tier")
+            result.equal(observer.events, ["miss", "hit", "miss", "hit"], "Observers saw hits and misses")
+
+            # Stages fall back to top-level params, and so does the key
+            workflow.execute({"limit": 3})
+            workflow.execute({"limit": 4})
+            workflow.execute({"limit": 3})
+            result.equal(stage.calls, 2, "Top-level params were keyed on, not served stale")
+
+    @testcase
+    def test_resume_skips_completed_stages(self, env, result):
+        """Resuming a failed run should only re-run the stages that did not complete"""
+        with tempfile.TemporaryDirectory() as directory:
+            setup_stage = SleepStage("soak_setup", delay=0.01)
+            flaky = SleepStage("soak_report", delay=0.01, fail=True)
+            workflow = (
+                WorkflowBuilder("soak_workflow")
+                .with_checkpoints(CheckpointStore(directory))
+                .add_stage(setup_stage)
+                .add_stage(flaky, depends_on=["soak_setup"])
+                .build()
+            )
+
+            failed_run = workflow.execute({})
+            result.equal(failed_run.status, StageStatus.FAILED, "First run failed in its last stage")
+            run_id = failed_run.metadata["run_id"]
+
+            flaky.fail = False
+            resumed_run = workflow.execute({}, resume=run_id)
+            result.equal(resumed_run.status, StageStatus.COMPLETED, "Resumed run completed")
+            result.equal(resumed_run.metadata["run_id"], run_id, "Resumed run kept its run ID")
+            result.equal(setup_stage.calls, 1, "Completed stage was not re-run")
+            result.equal(flaky.calls, 2, "Failed stage was re-run")
+            result.equal(
+                [r.result for r in resumed_run.result],
+                ["soak_setup", "soak_report"],
+                "Stored output was fed back into the workflow result"
+            )
+
+    @testcase
+    def test_resume_reruns_streamed_chains(self, env, result):
+        """Resuming should re-run every stream feeding a failed stage, however far up the chain"""
+        with tempfile.TemporaryDirectory() as directory:
+            read = RelayStage("read")
+            parse = RelayStage("parse", upstream="read")
+            load = DrainStage("load", upstream="parse", fail=True)
+            workflow = (
+                WorkflowBuilder("chained_streams")
+                .with_checkpoints(CheckpointStore(directory))
+                .add_stage(read)
+                .add_stage(parse, depends_on=["read"])
+                .add_stage(load, depends_on=["parse"])
+                .build()
+            )
+
+            failed_run = workflow.execute({})
+            result.equal(failed_run.status, StageStatus.FAILED, "First run failed in its last stage")
+
+            load.fail = False
+            resumed_run = workflow.execute({}, resume=failed_run.metadata["run_id"])
+            result.equal(resumed_run.status, StageStatus.COMPLETED, "Resumed run completed")
+            result.equal((read.calls, parse.calls), (2, 2), "Both streams of the chain were re-run")
+            result.equal(load.received, 100, "The failed stage got every record again")
+
+    @testcase
+    def test_process_executor_runs_stage_in_worker(self, env, result):
+        """A stage with the process policy should be set up and run in a pool worker"""
+        ChecksumStage.set_dependencies()
+        stage_result = ChecksumStage().execute({"testcase_params": {"limit": 100_000}})
+        result.equal(stage_result.status, StageStatus.COMPLETED, "Stage completed")
+        pid, checksum = stage_result.result
+        result.not_equal(pid, os.getpid(), "run() ran in another process")
+        result.equal(checksum, sum(i * i % 7 for i in range(100_000)), "The worker's result came back")
+
+        StreamingChecksumStage.set_dependencies()
+        with result.raises(PulsarStageConfigurationError, description="Generator stages cannot run in a process"):
+            StreamingChecksumStage().execute({"testcase_params": {"limit": 10}})
+
+    @testcase
+    def test_checkpoint_write_failure_is_not_fatal(self, env, result):
+        """A checkpoint that cannot be written should be reported, not raised, and leave no temp file"""
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoints = CheckpointStore(directory)
+            os.makedirs(os.path.join(directory, "run", "setup" + checkpoints.suffix))
+            saved = checkpoints.save("run", StageResult("setup", StageStatus.COMPLETED, result="ok"))
+            result.false(saved, "Failed write was reported")
+            result.equal(os.listdir(os.path.join(directory, "run")), ["setup" + checkpoints.suffix], "Temp file was removed")
+
+            lost = CheckpointStore(os.path.join(directory, "lost"))
+            os.rmdir(lost.directory)
+            open(lost.directory, "w").close()
+            setup_stage = SleepStage("setup", delay=0)
+            workflow = (
+                WorkflowBuilder("unwritable_workflow")
+                .with_checkpoints(lost)
+                .add_stage(setup_stage)
+                .build()
+            )
+            result.equal(workflow.execute({}).status, StageStatus.COMPLETED, "Stage still completed")
+
+    @testcase
+    def test_streamed_records_are_pipelined(self, env, result):
+        """A generator stage should feed a downstream stage through a bounded stream"""
+        producer = MockProducer()
+        metrics = MockMetrics()
+        SendMessagesStage.set_dependencies(producer=producer, metrics=metrics, logger=MockLogger())
+        replay = ReplayLogsStage(producer, num_lines=2000)
+        checkpoints = CheckpointStore(tempfile.mkdtemp())
+        workflow = (
+            WorkflowBuilder("replay_workflow")
+            .with_checkpoints(checkpoints)
+            .add_stage(replay)
+            .add_stage(SendMessagesStage(), depends_on=["replay_logs"])
+            .build()
+        )
+
+        workflow_result = workflow.execute(
+            create_context(env, result, source="replay_logs", duration=1)
+        )
+        stored = checkpoints.completed(workflow_result.metadata["run_id"])
+        result.equal(stored["replay_logs"].metadata, {"streamed": 2000}, "Streamed stage was checkpointed once joined")
+        checkpoints.clear(workflow_result.metadata["run_id"])
+
+        result.equal(workflow_result.status, StageStatus.COMPLETED, "Workflow completed")
+        result.equal(replay.status, StageStatus.COMPLETED, "Streaming stage completed once drained")
+        result.equal(producer.messages, [f"log line {i}" for i in range(2000)], "Every record was sent in order")
+        result.equal(metrics.metrics["messages.sent"], 2000, "Every send was counted")
+        result.less_equal(replay.max_lag, 18, "Producer never ran further ahead than the stream buffer")
+
+    @testcase
+    def test_observer_bus_keeps_observers_off_the_hot_path(self, env, result):
+        """Slow observers behind a bus should not delay stages, and teardown should flush them"""
+        observer = SlowObserver()
+        stages = [SleepStage(f"get_{i}", delay=0.05) for i in range(4)]
+        bus = ObserverBus([observer])
+        builder = WorkflowBuilder("observed_workflow").with_observer_bus(bus)
+        builder.add_stage(stages[0])
+        for previous, stage in zip(stages, stages[1:]):
+            builder.add_stage(stage, depends_on=[previous.name])
+        workflow = builder.build()
+
+        start = time.monotonic()
+        workflow_result = workflow.execute({})
+        elapsed = time.monotonic() - start
+        workflow.teardown()
+        bus.close()
+
+        result.equal(workflow_result.status, StageStatus.COMPLETED, "Workflow completed")
+        result.less(elapsed, 0.5, "Observer delays were not added to the stages")
+        result.equal(len(observer.results), 20, "Every status change was delivered by teardown")
+        result.equal(
+            [status for name, status in observer.results if name == "get_0"],
+            [StageStatus.RUNNING, StageStatus.COMPLETED, StageStatus.SKIPPED, StageStatus.SKIPPED],
+            "Status changes were delivered in order"
+        )
+
+        bus = ObserverBus([SlowObserver(delay=0.2)], maxsize=1, policy="drop_newest")
+        for i in range(5):
+            bus.update(StageResult(f"stage_{i}", StageStatus.COMPLETED))
+        bus.close()
+        result.greater(bus.dropped, 0, "Results beyond the buffer were dropped")
+        result.equal(bus.delivered + bus.dropped, 5, "Every result was either delivered or dropped")
+
+    @testcase
+    def test_timing_report_finds_critical_path(self, env, result):
+        """The workflow result should carry per-stage spans and the critical path"""
+        workflow = (
+            WorkflowBuilder("timed_workflow", max_workers=2)
+            .add_stage(SleepStage("fetch_short", delay=0.05))
+            .add_stage(SleepStage("fetch_long", delay=0.2))
+            .add_stage(SleepStage("report", delay=0.05), depends_on=["fetch_short", "fetch_long"])
+            .build()
+        )
+
+        workflow_result = workflow.execute({})
+        report = workflow_result.metadata["timing"]
+
+        result.equal(report.critical_path, ["fetch_long", "report"], "Critical path follows the slowest dependency")
+        result.greater_equal(report.critical_path_time, 250_000_000, "Critical path covers both stages")
+        result.less_equal(report.wall_time, workflow_result.timings.span, "Stage spans fit in the workflow span")
+        result.true(
+            all(span.queue_delay is not None for span in report.spans),
+            "Queueing delay was recorded for every stage"
+        )
+        trace = report.to_chrome_trace()
+        result.equal(
+            sorted(event["name"] for event in trace["traceEvents"] if event.get("cat") in ("stage", "critical")),
+            ["fetch_long", "fetch_short", "report"],
+            "Every stage was exported as a trace event"
+        )
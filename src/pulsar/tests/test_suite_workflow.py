@@ -120,6 +120,20 @@ class WorkflowTestSuite:
             rprint(f"[bold red]{error_msg}[/bold red]")
             raise
 
+    @testcase(parameters=[{"mode": "thread"}, {"mode": "process"}])
+    def test_sweep_isolates_workers(self, env: Dict[str, Any], result: Any, mode: str) -> None:
+        """Every sweep point should run against its own dependencies and report its own metrics"""
+        grid = {"num_messages": [5, 10, 15, 20], "duration": 5, "log_type": "application", "limit": 10, "record_latency": True}
+        sweep = self.workflow.sweep(grid, workers=4, mode=mode)
+        points = sweep.run()
+
+        result.equal([point.result.status for point in points], [StageStatus.COMPLETED] * 4, "Every point completed")
+        result.equal([point.metrics.get_metric("pulsar.messages.sent") for point in points], [5, 10, 15, 20],
+                     "Each point's metrics hold its own sends only")
+        summary = sweep.summary.to_dict()
+        result.equal(summary["metrics"]["pulsar.messages.sent"], 50, "Point metrics were merged into the summary")
+        result.equal(summary["latency"]["pulsar.latency.send"]["count"], 50, "Point latencies were merged into the summary")
+
     def teardown(self, env: Dict[str, Any], result: Any) -> None:
         """Clean up workflow and resources"""
         result.log("Tearing down workflow test suite...")